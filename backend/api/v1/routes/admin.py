@@ -0,0 +1,74 @@
+from models import HashtagRelationRebuildReport, HashtagNeighborListRebuildReport, HashtagAssociationRebuildReport, HashtagPaperCountRebuildReport, HashtagRecommendBenchmark, LLMCacheStats, SearchCacheStats
+from services import HashtagService, PaperService
+from api.v1.depedencies import get_hashtag_service, get_paper_service
+from utils.llm_cache import get_llm_cache
+from utils.search_cache import get_search_cache
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+from typing import Optional
+
+router = APIRouter()
+
+@router.post("/hashtag_relations/rebuild", response_model=HashtagRelationRebuildReport)
+async def rebuild_hashtag_relations(
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    return await service.rebuild_relations()
+
+
+@router.post("/hashtag_neighbors/rebuild", response_model=HashtagNeighborListRebuildReport)
+async def rebuild_hashtag_neighbor_lists(
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    return await service.rebuild_neighbor_lists()
+
+
+@router.post("/hashtags/paper_counts/rebuild", response_model=HashtagPaperCountRebuildReport)
+async def rebuild_hashtag_paper_counts(
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    return await service.rebuild_paper_counts()
+
+
+@router.post("/hashtag_relations/weights/rebuild", response_model=HashtagAssociationRebuildReport)
+async def rebuild_hashtag_relation_weights(
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    return await service.rebuild_association_weights()
+
+
+@router.post("/hashtags/recommend/benchmark", response_model=HashtagRecommendBenchmark)
+async def benchmark_hashtag_recommendations(
+    queries: int = Query(50, ge=1, le=1000),
+    size: int = Query(10, ge=1, le=100),
+    num_candidates: Optional[int] = Query(None, ge=1, le=10000),
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    # Recall of the knn mode against the exact mode, with the latency of both
+    return await service.benchmark_recommendations(queries=queries, size=size, num_candidates=num_candidates)
+
+
+@router.post("/papers/static_rank/refresh")
+async def refresh_paper_static_ranks(
+    service: PaperService = Depends(get_paper_service)
+):
+    return {"updated": await service.refresh_static_ranks()}
+
+
+@router.get("/llm_cache/stats", response_model=LLMCacheStats)
+async def get_llm_cache_stats():
+    cache = get_llm_cache()
+    if cache is None:
+        return JSONResponse(content={"error": "LLM cache is disabled"}, status_code=404)
+    
+    return cache.stats()
+
+
+@router.get("/search_cache/stats", response_model=SearchCacheStats)
+async def get_search_cache_stats():
+    cache = get_search_cache()
+    if cache is None:
+        return JSONResponse(content={"error": "Search cache is disabled"}, status_code=404)
+    
+    return cache.stats()
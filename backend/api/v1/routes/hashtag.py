@@ -1,20 +1,41 @@
 from core.config import settings
-from models import Hashtag, HashtagCreate, HashtagUpdate, HashtagListItem, HashtagGraph
+from models import Hashtag, HashtagCreate, HashtagUpdate, HashtagListItem, HashtagGraph, HashtagGraphExpandRequest, HashtagBulkResponse, HashtagPage, HashtagNeighbor
 from services import HashtagService, PdfService
 from api.v1.depedencies import get_hashtag_service, get_pdf_service
+from utils.projection import resolve_projection
+from utils.streaming import NDJSON_MEDIA_TYPE, iter_ndjson
+from utils.hashtag_graph_budget import GraphBudget
 
-from fastapi import APIRouter, Depends, UploadFile, File
-from fastapi.responses import JSONResponse
-from typing import List
+from fastapi import APIRouter, Depends, Query, UploadFile, File
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Literal, Optional, Union
 
 router = APIRouter()
 
-@router.get("/search_name", response_model=List[HashtagListItem])
+Weighting = Literal["count", "pmi", "npmi", "jaccard"]
+
+
+def _check_window(year_from: Optional[int], year_to: Optional[int], weighting: str) -> Optional[JSONResponse]:
+    if year_from is not None and year_to is not None and year_from > year_to:
+        return JSONResponse(content={"error": "year_from is after year_to"}, status_code=400)
+    # Association measures are stored over all years only
+    if weighting != "count" and (year_from is not None or year_to is not None):
+        return JSONResponse(content={"error": f"{weighting} weighting does not support a year window"}, status_code=400)
+    return None
+
+
+@router.get("/search_name", response_model=List[HashtagListItem], response_model_exclude_unset=True)
 async def search_hashtag_by_name(
     query: str,
+    fields: Optional[List[str]] = Query(None, description="Fields to return, repeated or comma separated"),
     service: HashtagService = Depends(get_hashtag_service)
 ):
-    return await service.fuzzy_search_by_name(query)
+    result = await service.fuzzy_search_by_name(query, fields=fields)
+
+    if isinstance(result, tuple):
+        return JSONResponse(content=result[0], status_code=result[1])
+
+    return result
 
 
 @router.get("/{hashtag_id}", response_model=Hashtag)
@@ -30,28 +51,125 @@ async def get_hashtag(
     return result
 
 
-@router.get("/")
+@router.get("/{hashtag_id}/neighbors", response_model=List[HashtagNeighbor])
+async def get_hashtag_neighbors(
+    hashtag_id: str,
+    size: int = Query(settings.default_graph_top_n, ge=1, le=1000),
+    year_from: Optional[int] = Query(None, ge=0, le=9999),
+    year_to: Optional[int] = Query(None, ge=0, le=9999),
+    weighting: Weighting = Query("count"),
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    error = _check_window(year_from, year_to, weighting)
+    if error is not None:
+        return error
+
+    return await service.top_neighbors(hashtag_id, size=size, year_from=year_from, year_to=year_to, weighting=weighting)
+
+
+@router.get("/", response_model=Union[HashtagPage, List[HashtagListItem]], response_model_exclude_unset=True)
 async def list_hashtags(
+    size: Optional[int] = Query(None, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Query(None, description="Fields to return, repeated or comma separated"),
+    format: Literal["json", "ndjson"] = "json",
     service: HashtagService = Depends(get_hashtag_service)
 ):
-    return await service.find_all()
+    # format=ndjson streams every hashtag, one per line, and ignores size and cursor
+    if format == "ndjson":
+        try:
+            resolve_projection(HashtagListItem, fields)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+        return StreamingResponse(iter_ndjson(service.iter_all(fields)), media_type=NDJSON_MEDIA_TYPE)
+
+    # Without size and cursor the response keeps its unpaginated list shape for existing clients
+    if size is None and cursor is None:
+        result = await service.find_all(fields=fields)
+    else:
+        result = await service.find_page(size=size or settings.default_page_size, cursor=cursor, fields=fields)
+
+    if isinstance(result, tuple):
+        return JSONResponse(content=result[0], status_code=result[1])
+
+    return result
 
 
 @router.post("/recommend", response_model=List[HashtagListItem])
 async def recommend_hashtags(
     selected_tags: List[str],
+    size: int = Query(10, ge=1, le=100),
+    mode: Optional[Literal["memory", "knn", "exact"]] = None,
+    num_candidates: Optional[int] = Query(None, ge=1, le=10000),
     service: HashtagService = Depends(get_hashtag_service)
 ):
-    return await service.recommend_related_hashtags(selected_tags)
+    return await service.recommend_related_hashtags(
+        selected_tags, size=size, mode=mode, num_candidates=num_candidates
+    )
+
+
+@router.post("/recommend/batch", response_model=List[List[HashtagListItem]])
+async def recommend_hashtags_batch(
+    selections: List[List[str]],
+    size: int = Query(10, ge=1, le=100),
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    return await service.recommend_batch(selections, size=size)
 
 
 @router.post("/graph", response_model=HashtagGraph)
 async def expand_hashtag_graph(
     tags: List[str],
-    steps: int = settings.default_graph_steps,
+    steps: int = Query(settings.default_graph_steps, ge=1, le=settings.graph_max_steps),
+    year_from: Optional[int] = Query(None, ge=0, le=9999),
+    year_to: Optional[int] = Query(None, ge=0, le=9999),
+    max_nodes: int = Query(settings.graph_max_nodes, ge=1, le=settings.graph_max_nodes),
+    max_edges: int = Query(settings.graph_max_edges, ge=0, le=settings.graph_max_edges),
+    max_fanout: int = Query(settings.graph_max_fanout, ge=1, le=settings.graph_max_fanout),
+    timeout_ms: float = Query(settings.graph_timeout_ms, gt=0, le=settings.graph_timeout_ms),
+    weighting: Weighting = Query("count"),
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    error = _check_window(year_from, year_to, weighting)
+    if error is not None:
+        return error
+
+    # Clients may tighten the budgets but not exceed the configured ones
+    budget = GraphBudget(tags, max_nodes=max_nodes, max_edges=max_edges, max_fanout=max_fanout, timeout_ms=timeout_ms)
+    return await service.expand_graph(
+        start_tags=tags, steps=steps, year_from=year_from, year_to=year_to, budget=budget, weighting=weighting
+    )
+
+
+@router.post("/graph/expand", response_model=HashtagGraph)
+async def expand_hashtag_graph_delta(
+    expand_request: HashtagGraphExpandRequest,
+    steps: int = Query(1, ge=1, le=settings.graph_max_steps),
+    year_from: Optional[int] = Query(None, ge=0, le=9999),
+    year_to: Optional[int] = Query(None, ge=0, le=9999),
+    max_nodes: int = Query(settings.graph_max_nodes, ge=1, le=settings.graph_max_nodes),
+    max_edges: int = Query(settings.graph_max_edges, ge=0, le=settings.graph_max_edges),
+    max_fanout: int = Query(settings.graph_max_fanout, ge=1, le=settings.graph_max_fanout),
+    timeout_ms: float = Query(settings.graph_timeout_ms, gt=0, le=settings.graph_timeout_ms),
+    weighting: Weighting = Query("count"),
     service: HashtagService = Depends(get_hashtag_service)
 ):
-    return await service.expand_graph(start_tags=tags, steps=steps)
+    # Only the tags and relations new to the client are returned, to be merged into its graph
+    error = _check_window(year_from, year_to, weighting)
+    if error is not None:
+        return error
+
+    budget = GraphBudget(
+        expand_request.tags,
+        max_nodes=max_nodes,
+        max_edges=max_edges,
+        max_fanout=max_fanout,
+        timeout_ms=timeout_ms,
+        known_nodes=expand_request.known_nodes
+    )
+    return await service.expand_graph(
+        start_tags=expand_request.tags, steps=steps, year_from=year_from, year_to=year_to, budget=budget, weighting=weighting
+    )
 
 
 @router.post("/", response_model=Hashtag)
@@ -67,6 +185,14 @@ async def create_hashtag(
     return result
 
 
+@router.post("/_bulk", response_model=HashtagBulkResponse)
+async def bulk_create_hashtags(
+    create_data: List[HashtagCreate],
+    service: HashtagService = Depends(get_hashtag_service)
+):
+    return await service.bulk_create(create_data)
+
+
 @router.patch("/{hastag_id}", response_model=Hashtag)
 async def update_hashtag(
     hashtag_id: str,
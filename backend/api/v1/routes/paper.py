@@ -1,10 +1,13 @@
-from models.paper import Paper, PaperCreate, PaperUpdate, PaperSearchRequest
+from core.config import settings
+from models.paper import Paper, PaperCreate, PaperUpdate, PaperSearchRequest, PaperBulkResponse, PaperPage, PaperListItem, PaperSearchResponse
 from services import PaperService
 from api.v1.depedencies import get_paper_service
+from utils.projection import resolve_projection
+from utils.streaming import NDJSON_MEDIA_TYPE, iter_ndjson
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Literal, Optional, Union
 
 router = APIRouter()
 
@@ -22,19 +25,50 @@ async def get_paper(
     return result
 
 
-@router.get("/", response_model=List[Paper])
+@router.get("/", response_model=Union[PaperPage, List[PaperListItem]], response_model_exclude_unset=True)
 async def list_papers(
+    size: Optional[int] = Query(None, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Query(None, description="Fields to return, repeated or comma separated"),
+    format: Literal["json", "ndjson"] = "json",
     service: PaperService = Depends(get_paper_service)
 ):
-    return await service.find_all()
+    # format=ndjson streams every paper, one per line, and ignores size and cursor
+    if format == "ndjson":
+        try:
+            source = resolve_projection(PaperListItem, fields)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+        return StreamingResponse(iter_ndjson(service.iter_all(source)), media_type=NDJSON_MEDIA_TYPE)
+
+    # Without size and cursor the response keeps its unpaginated list shape for existing clients
+    if size is None and cursor is None:
+        result = await service.find_all(fields=fields)
+    else:
+        result = await service.find_page(size=size or settings.default_page_size, cursor=cursor, fields=fields)
 
+    if isinstance(result, tuple):
+        return JSONResponse(content=result[0], status_code=result[1])
+
+    return result
 
-@router.post("/search", response_model=List[Paper])
+
+@router.post(
+    "/search",
+    response_model=Union[List[PaperListItem], PaperSearchResponse],
+    response_model_exclude_unset=True
+)
 async def search_papers(
     search_request: PaperSearchRequest,
     service: PaperService = Depends(get_paper_service)
 ):
-    return await service.search(search_request)
+    # With facets the papers come wrapped together with the total and the facet counts
+    result = await service.search(search_request)
+
+    if isinstance(result, tuple):
+        return JSONResponse(content=result[0], status_code=result[1])
+
+    return result
 
 
 @router.post("/", response_model=Paper)
@@ -50,6 +84,14 @@ async def create_paper(
     return result
 
 
+@router.post("/_bulk", response_model=PaperBulkResponse)
+async def bulk_create_papers(
+    create_data: List[PaperCreate],
+    service: PaperService = Depends(get_paper_service)
+):
+    return await service.bulk_create(create_data)
+
+
 @router.patch("/{paper_id}", response_model=Paper)
 async def update_paper(
     paper_id: str, 
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
+from pathlib import Path
 from typing import List
 
 class Settings(BaseSettings):
@@ -11,12 +12,62 @@ class Settings(BaseSettings):
     es_paper_index: str = "papers"       # alias name
     es_hashtag_index: str = "hashtags"   # alias name
     es_hashtag_relations_index: str = "hashtag_relations" #alias name
+    es_hashtag_neighbors_index: str = "hashtag_neighbors" # alias name
+    es_hashtag_counts_index: str = "hashtag_counts" # alias name
+    es_index_version: str = "1"
+    es_bulk_chunk_size: int = 1000
+    es_retry_on_conflict: int = 3
+    es_scan_page_size: int = 1000
+    es_msearch_chunk_size: int = 200
+    es_pit_keep_alive: str = "1m"
+    es_cursor_keep_alive: str = "5m"
+    es_first_page_keep_alive: str = "30s"   # until a listing asks for its second page
+    default_page_size: int = 100
+    max_page_size: int = 1000
     
     hashtag_emb_dim: int = 256
     default_graph_steps: int = 2
     default_graph_top_n: int = 10
+    hashtag_neighbors_top_n: int = 50   # length of the materialized neighbor list of each hashtag
+    graph_max_steps: int = 5
+    graph_max_nodes: int = 500          # defaults and upper bounds of the per-request graph budgets
+    graph_max_edges: int = 2000
+    graph_max_fanout: int = 200         # new tags per level
+    graph_timeout_ms: float = 2000.0
+    hashtag_recommend_mode: str = "memory"     # "memory", "knn" or "exact"
+    hashtag_knn_num_candidates: int = 100
+    relations_rebuild_max_entries: int = 5_000_000
+    association_refresh_delay: float = 30.0       # seconds without paper writes before the measures are recomputed
+    association_refresh_max_delay: float = 600.0  # longest a paper write waits for its recomputation
+    static_rank_base_year: int = 1990
+    static_rank_pivot: float = 20.0      # rank at which the recency score is half of static_rank_boost
+    static_rank_boost: float = 1.0
+
+    hashtag_vocabulary_mode: str = "verify"    # "trust" or "verify"
+    hashtag_vocabulary_refresh_interval: float = 60.0
+    hashtag_vector_index_enabled: bool = True
+    hashtag_vector_index_refresh_interval: float = 600.0
+    hashtag_graph_engine_enabled: bool = True
+    hashtag_graph_refresh_interval: float = 600.0
+    hashtag_graph_max_overlay_edges: int = 50_000
 
     openai_api_key: str = ""
+    llm_provider: str = "openai"          # "openai" or "local"
+    embedding_provider: str = "local"     # "openai" or "local"
+    hashtag_description_model: str = "gpt-4o"
+    hashtag_suggestion_model: str = "gpt-4o-mini"
+    embedding_model: str = "text-embedding-3-small"
+    llm_max_concurrency: int = 8
+    llm_timeout: float = 30.0
+    llm_max_retries: int = 3
+    llm_retry_backoff: float = 0.5
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = str(Path.home() / ".cache" / "paperhive" / "llm_cache.sqlite3")
+    llm_cache_max_mb: int = 512
+    search_cache_enabled: bool = True
+    search_cache_max_entries: int = 1024
+    search_cache_ttl: float = 60.0
+    search_cache_write_settle: float = 1.0   # seconds, the index refresh interval
  
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,24 +1,37 @@
 from core.config import settings
+from core.logging import logger
 from db.elastic import get_elasticsearch
 from schemas.v1 import (
     paper_index_mapping, 
     hashtag_index_mapping,
-    hashtag_relations_index_mapping
+    hashtag_relations_index_mapping,
+    hashtag_neighbors_index_mapping,
+    hashtag_counts_index_mapping
 )
 from migrations.index_migration import init_index, migrate_index
-from api.v1.routes import paper, hashtag
+from migrations.hashtag_relations_by_year import cnt_by_year_reindex_script
+from api.v1.routes import paper, hashtag, admin
 from utils.es_warmup import wait_for_es
+from utils.hashtag_vocabulary import get_hashtag_vocabulary
+from utils.hashtag_vector_index import get_hashtag_vector_index
+from utils.hashtag_graph import get_hashtag_graph_engine
+from utils.hashtag_association_refresh import get_association_weight_refresher
+from utils.static_rank import refresh_static_ranks
+from utils.hashtag_relations_rebuild import rebuild_tag_paper_counts
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
 
 async def init_or_migrate_indices(es):
     indices = [
         {
             "alias": settings.es_paper_index,
-            "schema": paper_index_mapping
+            "schema": paper_index_mapping,
+            # Reindexed papers may predate fields computed at ingest
+            "after_migrate": refresh_static_ranks
         },
         {
             "alias": settings.es_hashtag_index,
@@ -26,16 +39,31 @@ async def init_or_migrate_indices(es):
         },
         {
             "alias": settings.es_hashtag_relations_index,
-            "schema": hashtag_relations_index_mapping
+            "schema": hashtag_relations_index_mapping,
+            "reindex_script": cnt_by_year_reindex_script
+        },
+        {
+            "alias": settings.es_hashtag_neighbors_index,
+            "schema": hashtag_neighbors_index_mapping
+        },
+        {
+            "alias": settings.es_hashtag_counts_index,
+            "schema": hashtag_counts_index_mapping,
+            # Counted from the papers when the index is first created
+            "after_create": rebuild_tag_paper_counts
         }
     ]
-    version = "1"
+    version = settings.es_index_version
 
     for index in indices:
         alias = index["alias"]
         schema = index["schema"]
-        await init_index(es=es, version=version, alias=alias, schema=schema)
-        await migrate_index(es=es, version=version, alias=alias, schema=schema, delete_old=True)
+        created = await init_index(es=es, version=version, alias=alias, schema=schema)
+        if created and index.get("after_create"):
+            await index["after_create"](es)
+        migrated = await migrate_index(es=es, version=version, alias=alias, schema=schema, delete_old=True, script=index.get("reindex_script"))
+        if migrated and index.get("after_migrate"):
+            await index["after_migrate"](es)
         
     
 @asynccontextmanager
@@ -46,9 +74,38 @@ async def lifespan(app: FastAPI):
         await wait_for_es(es)
         await init_or_migrate_indices(es)
 
+    es = get_elasticsearch()
+    vocabulary = get_hashtag_vocabulary()
+    try:
+        await vocabulary.load(es)
+    except Exception as e:
+        logger.warning(f"Hashtag vocabulary not loaded, checking hashtags against Elasticsearch: {e}")
+    refresh_tasks = [asyncio.create_task(vocabulary.refresh_forever(es))]
+
+    vector_index = get_hashtag_vector_index()
+    if vector_index is not None:
+        try:
+            await vector_index.load(es)
+        except Exception as e:
+            logger.warning(f"Hashtag vector index not loaded, recommending through Elasticsearch: {e}")
+        refresh_tasks.append(asyncio.create_task(vector_index.refresh_forever(es)))
+
+    graph_engine = get_hashtag_graph_engine()
+    if graph_engine is not None:
+        try:
+            await graph_engine.load(es)
+        except Exception as e:
+            logger.warning(f"Hashtag graph engine not loaded, expanding graphs through Elasticsearch: {e}")
+        refresh_tasks.append(asyncio.create_task(graph_engine.refresh_forever(es)))
+
+    # Recomputes the association measures a while after paper writes of this worker
+    refresh_tasks.append(asyncio.create_task(get_association_weight_refresher().refresh_forever(es)))
+
     yield  # Yield control to the app
 
     # --- Shutdown ---
+    for refresh_task in refresh_tasks:
+        refresh_task.cancel()
     if settings.environment == "development":
         es = get_elasticsearch()
         if es:
@@ -70,4 +127,5 @@ def root():
     return {"message": "Hello from FastAPI + Elasticsearch"}
 
 app.include_router(paper.router, prefix="/api/v1/papers", tags=["papers"])
-app.include_router(hashtag.router, prefix="/api/v1/hashtags", tags=["hashtags"])
\ No newline at end of file
+app.include_router(hashtag.router, prefix="/api/v1/hashtags", tags=["hashtags"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
\ No newline at end of file
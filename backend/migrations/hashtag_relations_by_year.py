@@ -0,0 +1,20 @@
+# Converts relations written with paper_cnt_by_year as a {"<year>": cnt} object
+# to the nested [{"year": <year>, "cnt": cnt}] layout while reindexing
+cnt_by_year_reindex_script = {
+    "lang": "painless",
+    "source": """
+        def stored = ctx._source.paper_cnt_by_year;
+        if (stored instanceof Map) {
+            def years = new ArrayList(stored.keySet());
+            Collections.sort(years);
+            def entries = new ArrayList();
+            for (def year : years) {
+                def cnt = stored.get(year);
+                if (cnt != null && cnt > 0) {
+                    entries.add(['year': Integer.parseInt(year.toString()), 'cnt': cnt]);
+                }
+            }
+            ctx._source.paper_cnt_by_year = entries;
+        }
+    """
+}
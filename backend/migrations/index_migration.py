@@ -1,5 +1,5 @@
 from elasticsearch import AsyncElasticsearch
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 
 
@@ -10,12 +10,52 @@ async def is_new_mappings(es: AsyncElasticsearch, alias: str, schema: Dict[str,
     return schema["mappings"] != old_mappings, index
 
 
+def build_index_name(alias: str, version: str) -> str:
+    ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    return f"{alias}_v{version}.{ts}"
+
+
+async def switch_alias(
+    es: AsyncElasticsearch,
+    alias: str,
+    old_index: str,
+    new_index: str,
+    delete_old: bool = False
+):
+    await es.indices.update_aliases(body={
+        "actions": [
+            {"remove": {"index": old_index, "alias": alias}},
+            {"add": {"index": new_index, "alias": alias}}
+        ]
+    })
+
+    if delete_old:
+        await es.indices.delete(index=old_index)
+
+
+async def point_alias(es: AsyncElasticsearch, alias: str, new_index: str, delete_old: bool = True):
+    # Moves `alias` to a freshly built index, whatever it pointed to before
+    if await es.indices.exists_alias(name=alias):
+        old_indices = list((await es.indices.get_alias(name=alias)).keys())
+        for old_index in old_indices:
+            await switch_alias(es, alias, old_index, new_index, delete_old=delete_old)
+    elif await es.indices.exists(index=alias):
+        # A concrete index auto-created under the alias name only holds derived data
+        await es.indices.update_aliases(body={
+            "actions": [
+                {"remove_index": {"index": alias}},
+                {"add": {"index": new_index, "alias": alias}}
+            ]
+        })
+    else:
+        await es.indices.put_alias(index=new_index, name=alias)
+
+
 async def init_index(es: AsyncElasticsearch, version: str, alias: str, schema: Dict[str, any]):
     if await es.indices.exists(index=alias):
         return False
     
-    ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    index = f"{alias}_v{version}.{ts}"
+    index = build_index_name(alias, version)
     
     await es.indices.create(index=index, body=schema)
     await es.indices.put_alias(index=index, name=alias)
@@ -28,37 +68,30 @@ async def migrate_index(
     version: str,
     alias: str, 
     schema: Dict[str, any],
-    delete_old: bool = False
+    delete_old: bool = False,
+    script: Optional[Dict[str, any]] = None
 ):
     is_new, old_index = await is_new_mappings(es, alias, schema)
     
     if not is_new:
         return False
 
-    ts = datetime.utcnow().strftime("%Y%m%d%H%M%S") 
-    new_index = f"{alias}_v{version}.{ts}" 
+    new_index = build_index_name(alias, version)
 
     # Create New Index
     await es.indices.create(index=new_index, body=schema)
     
-    # Reindex From Old to New
-    await es.reindex(
-        body={
-            "source": {"index": old_index},
-            "dest": {"index": new_index} 
-        }, 
-        wait_for_completion=True
-    )
+    # Reindex From Old to New, converting documents with `script` when the layout changed
+    body = {
+        "source": {"index": old_index},
+        "dest": {"index": new_index}
+    }
+    if script is not None:
+        body["script"] = script
+    await es.reindex(body=body, wait_for_completion=True)
     await es.indices.refresh(index=new_index)
 
-    # Switch Alias
-    await es.indices.update_aliases(body={
-        "actions": [
-            {"remove": {"index": old_index, "alias": alias}},
-            {"add": {"index": new_index, "alias": alias}}
-        ]
-    })
+    # Switch Alias and delete old index (after verification)
+    await switch_alias(es, alias, old_index, new_index, delete_old=delete_old)
 
-    # Delete Old Index (after verification)
-    if delete_old:
-        await es.indices.delete(index=old_index)
\ No newline at end of file
+    return True
\ No newline at end of file
@@ -1,2 +1,3 @@
 from .paper import *
-from .hashtag import *
\ No newline at end of file
+from .hashtag import *
+from .cache import *
\ No newline at end of file
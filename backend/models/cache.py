@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+
+
+class LLMCacheStats(BaseModel):
+    path: str
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class SearchCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    ttl: float
+    generation: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    hit_rate: float
@@ -1,8 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 from uuid import uuid4
 
 
+class HashtagYearCount(BaseModel):
+    year: int
+    cnt: int
+
+
 class Hashtag(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid4()))
     name: str
@@ -22,19 +27,130 @@ class HashtagUpdate(BaseModel):
     embedding: Optional[List[float]] = None
 
 
+class HashtagBulkItem(BaseModel):
+    position: int
+    id: Optional[str] = None
+    status: int
+    error: Optional[str] = None
+
+
+class HashtagBulkResponse(BaseModel):
+    created: int
+    failed: int
+    items: List[HashtagBulkItem]
+
+
+class HashtagPaperCounts(BaseModel):
+    paper_count: int = 0                            # papers tagged with it, kept by paper writes
+    paper_cnt_by_year: List[HashtagYearCount] = []  # the same papers per year, in year order
+
+
 class HashtagListItem(BaseModel):
+    # Projected to the requested fields on the list and search routes, unset fields are left out
     name: str
-    description: str
+    description: Optional[str] = None
+    paper_count: int = 0
+    paper_cnt_by_year: List[HashtagYearCount] = []
+
+
+class HashtagPage(BaseModel):
+    items: List[HashtagListItem]
+    next_cursor: Optional[str] = None
+
+
+class HashtagRecommendBenchmark(BaseModel):
+    queries: int
+    size: int
+    num_candidates: int
+    recall: float
+    exact_p50_ms: float
+    exact_p95_ms: float
+    knn_p50_ms: float
+    knn_p95_ms: float
+    memory_recall: Optional[float] = None
+    memory_p50_ms: Optional[float] = None
+    memory_p95_ms: Optional[float] = None
 
 
 class HashtagEdge(BaseModel):
     src: str
     dst: str
-    weight: int
+    weight: float       # paper count, or the association measure asked for
     total_cnt: int
     cnt_by_year: Dict[str, int]
 
 
+class HashtagNeighbor(BaseModel):
+    name: str
+    weight: float
+
+
+class HashtagGraphLevelStats(BaseModel):
+    level: int
+    frontier: int       # tags expanded at this level
+    es_calls: int
+    took_ms: float
+
+
+class HashtagNode(BaseModel):
+    name: str
+    paper_count: int = 0                            # over all years, also with a year window
+    paper_cnt_by_year: List[HashtagYearCount] = []
+
+
 class HashtagGraph(BaseModel):
-    nodes: List[str]
-    edges: List[HashtagEdge]
\ No newline at end of file
+    nodes: List[HashtagNode]
+    edges: List[HashtagEdge]
+    levels: List[HashtagGraphLevelStats] = []
+    truncated_by: Optional[Literal["max_nodes", "max_edges", "max_fanout", "deadline"]] = None
+
+
+class HashtagGraphExpandRequest(BaseModel):
+    tags: List[str]                  # tags to expand
+    known_nodes: List[str] = []      # tags the client already has, left out of the response
+
+
+class HashtagRelationFailure(BaseModel):
+    src: str
+    dst: str
+    status: int
+    error: str
+
+
+class HashtagRelationUpdateReport(BaseModel):
+    updated: int = 0
+    failed: List[HashtagRelationFailure] = []
+
+
+class HashtagNeighborListRebuildReport(BaseModel):
+    index: str
+    relations: int
+    lists: int
+    failed: int
+    took_ms: int
+
+
+class HashtagPaperCountRebuildReport(BaseModel):
+    papers: int
+    hashtags: int
+    failed: int
+    took_ms: int
+
+
+class HashtagAssociationRebuildReport(BaseModel):
+    papers: int
+    hashtags: int
+    relations: int
+    failed: int
+    took_ms: int
+
+
+class HashtagRelationRebuildReport(BaseModel):
+    index: str
+    papers: int
+    relations: int
+    failed: int
+    spilled_runs: int
+    took_ms: int
+    association_weights: Optional[HashtagAssociationRebuildReport] = None  # set when the measures were recomputed too
+    neighbor_lists: Optional[HashtagNeighborListRebuildReport] = None      # set when the lists were rebuilt too
@@ -1,3 +1,5 @@
+from .hashtag import HashtagRelationUpdateReport
+
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import uuid4
@@ -33,9 +35,71 @@ class PaperUpdate(BaseModel):
     hashtags: Optional[List[str]] = None
 
 
+class PaperFacetRequest(BaseModel):
+    # Bucket counts to compute over all matching papers, 0 or None skips a facet
+    hashtags: Optional[int] = Field(20, ge=0, le=1000)
+    authors: Optional[int] = Field(10, ge=0, le=1000)
+    year_interval: Optional[int] = Field(1, ge=0)
+
+
 class PaperSearchRequest(BaseModel):
     query: Optional[str] = None
     must: Optional[List[str]] = []
     should: Optional[List[str]] = []
     must_not: Optional[List[str]] = []
     size: int = 20
+    fields: Optional[List[str]] = None
+    facets: Optional[PaperFacetRequest] = None
+
+
+class PaperListItem(BaseModel):
+    # A Paper projected to the requested fields, unset fields are left out of responses
+    id: str
+    arxiv_id: Optional[str] = None
+    doi: Optional[str] = None
+    title: Optional[str] = None
+    abstract: Optional[str] = None
+    year: Optional[int] = None
+    authors: Optional[List[str]] = None
+    hashtags: Optional[List[str]] = None
+
+
+class FacetBucket(BaseModel):
+    key: str
+    count: int
+
+
+class YearBucket(BaseModel):
+    year: int
+    count: int
+
+
+class PaperFacetCounts(BaseModel):
+    hashtags: List[FacetBucket] = []
+    authors: List[FacetBucket] = []
+    years: List[YearBucket] = []
+
+
+class PaperSearchResponse(BaseModel):
+    items: List[PaperListItem]
+    total: int
+    facets: PaperFacetCounts
+
+
+class PaperPage(BaseModel):
+    items: List[PaperListItem]
+    next_cursor: Optional[str] = None
+
+
+class PaperBulkItem(BaseModel):
+    position: int
+    id: Optional[str] = None
+    status: int
+    error: Optional[str] = None
+
+
+class PaperBulkResponse(BaseModel):
+    created: int
+    failed: int
+    items: List[PaperBulkItem]
+    relations: HashtagRelationUpdateReport
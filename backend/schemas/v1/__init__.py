@@ -1,3 +1,5 @@
 from .paper_mapping import paper_index_mapping
 from .hashtag_mapping import hashtag_index_mapping
-from .hashtag_relations_mapping import hashtag_relations_index_mapping
\ No newline at end of file
+from .hashtag_relations_mapping import hashtag_relations_index_mapping
+from .hashtag_neighbors_mapping import hashtag_neighbors_index_mapping
+from .hashtag_counts_mapping import hashtag_counts_index_mapping
\ No newline at end of file
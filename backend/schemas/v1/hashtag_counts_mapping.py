@@ -0,0 +1,22 @@
+hashtag_counts_index_mapping = {
+    "mappings": {
+        "properties": {
+            # "id": tag
+            "tag": {"type": "keyword"},
+            # Papers tagged with it, kept by paper writes apart from the hashtag document and its embedding
+            "paper_count": {"type": "integer"},
+            # The same papers as nested {year, cnt} entries, like the counts of hashtag relations
+            "paper_cnt_by_year": {
+                "type": "nested",
+                "properties": {
+                    "year": {"type": "integer"},
+                    "cnt": {"type": "integer"}
+                }
+            }
+        }
+    },
+    "settings": {
+        "number_of_shards": 1,
+        "number_of_replicas": 1
+    }
+}
@@ -0,0 +1,21 @@
+hashtag_neighbors_index_mapping = {
+    "mappings": {
+        "properties": {
+            # "id": tag
+            "tag": {"type": "keyword"},
+            # Heaviest relations of the tag by paper_cnt_total, in descending weight
+            "neighbors": {
+                "properties": {
+                    "name": {"type": "keyword"},
+                    "weight": {"type": "integer", "index": False}
+                }
+            },
+            # No relation left out of `neighbors` is heavier than this
+            "floor": {"type": "integer", "index": False}
+        }
+    },
+    "settings": {
+        "number_of_shards": 1,
+        "number_of_replicas": 1
+    }
+}
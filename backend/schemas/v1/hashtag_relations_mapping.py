@@ -5,7 +5,18 @@ hashtag_relations_index_mapping = {
             "src": {"type": "keyword"},
             "dst": {"type": "keyword"},
             "paper_cnt_total": {"type": "integer"},
-            "paper_cnt_by_year": {"type": "object"}
+            # Association measures, recomputed when the counts of the pair change
+            "pmi": {"type": "float"},
+            "npmi": {"type": "float"},
+            "jaccard": {"type": "float"},
+            # One nested {year, cnt} entry per year, so new years add no fields to the mapping
+            "paper_cnt_by_year": {
+                "type": "nested",
+                "properties": {
+                    "year": {"type": "integer"},
+                    "cnt": {"type": "integer"}
+                }
+            }
         }   
     },
     "settings": {
@@ -8,6 +8,7 @@ paper_index_mapping = {
             "doi": {"type": "keyword"},
             "year": {"type": "integer"},
             "hashtags": {"type": "keyword"},
+            "static_rank": {"type": "rank_feature"},
         }
     },
     "settings": {
@@ -0,0 +1,90 @@
+from utils.hashtag_graph import HashtagGraphEngine
+
+import argparse
+import asyncio
+import numpy as np
+import statistics
+import time
+import tracemalloc
+
+####
+# To run this script at the project root: `PYTHONPATH=./backend python backend/scripts/benchmark_hashtag_graph.py --edges 1000000`
+#
+# Builds the in-memory hashtag graph from synthetic relations with skewed tag popularity, then
+# reports its memory and the latency of top-N neighbors, expand_graph (also within a year window and
+# up to the default budgets), k-hop and delta queries.
+####
+
+
+def synthetic_relations(tags, edges, years_per_edge, rng):
+    # Zipf-like popularity, so a few tags have very large neighborhoods as in the real corpus
+    popularity = 1.0 / np.arange(1, tags + 1) ** 0.8
+    popularity /= popularity.sum()
+    src = rng.choice(tags, size=2 * edges, p=popularity)
+    dst = rng.choice(tags, size=2 * edges, p=popularity)
+    pairs = np.unique(np.stack([np.minimum(src, dst), np.maximum(src, dst)], axis=1), axis=0)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    pairs = pairs[rng.permutation(len(pairs))[:edges]]
+
+    entry_edges = np.repeat(np.arange(len(pairs), dtype=np.int32), years_per_edge)
+    years = rng.integers(2000, 2026, size=len(entry_edges)).astype(np.int16)
+    counts = rng.geometric(0.3, size=len(entry_edges)).astype(np.int32)
+    return pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.int32), entry_edges, years, counts
+
+
+def measure(name, calls, repeat):
+    wall = []
+    for call in calls[:repeat]:
+        started = time.perf_counter()
+        call()
+        wall.append((time.perf_counter() - started) * 1_000_000)
+    quantiles = statistics.quantiles(wall, n=100)
+    print(f"{name:>24}: p50 {quantiles[49]:.1f} us, p95 {quantiles[94]:.1f} us")
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    arrays = synthetic_relations(args.tags, args.edges, args.years_per_edge, rng)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    engine = HashtagGraphEngine()
+    for tag in range(args.tags):
+        engine._tag_id(f"tag{tag}")
+    engine.set_relations(*arrays)
+    engine.loaded = True
+    build_s = time.perf_counter() - started
+    traced, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{engine.edge_count} edges, {len(engine.tags)} tags, {len(engine.year_keys)} (edge, year) counts, built in {build_s:.1f} s\n"
+        f"arrays {engine.nbytes / 2**20:.1f} MB, with tag table {traced / 2**20:.1f} MB, build peak {peak / 2**20:.1f} MB"
+    )
+
+    sample = [f"tag{tag}" for tag in rng.integers(0, args.tags, size=args.queries)]
+    measure("top_neighbors(10)", [lambda tag=tag: engine.top_neighbors(tag, 10) for tag in sample], args.queries)
+    measure("expand(steps=2, 10)", [lambda tag=tag: engine.expand([tag], 2, 10) for tag in sample], args.queries)
+    measure("top_neighbors(10) 2020-", [lambda tag=tag: engine.top_neighbors(tag, 10, year_from=2020) for tag in sample], args.queries)
+    measure("expand(2, 10) 2020-", [lambda tag=tag: engine.expand([tag], 2, 10, year_from=2020) for tag in sample], args.queries)
+    measure("expand(5, 10) budgeted", [lambda tag=tag: engine.expand([tag], 5, 10) for tag in sample], args.queries)
+    measure("k_hop(2)", [lambda tag=tag: engine.k_hop([tag], 2) for tag in sample], args.queries // 10)
+
+    deltas = [{(f"tag{a}", f"tag{b}") if f"tag{a}" < f"tag{b}" else (f"tag{b}", f"tag{a}"): {"2025": 1}}
+              for a, b in rng.integers(0, args.tags, size=(args.queries, 2)) if a != b]
+    measure("apply_deltas(1 pair)", [lambda delta=delta: engine.apply_deltas(delta) for delta in deltas], len(deltas))
+    measure("top_neighbors overlay", [lambda tag=tag: engine.top_neighbors(tag, 10) for tag in sample], args.queries)
+
+    started = time.perf_counter()
+    asyncio.run(engine.compact())
+    print(f"{'compact':>24}: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the in-memory hashtag graph engine")
+    parser.add_argument("--tags", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--years-per-edge", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=2000)
+
+    main(parser.parse_args())
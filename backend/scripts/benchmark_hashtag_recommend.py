@@ -0,0 +1,112 @@
+from core.config import settings
+from db.elastic import get_elasticsearch
+from schemas.v1 import hashtag_index_mapping
+from services import HashtagService
+
+import argparse
+import asyncio
+import copy
+import numpy as np
+
+####
+# To run this script at the project root: `PYTHONPATH=./backend python backend/scripts/benchmark_hashtag_recommend.py`
+#
+# Compares the knn recommendation mode with the exact script_score mode: recall@size of knn
+# against exact, and the latency of both. Without --synthetic it runs on the hashtag index.
+# With --synthetic N it loads N clustered random vectors into a scratch index first, run it for
+# N = 1000, 10000, ... 1000000 to see how each mode scales with the vocabulary.
+####
+
+
+def iter_synthetic_hashtags(count, dim, clusters, seed=0):
+    # Vectors around a few random centers, so neighbours are meaningful as in a real vocabulary
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    for start in range(0, count, 10_000):
+        n = min(10_000, count - start)
+        vectors = centers[rng.integers(0, clusters, size=n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+        for i, vector in enumerate(vectors):
+            yield f"tag{start + i}", vector.tolist()
+
+
+async def load_synthetic(es, index, count, dim, clusters, chunk_size, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(operations):
+        try:
+            await es.bulk(operations=operations)
+        finally:
+            semaphore.release()
+
+    tasks, operations, loaded = [], [], 0
+    for name, embedding in iter_synthetic_hashtags(count, dim, clusters):
+        operations.append({"index": {"_index": index, "_id": name}})
+        operations.append({"name": name, "embedding": embedding})
+        if len(operations) == 2 * chunk_size:
+            # Bounds both the requests in flight and the batches held in memory
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(send(operations)))
+            loaded += chunk_size
+            operations = []
+            print(f"\rLoaded {loaded}/{count}", end="")
+    if operations:
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(send(operations)))
+
+    await asyncio.gather(*tasks)
+    await es.indices.refresh(index=index)
+    await es.indices.forcemerge(index=index, max_num_segments=1)
+    print()
+
+
+async def main(args):
+    es = get_elasticsearch()
+    service = HashtagService(es)
+
+    try:
+        if args.synthetic:
+            service.index = args.index
+            if not args.reuse or not await es.indices.exists(index=args.index):
+                schema = copy.deepcopy(hashtag_index_mapping)
+                schema["settings"]["number_of_replicas"] = 0
+                await es.options(ignore_status=404).indices.delete(index=args.index)
+                await es.indices.create(index=args.index, body=schema)
+                await load_synthetic(
+                    es, args.index, args.synthetic, settings.hashtag_emb_dim, args.clusters, args.chunk_size, args.concurrency
+                )
+
+        # Warm up both modes before measuring
+        await service.benchmark_recommendations(queries=max(1, args.queries // 10), size=args.size, seed=1)
+        report = await service.benchmark_recommendations(
+            queries=args.queries,
+            tags_per_query=args.tags_per_query,
+            size=args.size,
+            num_candidates=args.num_candidates
+        )
+
+        count = (await es.count(index=service.index))["count"]
+        print(f"{count} hashtags, {report.queries} queries, size={report.size}, num_candidates={report.num_candidates}")
+        print(f"recall@{report.size}: {report.recall:.3f}")
+        print(f"exact: p50 {report.exact_p50_ms:.1f} ms, p95 {report.exact_p95_ms:.1f} ms")
+        print(f"  knn: p50 {report.knn_p50_ms:.1f} ms, p95 {report.knn_p95_ms:.1f} ms")
+    finally:
+        if args.synthetic and not args.keep:
+            await es.options(ignore_status=404).indices.delete(index=args.index)
+        await es.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare knn and exact hashtag recommendations")
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark on N synthetic hashtags in a scratch index")
+    parser.add_argument("--index", default=f"{settings.es_hashtag_index}_bench_recommend")
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--tags-per-query", type=int, default=2)
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--num-candidates", type=int, default=settings.hashtag_knn_num_candidates)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch index for later runs")
+    parser.add_argument("--reuse", action="store_true", help="Reuse a kept scratch index instead of reloading")
+
+    asyncio.run(main(parser.parse_args()))
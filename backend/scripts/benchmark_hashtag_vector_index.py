@@ -0,0 +1,65 @@
+from core.config import settings
+from models import HashtagListItem
+from utils.hashtag_vector_index import HashtagVectorIndex
+
+import argparse
+import numpy as np
+import statistics
+import time
+
+####
+# To run this script at the project root: `PYTHONPATH=./backend python backend/scripts/benchmark_hashtag_vector_index.py --tags 100000`
+#
+# Measures in-process recommendation latency of the hashtag vector index on random embeddings:
+# one selection at a time, and many selections scored in one matrix multiply.
+####
+
+
+def summarize(name, wall, per=1):
+    quantiles = statistics.quantiles(wall, n=100)
+    print(
+        f"{name:>12}: p50 {quantiles[49] / per:.3f} ms, p95 {quantiles[94] / per:.3f} ms, "
+        f"mean {statistics.mean(wall) / per:.3f} ms per selection"
+    )
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    index = HashtagVectorIndex(dim=args.dim)
+
+    start = time.perf_counter()
+    for i, vector in enumerate(rng.normal(size=(args.tags, args.dim)).astype(np.float32)):
+        index.upsert(f"tag{i}", vector, HashtagListItem(name=f"tag{i}", description=""))
+    index.loaded = True
+    print(f"{args.tags} tags x {args.dim} dims loaded in {time.perf_counter() - start:.1f} s, {index.vectors.nbytes / 2**20:.0f} MB")
+
+    selections = [[f"tag{j}" for j in rng.integers(0, args.tags, size=args.tags_per_query)] for _ in range(args.queries)]
+
+    for selected_tags in selections[:10]:
+        index.recommend(selected_tags, args.size)
+
+    single = []
+    for selected_tags in selections:
+        started = time.perf_counter()
+        index.recommend(selected_tags, args.size)
+        single.append((time.perf_counter() - started) * 1000)
+    summarize("single", single)
+
+    batched = []
+    for start in range(0, len(selections) - args.batch_size + 1, args.batch_size):
+        started = time.perf_counter()
+        index.recommend_batch(selections[start: start + args.batch_size], args.size)
+        batched.append((time.perf_counter() - started) * 1000)
+    summarize(f"batch of {args.batch_size}", batched, per=args.batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the in-process hashtag vector index")
+    parser.add_argument("--tags", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=settings.hashtag_emb_dim)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--tags-per-query", type=int, default=2)
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+
+    main(parser.parse_args())
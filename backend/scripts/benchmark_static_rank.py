@@ -0,0 +1,158 @@
+from core.config import settings
+from db.elastic import get_elasticsearch
+from schemas.v1 import paper_index_mapping
+from utils.static_rank import build_static_rank_query, compute_static_rank
+
+import argparse
+import asyncio
+import copy
+import random
+import statistics
+import time
+
+####
+# To run this script at the project root: `PYTHONPATH=./backend python backend/scripts/benchmark_static_rank.py --docs 1000000`
+#
+# Loads synthetic papers into a scratch index and compares search latency of the former
+# function_score on year against the static_rank rank_feature query, on the same queries.
+####
+
+WORDS = [
+    "quantum", "learning", "neural", "graph", "error", "correction", "entanglement", "network", "model",
+    "optimization", "circuit", "simulation", "algorithm", "language", "vision", "transformer", "sparse",
+    "retrieval", "memory", "gradient", "kernel", "topological", "photonic", "variational", "robust"
+]
+
+
+def build_function_score_query(bool_query):
+    # The query PaperService.search used before static ranks
+    return {
+        "function_score": {
+            "query": bool_query,
+            "boost_mode": "sum",
+            "score_mode": "sum",
+            "functions": [{"field_value_factor": {"field": "year", "factor": 1, "missing": 2000}}]
+        }
+    }
+
+
+def random_paper(rng, hashtag_cnt):
+    year = rng.randint(1990, 2025)
+    return {
+        "title": " ".join(rng.choices(WORDS, k=8)),
+        "abstract": " ".join(rng.choices(WORDS, k=60)),
+        "year": year,
+        "hashtags": [f"tag{rng.randint(0, hashtag_cnt - 1)}" for _ in range(5)],
+        "static_rank": compute_static_rank(year)
+    }
+
+
+def random_bool_query(rng, hashtag_cnt):
+    bool_query = {"should": [], "must": []}
+    if rng.random() < 0.7:
+        bool_query["should"].append({
+            "multi_match": {"query": " ".join(rng.sample(WORDS, 2)), "fields": ["title^3", "abstract"], "fuzziness": "AUTO"}
+        })
+    if rng.random() < 0.5 or not bool_query["should"]:
+        bool_query["should"].append({"terms": {"hashtags": [f"tag{rng.randint(0, hashtag_cnt - 1)}" for _ in range(3)]}})
+    return {"bool": bool_query}
+
+
+async def load_docs(es, index, docs, hashtag_cnt, chunk_size, concurrency):
+    rng = random.Random(0)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(operations):
+        try:
+            await es.bulk(operations=operations)
+        finally:
+            semaphore.release()
+
+    tasks = []
+    for start in range(0, docs, chunk_size):
+        operations = []
+        for _ in range(min(chunk_size, docs - start)):
+            operations.append({"index": {"_index": index}})
+            operations.append(random_paper(rng, hashtag_cnt))
+        # Bounds both the requests in flight and the batches held in memory
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(send(operations)))
+        print(f"\rLoaded {start + len(operations) // 2}/{docs}", end="")
+
+    await asyncio.gather(*tasks)
+    await es.indices.refresh(index=index)
+    await es.indices.forcemerge(index=index, max_num_segments=1)
+    print()
+
+
+async def measure(es, index, queries, size):
+    took, wall = [], []
+    for query in queries:
+        start = time.perf_counter()
+        es_resp = await es.search(index=index, query=query, size=size, source=False, request_cache=False)
+        wall.append((time.perf_counter() - start) * 1000)
+        took.append(es_resp["took"])
+    return took, wall
+
+
+def summarize(name, took, wall):
+    quantiles = statistics.quantiles(wall, n=100)
+    print(
+        f"{name:>16}: took p50 {statistics.median(took):.1f} ms | "
+        f"wall p50 {quantiles[49]:.1f} ms, p95 {quantiles[94]:.1f} ms, mean {statistics.mean(wall):.1f} ms"
+    )
+
+
+async def main(args):
+    es = get_elasticsearch()
+    schema = copy.deepcopy(paper_index_mapping)
+    schema["settings"]["number_of_replicas"] = 0
+
+    try:
+        if not args.reuse or not await es.indices.exists(index=args.index):
+            await es.options(ignore_status=404).indices.delete(index=args.index)
+            await es.indices.create(index=args.index, body=schema)
+            await load_docs(es, args.index, args.docs, args.hashtags, args.chunk_size, args.concurrency)
+
+        rng = random.Random(1)
+        bool_queries = [random_bool_query(rng, args.hashtags) for _ in range(args.queries)]
+        variants = {
+            "function_score": [build_function_score_query(query) for query in bool_queries],
+            "rank_feature": [build_static_rank_query(query) for query in bool_queries]
+        }
+
+        # Warm up caches and JIT for both variants before measuring
+        for queries in variants.values():
+            await measure(es, args.index, queries[: max(1, args.queries // 10)], args.size)
+
+        results = {name: ([], []) for name in variants}
+        for _ in range(args.rounds):
+            for name, queries in variants.items():
+                took, wall = await measure(es, args.index, queries, args.size)
+                results[name][0].extend(took)
+                results[name][1].extend(wall)
+
+        count = (await es.count(index=args.index))["count"]
+        print(f"{count} docs, {args.queries} queries x {args.rounds} rounds, size={args.size}")
+        for name, (took, wall) in results.items():
+            summarize(name, took, wall)
+    finally:
+        if not args.keep:
+            await es.options(ignore_status=404).indices.delete(index=args.index)
+        await es.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare function_score on year with the static_rank rank_feature")
+    parser.add_argument("--index", default=f"{settings.es_paper_index}_bench_static_rank")
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--hashtags", type=int, default=5000, help="Distinct synthetic hashtags")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch index for later runs")
+    parser.add_argument("--reuse", action="store_true", help="Reuse a kept scratch index instead of reloading")
+
+    asyncio.run(main(parser.parse_args()))
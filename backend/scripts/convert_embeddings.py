@@ -0,0 +1,32 @@
+from utils.embedding_store import embedding_store_to_json, json_to_embedding_store, SUPPORTED_DTYPES
+
+import argparse
+
+####
+# To run this script at the project root: `PYTHONPATH=./backend python backend/scripts/convert_embeddings.py to-store <json> <store_dir>`
+#
+# Converts hashtag embeddings between the {"tag": [floats]} JSON format and the memory-mapped
+# embedding store (see utils/embedding_store.py). Both directions stream, so neither side is held in memory.
+####
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert hashtag embeddings between JSON and the binary store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    to_store = subparsers.add_parser("to-store", help="JSON file to store directory")
+    to_store.add_argument("json_path")
+    to_store.add_argument("store_path")
+    to_store.add_argument("--dtype", choices=SUPPORTED_DTYPES, default="float32")
+
+    to_json = subparsers.add_parser("to-json", help="Store directory to JSON file")
+    to_json.add_argument("store_path")
+    to_json.add_argument("json_path")
+
+    args = parser.parse_args()
+
+    if args.command == "to-store":
+        count = json_to_embedding_store(args.json_path, args.store_path, dtype=args.dtype)
+        print(f"Wrote {count} embeddings to {args.store_path}")
+    else:
+        count = embedding_store_to_json(args.store_path, args.json_path)
+        print(f"Wrote {count} embeddings to {args.json_path}")
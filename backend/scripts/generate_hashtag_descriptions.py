@@ -1,22 +1,21 @@
 from utils.hashatag_description import generate_hashtag_description
 from utils.handle_json import load_json, save_json
 
-from tqdm.auto import tqdm
+from tqdm.asyncio import tqdm
 from pathlib import Path
-import time
+import asyncio
 
 ####
 # To run this script at the project root: `PYTHONPATH=./backend python backend/scripts/generate_hashtag_descriptions.py`
 ####
 
-def generate_all_descriptions(tag_list):
-    desc_by_tag = {}
-    for tag in tqdm(tag_list, desc="Generating hashtag descriptions"):
-        desc = generate_hashtag_description(tag)
-        if desc:
-            desc_by_tag[tag] = desc
-        time.sleep(0.5)  # Rate limit handling
-    return desc_by_tag
+async def generate_all_descriptions(tag_list):
+    # Concurrency and rate limits are bounded by the LLM client
+    descs = await tqdm.gather(
+        *(generate_hashtag_description(tag) for tag in tag_list),
+        desc="Generating hashtag descriptions"
+    )
+    return {tag: desc for tag, desc in zip(tag_list, descs) if desc}
 
 if __name__ == "__main__":
     backend_dir_path = Path(__file__).resolve().parent.parent
@@ -33,6 +32,6 @@ if __name__ == "__main__":
     
     all_tags = list(set(all_tags))
 
-    desc_by_tag = generate_all_descriptions(all_tags)
+    desc_by_tag = asyncio.run(generate_all_descriptions(all_tags))
 
     save_json(data=desc_by_tag, file_path=saving_path)
\ No newline at end of file
@@ -0,0 +1,26 @@
+from db.elastic import get_elasticsearch
+from utils.hashtag_relations_rebuild import rebuild_relation_indices
+
+import argparse
+import asyncio
+
+####
+# To run this script at the project root: `PYTHONPATH=./backend python backend/scripts/rebuild_hashtag_relations.py`
+####
+
+async def main(keep_old: bool, spill_dir: str):
+    es = get_elasticsearch()
+    try:
+        report = await rebuild_relation_indices(es, delete_old=not keep_old, spill_dir=spill_dir)
+        print(report.model_dump_json(indent=4))
+    finally:
+        await es.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the hashtag_relations index, its association measures and the neighbor lists from the papers index")
+    parser.add_argument("--keep-old", action="store_true", help="Keep the previous relations index")
+    parser.add_argument("--spill-dir", default=None, help="Directory for partial counts spilled to disk")
+    args = parser.parse_args()
+
+    asyncio.run(main(keep_old=args.keep_old, spill_dir=args.spill_dir))
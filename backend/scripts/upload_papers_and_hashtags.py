@@ -1,11 +1,23 @@
-from utils.handle_json import load_json
+from utils.embedding_store import iter_embeddings, read_embedding_ids
+from utils.handle_json import load_json, iter_json_items, save_json
 
-import requests
+import aiohttp
+import argparse
+import asyncio
+import json
+import os
+import time
 from pathlib import Path
 from tqdm.auto import tqdm
+from typing import Any, Dict, Iterable, Iterator, List
 
 ####
 # To run this script at the project root: `$PYTHONPATH=./backend python backend/scripts/upload_papers_and_hashtags.py`
+#
+# Hashtags and papers are streamed from disk and uploaded in batches through the _bulk endpoints,
+# with a bounded number of requests in flight. Finished batches are recorded in a checkpoint file,
+# so rerunning the same command after a crash resumes where it stopped. A JSON report with
+# throughput and failures is written at the end.
 ####
 
 API_BASE = "http://localhost:8000/api/v1"
@@ -14,76 +26,242 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
-def create_hashtag(hashtag):
-    res = requests.post(
-        f"{API_BASE}/hashtags/",
-        headers=HEADERS,
-        json=hashtag
-    )
-    if res.status_code not in [200, 201, 409]:
-        print(f"Failed to create hashtag: {hashtag.get('name')} | Status: {res.status_code}")
+MAX_ATTEMPTS = 5
 
 
-def create_paper(paper):
-    res = requests.post(
-        f"{API_BASE}/papers/",
-        headers=HEADERS,
-        json=paper
-    )
-    if res.status_code not in [200, 201, 409]:
-        print(f"Failed to create paper: {paper.get('title')} | Status: {res.status_code}")
+class Checkpoint:
+    def __init__(self, path: Path, batch_size: Dict[str, int], restart: bool = False):
+        self.path = path
+        self.state = {"batch_size": batch_size, "done": {"hashtags": [], "papers": []}}
+        path.parent.mkdir(parents=True, exist_ok=True)
 
+        if path.exists() and not restart:
+            state = load_json(path)
+            if state["batch_size"] != batch_size:
+                raise SystemExit(
+                    f"Checkpoint {path} was written with batch sizes {state['batch_size']}, "
+                    f"rerun with the same sizes or pass --restart"
+                )
+            self.state = state
 
-def main():
-    backend_dir_path = Path(__file__).resolve().parent.parent
-    data_dir_path = backend_dir_path.parent.parent / "data_cache"
+        self.done = {stage: set(batches) for stage, batches in self.state["done"].items()}
 
-    papers_path = data_dir_path / "quantum_500.json"
-    tag_desc_path = data_dir_path / "quantum_500_tag_desc.json"
-    tag_embs_path = data_dir_path / "quantum_500_tag_embs.json"
+    def is_done(self, stage: str, batch_no: int) -> bool:
+        return batch_no in self.done[stage]
 
-    papers = load_json(papers_path)
-    tag_embs = load_json(tag_embs_path)
-    tag_desc = load_json(tag_desc_path)
+    def mark_done(self, stage: str, batch_no: int):
+        self.done[stage].add(batch_no)
+        self.state["done"][stage] = sorted(self.done[stage])
 
-    # hashtag_cnt = {} 
-    # for paper in papers:
-    #     hashtags = [tag.strip() for tag in paper["hashtags"].split(",")]
-    #     paper["hashtags"] = hashtags
-        
-    #     for tag in hashtags:
-    #         hashtag_cnt[tag] = hashtag_cnt.get(tag, 0) + 1
+        # Write then rename, so a crash never leaves a truncated checkpoint
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
 
-    # selected_hashtags = set([tag for tag, cnt in hashtag_cnt.items() if cnt > 1]) 
-    # selected_hashtags = set([tag for tag, cnt in hashtag_cnt.items()])
-    selected_hashtags = set(tag_embs.keys())
 
-    print(f"selected tags cnt: {len(selected_hashtags)}")
-    print(f"tag with desc cnt: {len(tag_desc)}")
-    print(f"tag witg embs cnt: {len(tag_embs)}")
+class StageStats:
+    def __init__(self):
+        self.sent = 0
+        self.created = 0
+        self.existing = 0
+        self.skipped_batches = 0
+        self.failures: List[Dict[str, Any]] = []
+        self.elapsed = 0.0
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "created": self.created,
+            "existing": self.existing,
+            "failed": len(self.failures),
+            "skipped_batches": self.skipped_batches,
+            "elapsed_s": round(self.elapsed, 3),
+            "items_per_s": round(self.sent / self.elapsed, 1) if self.elapsed else 0.0,
+            "failures": self.failures
+        }
+
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def post_batch(session: aiohttp.ClientSession, url: str, batch: List[Dict]) -> Dict:
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            async with session.post(url, json=batch, headers=HEADERS) as res:
+                if res.status == 200:
+                    return await res.json()
+                if res.status < 500:
+                    return {"error": f"Status {res.status}: {await res.text()}"}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                return {"error": str(e)}
+        await asyncio.sleep(2 ** attempt)
+
+    return {"error": f"Failed after {MAX_ATTEMPTS} attempts"}
+
+
+async def upload_stage(
+    session: aiohttp.ClientSession,
+    stage: str,
+    url: str,
+    items: Iterable[Dict],
+    batch_size: int,
+    concurrency: int,
+    checkpoint: Checkpoint,
+    describe_item
+) -> StageStats:
+    stats = StageStats()
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    progress = tqdm(desc=f"Uploading {stage}", unit=stage)
+
+    async def run(batch_no: int, batch: List[Dict]):
+        try:
+            result = await post_batch(session, url, batch)
+            stats.sent += len(batch)
+
+            if "error" in result:
+                stats.failures.append({"batch": batch_no, "error": result["error"]})
+                return
+
+            for item in result["items"]:
+                if item["error"] is None:
+                    stats.created += 1
+                elif item["status"] == 409:
+                    stats.existing += 1
+                else:
+                    stats.failures.append({
+                        "batch": batch_no,
+                        "position": batch_no * batch_size + item["position"],
+                        "item": describe_item(batch[item["position"]]),
+                        "status": item["status"],
+                        "error": item["error"]
+                    })
+
+            # A batch whose request went through is done, item failures are in the report
+            checkpoint.mark_done(stage, batch_no)
+        finally:
+            progress.update(len(batch))
+            semaphore.release()
+
+    tasks = []
+    for batch_no, batch in enumerate(iter_batches(items, batch_size)):
+        if checkpoint.is_done(stage, batch_no):
+            stats.skipped_batches += 1
+            progress.update(len(batch))
+            continue
 
-    hashtags = []
-    for name in selected_hashtags:
-        hashtag = {
+        # Bounds both the requests in flight and the batches held in memory
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(run(batch_no, batch)))
+
+    await asyncio.gather(*tasks)
+    progress.close()
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def iter_hashtags(tag_embs_path: Path, tag_desc: Dict[str, str]) -> Iterator[Dict]:
+    for name, embedding in iter_embeddings(tag_embs_path):
+        yield {
             "name": name,
-            "description": tag_desc[name],
-            "embedding": tag_embs[name]
+            "description": tag_desc.get(name),
+            "embedding": embedding
         }
-        hashtags.append(hashtag)
 
-    for paper in papers:
+
+def iter_papers(papers_path: Path, selected_hashtags: set) -> Iterator[Dict]:
+    for paper in iter_json_items(papers_path):
         paper["hashtags"] = [tag for tag in paper["hashtags"] if tag in selected_hashtags]
+        yield paper
 
-    # Create hashtags first
-    print("Uploading hashtags...")
-    for hashtag in tqdm(hashtags):
-        create_hashtag(hashtag)
 
-    # Create papers
-    print("\nUploading papers...")
-    for paper in tqdm(papers):
-        create_paper(paper)
+async def main(args):
+    papers_path = Path(args.papers)
+    tag_desc_path = Path(args.tag_desc)
+    tag_embs_path = Path(args.tag_embs)
+    checkpoint = Checkpoint(
+        Path(args.checkpoint),
+        batch_size={"hashtags": args.hashtag_batch_size, "papers": args.paper_batch_size},
+        restart=args.restart
+    )
+
+    tag_desc = load_json(tag_desc_path)
+
+    # Only hashtag names are kept in memory, embeddings and papers are streamed
+    selected_hashtags = set(read_embedding_ids(tag_embs_path))
+    print(f"selected tags cnt: {len(selected_hashtags)}")
+    print(f"tag with desc cnt: {len(tag_desc)}")
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    started_at = time.time()
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        hashtag_stats = await upload_stage(
+            session,
+            stage="hashtags",
+            url=f"{args.api_base}/hashtags/_bulk",
+            items=iter_hashtags(tag_embs_path, tag_desc),
+            batch_size=args.hashtag_batch_size,
+            concurrency=args.concurrency,
+            checkpoint=checkpoint,
+            describe_item=lambda hashtag: hashtag["name"]
+        )
+        paper_stats = await upload_stage(
+            session,
+            stage="papers",
+            url=f"{args.api_base}/papers/_bulk",
+            items=iter_papers(papers_path, selected_hashtags),
+            batch_size=args.paper_batch_size,
+            concurrency=args.concurrency,
+            checkpoint=checkpoint,
+            describe_item=lambda paper: paper.get("arxiv_id") or paper.get("doi") or paper.get("title")
+        )
+
+    report = {
+        "started_at": started_at,
+        "elapsed_s": round(time.time() - started_at, 3),
+        "hashtags": hashtag_stats.report(),
+        "papers": paper_stats.report()
+    }
+    save_json(report, args.report)
+
+    print(
+        f"hashtags: {hashtag_stats.created} created, {len(hashtag_stats.failures)} failed | "
+        f"papers: {paper_stats.created} created, {len(paper_stats.failures)} failed"
+    )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    backend_dir_path = Path(__file__).resolve().parent.parent
+    data_dir_path = backend_dir_path.parent.parent / "data_cache"
+
+    parser = argparse.ArgumentParser(description="Upload hashtags and papers through the bulk API")
+    parser.add_argument("--api-base", default=API_BASE)
+    parser.add_argument("--papers", default=str(data_dir_path / "quantum_500.json"))
+    parser.add_argument("--tag-desc", default=str(data_dir_path / "quantum_500_tag_desc.json"))
+    parser.add_argument(
+        "--tag-embs",
+        default=str(data_dir_path / "quantum_500_tag_embs.json"),
+        help="Embedding store directory or JSON file"
+    )
+    parser.add_argument("--paper-batch-size", type=int, default=500)
+    parser.add_argument("--hashtag-batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Bulk requests in flight")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds per bulk request")
+    parser.add_argument("--checkpoint", default=str(data_dir_path / "upload_checkpoint.json"))
+    parser.add_argument("--report", default=str(data_dir_path / "upload_report.json"))
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and upload everything")
+
+    asyncio.run(main(parser.parse_args()))
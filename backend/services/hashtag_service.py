@@ -4,25 +4,83 @@ from models import (
     Hashtag, 
     HashtagCreate, 
     HashtagUpdate, 
+    HashtagBulkItem,
+    HashtagBulkResponse,
     HashtagListItem,
+    HashtagPage,
+    HashtagRecommendBenchmark,
     HashtagEdge,
-    HashtagGraph
+    HashtagGraph,
+    HashtagGraphLevelStats,
+    HashtagNeighbor,
+    HashtagNode,
+    HashtagPaperCounts,
+    HashtagRelationRebuildReport,
+    HashtagPaperCountRebuildReport,
+    HashtagNeighborListRebuildReport,
+    HashtagAssociationRebuildReport
 )
 from utils.hashtag_normalization import normalize_hashtag
 from utils.hashatag_description import generate_hashtag_description
 from utils.embeddings import generate_hashtag_embeddings, average_embeddings
+from utils.hashtag_relations_rebuild import rebuild_relation_indices, rebuild_association_weights, rebuild_tag_paper_counts
+from utils.hashtag_relations_query import build_neighbors_search, relation_counts, relation_weight
+from utils.hashtag_relations_update import build_relation_id
+from utils.hashtag_neighbor_lists import get_neighbor_lists, rebuild_neighbor_lists
+from utils.hashtag_association import get_tag_paper_counts
+from utils.hashtag_vocabulary import HashtagVocabulary, get_hashtag_vocabulary
+from utils.hashtag_vector_index import HashtagVectorIndex, get_hashtag_vector_index
+from utils.hashtag_graph import HashtagGraphEngine, get_hashtag_graph_engine
+from utils.hashtag_graph_budget import GraphBudget
+from utils.es_batch import mget_sources, msearch_hits
+from utils.es_pagination import iter_pit_hits, search_page
+from utils.projection import resolve_projection, source_fields
+from utils.search_cache import SearchResultCache, get_search_cache
 
 from elasticsearch import AsyncElasticsearch, NotFoundError, ConflictError
-from typing import List, Optional
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, TypeVar
+import asyncio
+import numpy as np
+import time
+
+
+# Hashtag fields of list items. Paper counts live in the hashtag_counts index and are joined in after the search.
+HASHTAG_LIST_SOURCE = [field for field in source_fields(HashtagListItem) if field not in HashtagPaperCounts.model_fields]
+
+Counted = TypeVar("Counted", HashtagListItem, HashtagNode)
+
+
+def resolve_hashtag_projection(fields: Optional[Iterable[str]]) -> Tuple[List[str], List[str]]:
+    # Splits the requested list item fields into _source includes and paper count fields,
+    # all of them when nothing is requested. Raises ValueError for unknown fields.
+    requested = resolve_projection(HashtagListItem, fields, always=("name",))
+    if requested is None:
+        return HASHTAG_LIST_SOURCE, list(HashtagPaperCounts.model_fields)
+    return (
+        [field for field in requested if field not in HashtagPaperCounts.model_fields],
+        [field for field in requested if field in HashtagPaperCounts.model_fields]
+    )
 
 
 class HashtagService:
-    def __init__(self, es: AsyncElasticsearch):
+    def __init__(
+        self,
+        es: AsyncElasticsearch,
+        vocabulary: Optional[HashtagVocabulary] = None,
+        search_cache: Optional[SearchResultCache] = None,
+        vector_index: Optional[HashtagVectorIndex] = None,
+        graph_engine: Optional[HashtagGraphEngine] = None
+    ):
         self.es = es
         self.index = settings.es_hashtag_index
+        self.vocabulary = vocabulary if vocabulary is not None else get_hashtag_vocabulary()
+        self.search_cache = search_cache if search_cache is not None else get_search_cache()
+        self.vector_index = vector_index if vector_index is not None else get_hashtag_vector_index()
+        self.graph_engine = graph_engine if graph_engine is not None else get_hashtag_graph_engine()
 
     async def create(self, create_data: HashtagCreate):
-        hashtag = self.create_hashtag_model(create_data)
+        hashtag = await self.create_hashtag_model(create_data)
 
         try:
             await self.es.create(
@@ -33,7 +91,59 @@ class HashtagService:
         except ConflictError:
             return {"error": "Hashtag already exists"}, 409
         
+        self.vocabulary.add(hashtag.id)
+        self.index_vector(hashtag.id, hashtag.model_dump())
         return hashtag
+
+
+    async def bulk_create(self, create_data: List[HashtagCreate]) -> HashtagBulkResponse:
+        # Missing descriptions and embeddings are generated concurrently, bounded by the LLM clients
+        hashtags = await asyncio.gather(
+            *(self.create_hashtag_model(data) for data in create_data),
+            return_exceptions=True
+        )
+
+        items = [None] * len(create_data)
+        positions = []
+        operations = []
+
+        for position, hashtag in enumerate(hashtags):
+            if isinstance(hashtag, ValidationError):
+                items[position] = HashtagBulkItem(position=position, status=422, error=str(hashtag))
+                continue
+            if isinstance(hashtag, Exception):
+                items[position] = HashtagBulkItem(position=position, status=500, error=str(hashtag))
+                continue
+
+            positions.append(position)
+            operations.append({"create": {"_index": self.index, "_id": hashtag.id}})
+            operations.append(hashtag.model_dump())
+
+        chunk_size = settings.es_bulk_chunk_size
+
+        for start in range(0, len(positions), chunk_size):
+            es_resp = await self.es.bulk(operations=operations[2 * start: 2 * (start + chunk_size)])
+
+            for position, item in zip(positions[start: start + chunk_size], es_resp["items"]):
+                hashtag = hashtags[position]
+                result = item["create"]
+
+                if "error" in result:
+                    error = "Hashtag already exists" if result["status"] == 409 else result["error"].get("reason")
+                    items[position] = HashtagBulkItem(
+                        position=position,
+                        id=hashtag.id,
+                        status=result["status"],
+                        error=error
+                    )
+                    continue
+
+                self.vocabulary.add(hashtag.id)
+                self.index_vector(hashtag.id, hashtag.model_dump())
+                items[position] = HashtagBulkItem(position=position, id=hashtag.id, status=result["status"])
+
+        created = sum(1 for item in items if item.error is None)
+        return HashtagBulkResponse(created=created, failed=len(items) - created, items=items)
     
     
     async def get(self, hashtag_id: str):
@@ -44,18 +154,67 @@ class HashtagService:
             return {"error": "Hashtag not found"}, 404
         
     
-    async def find_all(self, size: int = 1000) -> List[HashtagListItem]:
+    async def find_all(self, size: int = 1000, fields: Optional[List[str]] = None):
         # size=1000 is the default max for Elasticsearch queries
+        try:
+            source, count_fields = resolve_hashtag_projection(fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
         result = await self.es.search(
             index=self.index,
             query={"match_all": {}},
-            size=size
+            size=size,
+            source=source
         )
 
-        return [
+        return await self.with_paper_counts([
             HashtagListItem(**hit["_source"])
             for hit in result["hits"]["hits"]
-        ] 
+        ], count_fields)
+
+
+    async def find_page(
+        self,
+        size: int = settings.default_page_size,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ):
+        try:
+            source, count_fields = resolve_hashtag_projection(fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        try:
+            hits, next_cursor = await search_page(
+                self.es, self.index, size=size, cursor=cursor, source=source
+            )
+        except ValueError:
+            return {"error": "Invalid cursor"}, 400
+        except NotFoundError:
+            if cursor is None:
+                return HashtagPage(items=[], next_cursor=None)
+            return {"error": "Cursor expired, restart the listing without a cursor"}, 410
+
+        return HashtagPage(
+            items=await self.with_paper_counts([HashtagListItem(**hit["_source"]) for hit in hits], count_fields),
+            next_cursor=next_cursor
+        )
+
+
+    async def iter_all(self, fields: Optional[List[str]] = None) -> AsyncIterator[HashtagListItem]:
+        # Streams every hashtag without its embedding, one Elasticsearch page in memory at a time.
+        # Paper counts are joined in per page.
+        source, count_fields = resolve_hashtag_projection(fields)
+        page = []
+        async for hit in iter_pit_hits(self.es, index=self.index, source=source):
+            page.append(HashtagListItem(**hit["_source"]))
+            if len(page) >= settings.es_scan_page_size:
+                for item in await self.with_paper_counts(page, count_fields):
+                    yield item
+                page = []
+        for item in await self.with_paper_counts(page, count_fields):
+            yield item
         
 
     async def update(self, hashtag_id: str, updated_data: HashtagUpdate):
@@ -67,6 +226,7 @@ class HashtagService:
             )
 
             result = await self.es.get(index=self.index, id=hashtag_id)
+            self.index_vector(hashtag_id, result["_source"])
             return result
         
         except NotFoundError:
@@ -77,6 +237,9 @@ class HashtagService:
         try:
             # Delete the hashtag itself
             await self.es.delete(index=self.index, id=hashtag_id)
+            self.vocabulary.discard(hashtag_id)
+            if self.vector_index is not None:
+                self.vector_index.remove(hashtag_id)
             
             # Delete all edges where it's src or dst
             await self.delete_relations(hashtag_id=hashtag_id)
@@ -97,6 +260,9 @@ class HashtagService:
             body={"query": {"match_all": {}}},
             refresh=True  # ensures deletions are visible immediately
         )
+        self.vocabulary.clear()
+        if self.vector_index is not None:
+            self.vector_index.clear()
 
         # Delete all hashtag relations
         await self.delete_relations()
@@ -107,7 +273,12 @@ class HashtagService:
         return {"message": "all hashtags deleted"}
     
     
-    async def fuzzy_search_by_name(self, query: str, size: int = 10) -> List[HashtagListItem]:
+    async def fuzzy_search_by_name(self, query: str, size: int = 10, fields: Optional[List[str]] = None):
+        try:
+            source, count_fields = resolve_hashtag_projection(fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
         es_query = {
             "match": {
                 "name": {
@@ -120,116 +291,340 @@ class HashtagService:
         result = await self.es.search(
             index=self.index,
             query=es_query,
-            size=size
+            size=size,
+            source=source
         )
 
-        return [
+        return await self.with_paper_counts([
             HashtagListItem(**hit["_source"])
             for hit in result["hits"]["hits"]
-        ]
+        ], count_fields)
     
 
-    async def recommend_related_hashtags(self, selected_tags: List[str], size: int = 10) -> List[Hashtag]:
+    async def recommend_related_hashtags(
+        self,
+        selected_tags: List[str],
+        size: int = 10,
+        mode: Optional[str] = None,
+        num_candidates: Optional[int] = None
+    ) -> List[HashtagListItem]:
         if not selected_tags:
             return []
+
+        mode = mode or settings.hashtag_recommend_mode
+        if mode == "memory":
+            if self.vector_index is not None and self.vector_index.loaded:
+                return await self.with_paper_counts(self.vector_index.recommend(selected_tags, size))
+            # Not loaded yet on this worker, answer from the HNSW graph
+            mode = "knn"
         
         embeddings = await self.fetch_embeddings(selected_tags)
+        if not embeddings:
+            return []
         pooled_embedding = average_embeddings(embeddings)
 
-        es_query = {
-            "script_score": {
-                "query": {
-                    "bool": {
-                        "must_not": [
-                            {"terms": {"_id": selected_tags}}
-                        ]
+        hits = await self.search_similar(
+            pooled_embedding,
+            exclude=selected_tags,
+            size=size,
+            mode=mode,
+            num_candidates=num_candidates,
+            source=HASHTAG_LIST_SOURCE
+        )
+
+        return await self.with_paper_counts([HashtagListItem(**hit["_source"]) for hit in hits])
+
+
+    async def recommend_batch(self, selections: List[List[str]], size: int = 10) -> List[List[HashtagListItem]]:
+        # Every selection is scored in one matrix multiply when the vector index is loaded
+        if self.vector_index is not None and self.vector_index.loaded:
+            results = self.vector_index.recommend_batch(selections, size)
+            counted = iter(await self.with_paper_counts([item for items in results for item in items]))
+            return [[next(counted) for _ in items] for items in results]
+
+        return [await self.recommend_related_hashtags(selected_tags, size=size) for selected_tags in selections]
+
+
+    def index_vector(self, hashtag_id: str, source: Dict[str, Any]):
+        if self.vector_index is not None and source.get("embedding"):
+            item = HashtagListItem(name=source["name"], description=source["description"])
+            self.vector_index.upsert(hashtag_id, source["embedding"], item)
+
+
+    async def search_similar(
+        self,
+        query_vector: List[float],
+        exclude: List[str],
+        size: int,
+        mode: str,
+        num_candidates: Optional[int] = None,
+        source: Any = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Hashtags closest to `query_vector` by cosine similarity, without `exclude`.
+
+        Modes:
+        - "exact": script_score over every hashtag, the reference ranking.
+        - "knn": approximate search on the HNSW graph of the embedding field,
+          visiting `num_candidates` vectors per shard. Excluded tags are
+          filtered during the search, so `size` hits still come back.
+        """
+        exclude_query = {"bool": {"must_not": [{"terms": {"_id": exclude}}]}}
+
+        if mode == "knn":
+            result = await self.es.search(
+                index=self.index,
+                knn={
+                    "field": "embedding",
+                    "query_vector": query_vector,
+                    "k": size,
+                    "num_candidates": max(num_candidates or settings.hashtag_knn_num_candidates, size),
+                    "filter": exclude_query
+                },
+                size=size,
+                source=source
+            )
+        elif mode == "exact":
+            result = await self.es.search(
+                index=self.index,
+                query={
+                    "script_score": {
+                        "query": exclude_query,
+                        "script": {
+                            "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
+                            "params": {"query_vector": query_vector}
+                        }
                     }
                 },
-                "script": {
-                    "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
-                    "params": {"query_vector": pooled_embedding}
-                }
-            }
-        }
+                size=size,
+                source=source
+            )
+        else:
+            raise ValueError(f"Unknown recommendation mode: {mode}")
 
-        result = await self.es.search(
+        return result["hits"]["hits"]
+
+
+    async def benchmark_recommendations(
+        self,
+        queries: int = 50,
+        tags_per_query: int = 2,
+        size: int = 10,
+        num_candidates: Optional[int] = None,
+        seed: int = 42
+    ) -> HashtagRecommendBenchmark:
+        # Recall of knn and of the vector index against exact, on random hashtag selections
+        sample = await self.es.search(
             index=self.index,
-            query=es_query,
-            size=size
+            query={
+                "function_score": {
+                    "query": {"match_all": {}},
+                    "random_score": {"seed": seed, "field": "_seq_no"}
+                }
+            },
+            size=queries * tags_per_query,
+            source=["embedding"]
         )
+        hits = sample["hits"]["hits"]
+        num_candidates = num_candidates or settings.hashtag_knn_num_candidates
 
-        return [
-            HashtagListItem(**hit["_source"])
-            for hit in result["hits"]["hits"]
-        ]
+        use_memory = self.vector_index is not None and self.vector_index.loaded
+        latencies = {"exact": [], "knn": [], "memory": []}
+        recalls = []
+        memory_recalls = []
+
+        for start in range(0, len(hits) - tags_per_query + 1, tags_per_query):
+            selection = hits[start: start + tags_per_query]
+            selected_tags = [hit["_id"] for hit in selection]
+            query_vector = average_embeddings([hit["_source"]["embedding"] for hit in selection])
+
+            found = {}
+            for mode in ("exact", "knn"):
+                started = time.perf_counter()
+                mode_hits = await self.search_similar(
+                    query_vector, exclude=selected_tags, size=size, mode=mode, num_candidates=num_candidates
+                )
+                latencies[mode].append((time.perf_counter() - started) * 1000)
+                found[mode] = {hit["_id"] for hit in mode_hits}
+
+            if use_memory:
+                started = time.perf_counter()
+                pooled = self.vector_index.pool(selected_tags)
+                memory_hits = self.vector_index.search(pooled, size, exclude=selected_tags)
+                latencies["memory"].append((time.perf_counter() - started) * 1000)
+                found["memory"] = {hashtag_id for hashtag_id, _ in memory_hits}
+
+            if found["exact"]:
+                recalls.append(len(found["exact"] & found["knn"]) / len(found["exact"]))
+                if use_memory:
+                    memory_recalls.append(len(found["exact"] & found["memory"]) / len(found["exact"]))
+
+        def percentile(values, q):
+            return float(np.percentile(values, q)) if values else 0.0
+
+        return HashtagRecommendBenchmark(
+            queries=len(recalls),
+            size=size,
+            num_candidates=num_candidates,
+            recall=float(np.mean(recalls)) if recalls else 0.0,
+            exact_p50_ms=percentile(latencies["exact"], 50),
+            exact_p95_ms=percentile(latencies["exact"], 95),
+            knn_p50_ms=percentile(latencies["knn"], 50),
+            knn_p95_ms=percentile(latencies["knn"], 95),
+            memory_recall=float(np.mean(memory_recalls)) if memory_recalls else None,
+            memory_p50_ms=percentile(latencies["memory"], 50) if use_memory else None,
+            memory_p95_ms=percentile(latencies["memory"], 95) if use_memory else None
+        )
         
 
-    async def expand_graph(self, start_tags: List[str], steps: int=settings.default_graph_steps) -> HashtagGraph:
-        seen_tags = set(start_tags)
-        seen_edges = set()
-        queue = list(start_tags)
-        edges = []
+    async def expand_graph(
+        self,
+        start_tags: List[str],
+        steps: int=settings.default_graph_steps,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        budget: Optional[GraphBudget] = None,
+        weighting: str = "count"
+    ) -> HashtagGraph:
+        # With a year window, edges are ranked and weighted by their papers inside the window.
+        # Any other `weighting` ranks and weights them by a stored association measure instead.
+        budget = budget or GraphBudget(start_tags)
+        if self.graph_engine is not None and self.graph_engine.loaded:
+            # Nodes carry the paper counts held by the engine
+            return self.graph_engine.expand(
+                start_tags, steps, settings.default_graph_top_n,
+                year_from=year_from, year_to=year_to, budget=budget, weighting=weighting
+            )
 
-        # BFS
-        for _ in range(steps):
-            if not queue:
+        # BFS, each level read from the neighbor lists of the frontier, with one _msearch for the rest
+        for level in range(1, steps + 1):
+            if not budget.frontier or budget.exhausted() or budget.expired():
                 break
-            next_queue = []
-            
-            for tag in queue:
-                es_resp = await self.es.search(
-                    index=settings.es_hashtag_relations_index,
-                    size=settings.default_graph_top_n,
-                    query={
-                        "bool": {
-                            "should": [
-                                {"terms": {"src": [tag]}},
-                                {"terms": {"dst": [tag]}},
-                            ]
-                        }
-                    },
-                    sort=[
-                        {"paper_cnt_total": {"order": "desc"}}
-                    ]
-                )
-                
-                for hit in es_resp["hits"]["hits"]:
-                    relation = hit["_source"]
-                    src = relation["src"]
-                    dst = relation["dst"]
-                    total_cnt = relation.get("paper_cnt_total", 1)
-                    cnt_by_year = relation.get("paper_cnt_by_year", {})
-                    cnt_by_year = {year: cnt for year, cnt in cnt_by_year.items() if cnt is not None}
-                    weight = total_cnt
-                    
-                    if (src, dst) not in seen_edges:
-                        seen_edges.add((src, dst))
-                        edges.append(HashtagEdge(
-                            src=src, 
-                            dst=dst,
-                            weight=weight,
-                            total_cnt=total_cnt, 
-                            cnt_by_year=cnt_by_year
-                        ))
-
-                    for tag in [src, dst]:
-                        if tag not in seen_tags:
-                            seen_tags.add(tag)
-                            next_queue.append(tag)
-            queue = next_queue
-                        
-        return HashtagGraph(nodes=list(seen_tags), edges=edges)
-            
+            queue = budget.frontier
+
+            started = time.perf_counter()
+            # A level cut by the deadline still offers the relations found so far, as in the engine
+            candidates, es_calls = await self._level_candidates(
+                queue, year_from=year_from, year_to=year_to, weighting=weighting, timeout=budget.remaining_s()
+            )
+            budget.levels.append(HashtagGraphLevelStats(
+                level=level,
+                frontier=len(queue),
+                es_calls=es_calls,
+                took_ms=(time.perf_counter() - started) * 1000
+            ))
+
+            budget.take_level(candidates, lambda payload: HashtagEdge(
+                src=payload[0]["src"],
+                dst=payload[0]["dst"],
+                weight=payload[1],
+                total_cnt=payload[2],
+                cnt_by_year=payload[3]
+            ))
+            # Flags a level cut by the deadline also when it was the last one
+            budget.expired()
+
+        graph = budget.graph()
+        graph.nodes = await self.with_paper_counts(graph.nodes)
+        return graph
+
+
+    async def with_paper_counts(
+        self,
+        items: List[Counted],
+        count_fields: Iterable[str] = tuple(HashtagPaperCounts.model_fields)
+    ) -> List[Counted]:
+        # Copies of list items or graph nodes with the paper count fields in `count_fields`, read from
+        # the graph engine when it is loaded and otherwise with one mget to the hashtag_counts index
+        count_fields = list(count_fields)
+        if not items or not count_fields:
+            return items
+        if self.graph_engine is not None and self.graph_engine.loaded:
+            counts = {item.name: self.graph_engine.tag_paper_counts(item.name) for item in items}
+        else:
+            counts = await get_tag_paper_counts(self.es, [item.name for item in items])
+
+        missing = HashtagPaperCounts()
+        return [
+            item.model_copy(update={field: getattr(counts.get(item.name, missing), field) for field in count_fields})
+            for item in items
+        ]
+
+
+    async def _level_candidates(
+        self,
+        queue: List[str],
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        weighting: str = "count",
+        timeout: Optional[float] = None
+    ):
+        # Relations of the frontier as budget candidates in frontier order, and the Elasticsearch calls made.
+        # Tags with a usable neighbor list cost one mget. A year window, an association weighting,
+        # which the count-ordered lists cannot answer, or a stale list cost one search each.
+        # Requests still running after `timeout` seconds are cancelled, and only the tags whose
+        # relations arrived are offered.
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        top_n = settings.default_graph_top_n
+        lists = {}
+        es_calls = 0
+        if year_from is None and year_to is None and weighting == "count":
+            es_calls += -(-len(queue) // settings.es_bulk_chunk_size)
+            try:
+                lists = await asyncio.wait_for(get_neighbor_lists(self.es, queue, top_n), timeout=timeout)
+            except asyncio.TimeoutError:
+                return [], es_calls
+
+        searched = [tag for tag in queue if tag not in lists]
+        relation_ids = [build_relation_id(*sorted((tag, name))) for tag in lists for name, _ in lists[tag]]
+        searches = asyncio.ensure_future(msearch_hits(
+            self.es,
+            index=settings.es_hashtag_relations_index,
+            searches=[
+                build_neighbors_search(tag, top_n, year_from=year_from, year_to=year_to, weighting=weighting)
+                for tag in searched
+            ],
+            chunk_size=settings.es_msearch_chunk_size
+        ))
+        lookups = asyncio.ensure_future(mget_sources(self.es, settings.es_hashtag_relations_index, relation_ids))
+        es_calls += -(-len(searched) // settings.es_msearch_chunk_size) + -(-len(relation_ids) // settings.es_bulk_chunk_size)
+
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        _, pending = await asyncio.wait([searches, lookups], timeout=remaining)
+        for task in pending:
+            task.cancel()
+
+        hits_by_tag = dict(zip(searched, searches.result())) if searches not in pending else {}
+        relations = lookups.result() if lookups not in pending else None
+        candidates = []
+        for tag in queue:
+            if tag in lists and relations is not None:
+                found = [relations.get(build_relation_id(*sorted((tag, name)))) for name, _ in lists[tag]]
+            elif tag in hits_by_tag:
+                found = [hit["_source"] for hit in hits_by_tag[tag]]
+            else:
+                continue
 
-    def create_hashtag_model(self, create_data: HashtagCreate) -> Hashtag:
+            for relation in found:
+                if relation is None:
+                    continue
+                total_cnt, cnt_by_year = relation_counts(relation, year_from=year_from, year_to=year_to)
+                weight = relation_weight(relation, total_cnt, weighting)
+                if weight is None:
+                    continue
+                candidates.append((weight, relation["src"], relation["dst"], (relation, weight, total_cnt, cnt_by_year)))
+        return candidates, es_calls
+
+
+    async def create_hashtag_model(self, create_data: HashtagCreate) -> Hashtag:
         name_normalized = normalize_hashtag(create_data.name)
 
         # Fallback to generated description if none provided
-        description = create_data.description or generate_hashtag_description(create_data.name)
+        description = create_data.description or await generate_hashtag_description(create_data.name)
 
         # Fallback to generated embedding if none provided
         text_for_embedding = f"{create_data.name}: {description}"
-        embedding = create_data.embedding or generate_hashtag_embeddings(text_for_embedding)
+        embedding = create_data.embedding or await generate_hashtag_embeddings(text_for_embedding)
 
         return Hashtag(
             id=name_normalized,
@@ -240,16 +635,72 @@ class HashtagService:
     
 
     async def fetch_embeddings(self, tag_ids: List[str]) -> List[List[float]]:
-        embeddings = []
-        for tag_id in tag_ids:
-            try:
-                result = await self.es.get(index=self.index, id=tag_id)
-                embeddings.append(result["_source"]["embedding"])
-            except NotFoundError:
-                continue
-        return embeddings
+        sources = await mget_sources(self.es, index=self.index, ids=tag_ids, source=["embedding"])
+        return [sources[tag_id]["embedding"] for tag_id in tag_ids if tag_id in sources]
     
     
+    async def top_neighbors(
+        self,
+        hashtag_id: str,
+        size: int = settings.default_graph_top_n,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        weighting: str = "count"
+    ) -> List[HashtagNeighbor]:
+        if self.graph_engine is not None and self.graph_engine.loaded:
+            return [
+                HashtagNeighbor(name=name, weight=weight)
+                for name, weight in self.graph_engine.top_neighbors(
+                    hashtag_id, size, year_from=year_from, year_to=year_to, weighting=weighting
+                )
+            ]
+
+        if year_from is None and year_to is None and weighting == "count":
+            lists = await get_neighbor_lists(self.es, [hashtag_id], size)
+            if hashtag_id in lists:
+                return [HashtagNeighbor(name=name, weight=weight) for name, weight in lists[hashtag_id]]
+
+        body = build_neighbors_search(hashtag_id, size, year_from=year_from, year_to=year_to, weighting=weighting)
+        es_resp = await self.es.search(
+            index=settings.es_hashtag_relations_index,
+            size=body["size"],
+            query=body["query"],
+            sort=body["sort"],
+            source=body["_source"]
+        )
+        return [
+            HashtagNeighbor(
+                name=hit["_source"]["dst"] if hit["_source"]["src"] == hashtag_id else hit["_source"]["src"],
+                weight=relation_weight(
+                    hit["_source"], relation_counts(hit["_source"], year_from=year_from, year_to=year_to)[0], weighting
+                )
+            )
+            for hit in es_resp["hits"]["hits"]
+        ]
+
+
+    async def rebuild_relations(self) -> HashtagRelationRebuildReport:
+        report = await rebuild_relation_indices(self.es)
+        if self.graph_engine is not None:
+            await self.graph_engine.load(self.es)
+        return report
+
+
+    async def rebuild_neighbor_lists(self) -> HashtagNeighborListRebuildReport:
+        return await rebuild_neighbor_lists(self.es)
+
+
+    async def rebuild_paper_counts(self) -> HashtagPaperCountRebuildReport:
+        return await rebuild_tag_paper_counts(self.es)
+
+
+    async def rebuild_association_weights(self) -> HashtagAssociationRebuildReport:
+        report = await rebuild_association_weights(self.es)
+        if self.graph_engine is not None:
+            await self.graph_engine.load(self.es)
+        return report
+
+
     async def delete_relations(self, hashtag_id: Optional[str]=None):
         if hashtag_id:
             await self.es.delete_by_query(
@@ -266,12 +717,40 @@ class HashtagService:
                 },
                 refresh=True
             )
+            # Drop the tag's list and paper counts, and its entry in the lists of its neighbors
+            for index in (settings.es_hashtag_neighbors_index, settings.es_hashtag_counts_index):
+                try:
+                    await self.es.delete(index=index, id=hashtag_id)
+                except NotFoundError:
+                    pass
+            await self.es.update_by_query(
+                index=settings.es_hashtag_neighbors_index,
+                body={
+                    "query": {"term": {"neighbors.name": hashtag_id}},
+                    "script": {
+                        "source": "ctx._source.neighbors.removeIf(n -> n.name == params.tag);",
+                        "lang": "painless",
+                        "params": {"tag": hashtag_id}
+                    }
+                },
+                refresh=True
+            )
+            if self.graph_engine is not None:
+                self.graph_engine.remove_tag(hashtag_id)
         else:
             await self.es.delete_by_query(
                 index=settings.es_hashtag_relations_index,
                 body={"query": {"match_all": {}}},
                 refresh=True
             )
+            for index in (settings.es_hashtag_neighbors_index, settings.es_hashtag_counts_index):
+                await self.es.delete_by_query(
+                    index=index,
+                    body={"query": {"match_all": {}}},
+                    refresh=True
+                )
+            if self.graph_engine is not None:
+                self.graph_engine.clear()
 
     
     async def delete_from_papers(self, hashtag_id: Optional[str]=None):
@@ -307,4 +786,8 @@ class HashtagService:
                     }
                 },
                 refresh=True
-            )
\ No newline at end of file
+            )
+
+        # Cached paper searches hold the removed hashtags
+        if self.search_cache is not None:
+            self.search_cache.invalidate()
\ No newline at end of file
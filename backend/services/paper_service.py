@@ -1,17 +1,52 @@
 from core.config import settings
 from core.logging import logger
-from models import Paper, PaperCreate, PaperUpdate, PaperSearchRequest
+from models import (
+    Paper, 
+    PaperCreate, 
+    PaperUpdate, 
+    PaperSearchRequest,
+    PaperBulkItem,
+    PaperBulkResponse,
+    PaperListItem,
+    PaperPage,
+    PaperSearchResponse
+)
 from utils.paper_id import generate_paper_id
+from utils.es_pagination import iter_pit_hits, search_page
+from utils.projection import resolve_projection
+from utils.search_cache import SearchResultCache, canonical_search_request, get_search_cache
+from utils.search_facets import build_facet_aggs, parse_facet_aggs
+from utils.static_rank import build_static_rank_query, compute_static_rank, refresh_static_ranks
 from utils.hashtag_normalization import normalize_hashtag
-from utils.hashtag_relations_update import  build_tag_pairs, update_hashtag_relations
+from utils.hashtag_vocabulary import HashtagVocabulary, get_hashtag_vocabulary
+from utils.hashtag_graph import HashtagGraphEngine, get_hashtag_graph_engine
+from utils.hashtag_association_refresh import AssociationWeightRefresher, get_association_weight_refresher
+from utils.hashtag_relations_update import (
+    build_tag_pairs, 
+    aggregate_pair_deltas,
+    aggregate_tag_deltas,
+    update_hashtag_relations
+)
 
 from elasticsearch import AsyncElasticsearch, NotFoundError, ConflictError
-from typing import List
+from pydantic import ValidationError
+from typing import AsyncIterator, Iterable, List, Optional, Set
 
 class PaperService:
-    def __init__(self, es: AsyncElasticsearch):
+    def __init__(
+        self,
+        es: AsyncElasticsearch,
+        vocabulary: Optional[HashtagVocabulary] = None,
+        search_cache: Optional[SearchResultCache] = None,
+        graph_engine: Optional[HashtagGraphEngine] = None,
+        weight_refresher: Optional[AssociationWeightRefresher] = None
+    ):
         self.es = es
         self.index = settings.es_paper_index
+        self.vocabulary = vocabulary if vocabulary is not None else get_hashtag_vocabulary()
+        self.search_cache = search_cache if search_cache is not None else get_search_cache()
+        self.graph_engine = graph_engine if graph_engine is not None else get_hashtag_graph_engine()
+        self.weight_refresher = weight_refresher if weight_refresher is not None else get_association_weight_refresher()
 
     async def create(self, create_data: PaperCreate):
         invalid_tags = await self.get_invalid_hashtags(create_data)
@@ -24,17 +59,93 @@ class PaperService:
             await self.es.create(
                 index=self.index,
                 id=paper.id,
-                document=paper.model_dump(exclude_unset=True)
+                document=self.build_paper_document(paper)
             )
+            self.invalidate_search_cache()
 
-            tag_pairs = build_tag_pairs(paper.hashtags)
-            await update_hashtag_relations(self.es, tag_pairs, delta=1, year=paper.year)
+            deltas = aggregate_pair_deltas({}, build_tag_pairs(paper.hashtags), delta=1, year=paper.year)
+            tag_deltas = aggregate_tag_deltas({}, paper.hashtags, delta=1, year=paper.year)
+            await update_hashtag_relations(self.es, deltas, graph=self.graph_engine, tag_deltas=tag_deltas, weight_refresher=self.weight_refresher)
 
         except ConflictError:
             return {"error": "Paper already exists"}, 409
         
         return paper
     
+
+    async def bulk_create(self, create_data: List[PaperCreate]) -> PaperBulkResponse:
+        items = [None] * len(create_data)
+        papers = [None] * len(create_data)
+
+        for position, data in enumerate(create_data):
+            try:
+                papers[position] = self.create_paper_model(data)
+            except ValidationError as e:
+                items[position] = PaperBulkItem(position=position, status=422, error=str(e))
+        
+        # Validate the hashtags of the whole batch in one lookup
+        missing_tags = await self.find_missing_hashtags(
+            tag for paper in papers if paper for tag in paper.hashtags
+        )
+
+        positions = []
+        operations = []
+
+        for position, paper in enumerate(papers):
+            if paper is None:
+                continue
+
+            invalid_tags = [tag for tag in paper.hashtags if tag in missing_tags]
+            if invalid_tags:
+                items[position] = PaperBulkItem(
+                    position=position,
+                    id=paper.id,
+                    status=400,
+                    error=f"Unrecognized hashtags: {invalid_tags}"
+                )
+                continue
+            
+            positions.append(position)
+            operations.append({"create": {"_index": self.index, "_id": paper.id}})
+            operations.append(self.build_paper_document(paper))
+
+        deltas = {}
+        tag_deltas = {}
+        chunk_size = settings.es_bulk_chunk_size
+
+        for start in range(0, len(positions), chunk_size):
+            es_resp = await self.es.bulk(operations=operations[2 * start: 2 * (start + chunk_size)])
+            self.invalidate_search_cache()
+
+            for position, item in zip(positions[start: start + chunk_size], es_resp["items"]):
+                paper = papers[position]
+                result = item["create"]
+                
+                if "error" in result:
+                    error = "Paper already exists" if result["status"] == 409 else result["error"].get("reason")
+                    items[position] = PaperBulkItem(
+                        position=position, 
+                        id=paper.id, 
+                        status=result["status"], 
+                        error=error
+                    )
+                    continue
+                
+                items[position] = PaperBulkItem(position=position, id=paper.id, status=result["status"])
+                aggregate_pair_deltas(deltas, build_tag_pairs(paper.hashtags), delta=1, year=paper.year)
+                aggregate_tag_deltas(tag_deltas, paper.hashtags, delta=1, year=paper.year)
+
+        # Apply the co-occurrence and tag count deltas of the whole batch in one bulk pass
+        relations_report = await update_hashtag_relations(self.es, deltas, graph=self.graph_engine, tag_deltas=tag_deltas, weight_refresher=self.weight_refresher)
+
+        created = sum(1 for item in items if item.error is None)
+        return PaperBulkResponse(
+            created=created, 
+            failed=len(items) - created, 
+            items=items,
+            relations=relations_report
+        )
+    
     
     async def get(self, paper_id: str) -> Paper:
         try:
@@ -44,36 +155,81 @@ class PaperService:
         except NotFoundError:
             return {"error": "Paper not found"}, 404
         
-    async def find_all(self, size: int = 1000) -> List[Paper]:
+    async def find_all(self, size: int = 1000, fields: Optional[List[str]] = None):
         # size=1000 is the default max for Elasticsearch queries
+        try:
+            source = resolve_projection(PaperListItem, fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
         result = await self.es.search(
             index=self.index,
             query={"match_all": {}},
-            size=size
+            size=size,
+            source=source or True
         )
 
         return [
-            Paper(**hit["_source"])
+            PaperListItem(**hit["_source"])
             for hit in result["hits"]["hits"]
-        ] 
+        ]
+
+
+    async def find_page(
+        self,
+        size: int = settings.default_page_size,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ):
+        try:
+            source = resolve_projection(PaperListItem, fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        try:
+            hits, next_cursor = await search_page(self.es, self.index, size=size, cursor=cursor, source=source or True)
+        except ValueError:
+            return {"error": "Invalid cursor"}, 400
+        except NotFoundError:
+            if cursor is None:
+                return PaperPage(items=[], next_cursor=None)
+            return {"error": "Cursor expired, restart the listing without a cursor"}, 410
+
+        return PaperPage(
+            items=[PaperListItem(**hit["_source"]) for hit in hits],
+            next_cursor=next_cursor
+        )
+
+
+    async def iter_all(self, source: Optional[List[str]] = None) -> AsyncIterator[PaperListItem]:
+        # Streams every paper, one Elasticsearch page in memory at a time
+        async for hit in iter_pit_hits(self.es, index=self.index, source=source or True):
+            yield PaperListItem(**hit["_source"])
     
 
     async def update(self, paper_id: str, updated_data: PaperUpdate):
         try:
             old_paper = await self.get(paper_id)
+            if isinstance(old_paper, tuple):
+                return old_paper
             
             if updated_data.hashtags:
-                updated_data.hashtags = [normalize_hashtag(tag) for tag in updated_data.hashtag]
+                updated_data.hashtags = [normalize_hashtag(tag) for tag in updated_data.hashtags]
             
+            doc = updated_data.model_dump(exclude_unset=True)
+            if updated_data.year is not None:
+                doc["static_rank"] = compute_static_rank(updated_data.year)
+
             await self.es.update(
                 index=self.index, 
                 id=paper_id, 
-                body={"doc": updated_data.model_dump(exclude_unset=True)}
+                body={"doc": doc}
             )
+            self.invalidate_search_cache()
             
             updated_paper = await self.get(paper_id)
             
-            if updated_data.hashtags:
+            if updated_data.hashtags is not None or updated_data.year is not None:
                 await self.update_hashtag_relations(old_paper, updated_paper)
 
             return updated_paper
@@ -84,12 +240,16 @@ class PaperService:
 
     async def delete(self, paper_id: str):
         try:
-            paper = self.get(paper_id)
+            paper = await self.get(paper_id)
+            if isinstance(paper, tuple):
+                return paper
             
             await self.es.delete(index=self.index, id=paper_id)
+            self.invalidate_search_cache()
             
-            tag_pairs = build_tag_pairs(paper.hashtags)
-            await update_hashtag_relations(self.es, tag_pairs, delta=-1, year=paper.year)
+            deltas = aggregate_pair_deltas({}, build_tag_pairs(paper.hashtags), delta=-1, year=paper.year)
+            tag_deltas = aggregate_tag_deltas({}, paper.hashtags, delta=-1, year=paper.year)
+            await update_hashtag_relations(self.es, deltas, graph=self.graph_engine, tag_deltas=tag_deltas, weight_refresher=self.weight_refresher)
             
             return {"message": "deleted"}
         except NotFoundError:
@@ -103,18 +263,36 @@ class PaperService:
             body={"query": {"match_all": {}}},
             refresh=True  # ensures deletions are visible immediately
         )
+        self.invalidate_search_cache()
 
-        # Delete all hashtag co-occurrence relations
-        await self.es.delete_by_query(
-            index=settings.es_hashtag_relations_index,
-            body={"query": {"match_all": {}}},
-            refresh=True
-        )
+        # Delete all hashtag co-occurrence relations, the neighbor lists derived from them and the paper counts of hashtags
+        for index in (settings.es_hashtag_relations_index, settings.es_hashtag_neighbors_index, settings.es_hashtag_counts_index):
+            await self.es.delete_by_query(
+                index=index,
+                body={"query": {"match_all": {}}},
+                refresh=True
+            )
+        if self.graph_engine is not None:
+            self.graph_engine.clear()
         
         return {"message": "all papers deleted"}
     
 
     async def search(self, search_request: PaperSearchRequest):
+        search_request = canonical_search_request(search_request)
+        try:
+            source = resolve_projection(PaperListItem, search_request.fields)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        cache = self.search_cache
+        if cache is not None:
+            cache_key = search_request.model_dump_json()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = cache.generation
+
         es_bool_query = {
             "must": [{
                 # "terms": {"hashtags": search_request.must}
@@ -140,37 +318,59 @@ class PaperService:
                 }
             })
 
-        es_query = {
-            "function_score": {
-                "query": {
-                    "bool": es_bool_query
-                },
-                "boost_mode": "sum",
-                "score_mode": "sum",
-                "functions": [
-                    {
-                        "field_value_factor": {
-                            "field": "year",
-                            "factor": 1,
-                            "missing": 2000
-                        }
-                    }
-                ]
-            }
-        }
+        # Recency comes from the static_rank indexed with each paper
+        es_query = build_static_rank_query({"bool": es_bool_query})
+
+        # Facets come back with the hits in the same request
+        facet_params = {}
+        if search_request.facets is not None:
+            facet_params = {"aggs": build_facet_aggs(search_request.facets), "track_total_hits": True}
 
         result = await self.es.search(
             index=self.index,
             query=es_query,
-            size=search_request.size
+            size=search_request.size,
+            source=source or True,
+            **facet_params
         )
 
-        return [
-            Paper(**hit["_source"])
+        papers = [
+            PaperListItem(**hit["_source"])
             for hit in result["hits"]["hits"]
         ]
+
+        if search_request.facets is not None:
+            papers = PaperSearchResponse(
+                items=papers,
+                total=result["hits"]["total"]["value"],
+                facets=parse_facet_aggs(result.get("aggregations", {}))
+            )
+
+        if cache is not None:
+            cache.put(cache_key, papers, generation)
+
+        return papers
          
     
+    async def refresh_static_ranks(self) -> int:
+        updated = await refresh_static_ranks(self.es, index=self.index)
+        self.invalidate_search_cache()
+        return updated
+
+
+    def invalidate_search_cache(self):
+        if self.search_cache is not None:
+            self.search_cache.invalidate()
+
+
+    def build_paper_document(self, paper: Paper) -> dict:
+        document = paper.model_dump(exclude_unset=True)
+        static_rank = compute_static_rank(paper.year)
+        if static_rank is not None:
+            document["static_rank"] = static_rank
+        return document
+
+
     def create_paper_model(self, create_data: PaperCreate) -> Paper:
         paper_id = generate_paper_id(arxiv_id=create_data.arxiv_id, doi=create_data.doi)
 
@@ -191,32 +391,21 @@ class PaperService:
         )
     
     
-    async def get_invalid_hashtags(self, paper: PaperCreate) -> bool:
-        invalid_list = []
-        for hashtag in paper.hashtags:
-            try:
-                hashtag = normalize_hashtag(hashtag)
-                await self.es.get(index=settings.es_hashtag_index, id=hashtag)
-            except NotFoundError:
-                invalid_list.append(hashtag)
-        return invalid_list
+    async def find_missing_hashtags(self, hashtags: Iterable[str]) -> Set[str]:
+        return await self.vocabulary.find_missing(self.es, hashtags)
+
+
+    async def get_invalid_hashtags(self, paper: PaperCreate) -> List[str]:
+        hashtags = [normalize_hashtag(hashtag) for hashtag in paper.hashtags]
+        missing_tags = await self.find_missing_hashtags(hashtags)
+        return [hashtag for hashtag in hashtags if hashtag in missing_tags]
     
     
     async def update_hashtag_relations(self, old_paper: Paper, updated_paper: Paper):
-        old_tag_pairs =  old_tag_pairs = build_tag_pairs(old_paper.hashtags)
-        new_tag_pairs = build_tag_pairs(updated_paper.hashtags)
-        
-        if old_paper.year == updated_paper.year:
-            removed = set(old_tag_pairs) - set(new_tag_pairs)
-            added = set(new_tag_pairs) - set(old_tag_pairs)
-            
-            if removed:
-                await update_hashtag_relations(self.es, list(removed), delta=-1, year=updated_paper.year)
-            if added:
-                await update_hashtag_relations(self.es, list(added), delta=1, year=updated_paper.year)
-        else:
-            await update_hashtag_relations(self.es, list(old_tag_pairs), delta=-1, year=old_paper.year)
-            await update_hashtag_relations(self.es, list(new_tag_pairs), delta=+1, year=new_tag_pairs)
-
+        # Pairs kept in the same year cancel out and are not written at all
+        deltas = aggregate_pair_deltas({}, build_tag_pairs(old_paper.hashtags), delta=-1, year=old_paper.year)
+        aggregate_pair_deltas(deltas, build_tag_pairs(updated_paper.hashtags), delta=1, year=updated_paper.year)
+        tag_deltas = aggregate_tag_deltas({}, old_paper.hashtags, delta=-1, year=old_paper.year)
+        aggregate_tag_deltas(tag_deltas, updated_paper.hashtags, delta=1, year=updated_paper.year)
         
-        
\ No newline at end of file
+        return await update_hashtag_relations(self.es, deltas, graph=self.graph_engine, tag_deltas=tag_deltas, weight_refresher=self.weight_refresher)
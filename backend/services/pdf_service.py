@@ -6,21 +6,22 @@ from core.config import settings
 # from utils.embeddings import mock_embedding, average_embeddings
 
 from utils.hashtag_normalization import normalize_hashtag
-from elasticsearch import AsyncElasticsearch, NotFoundError
-from typing import List, Dict
+from utils.hashtag_vocabulary import HashtagVocabulary, get_hashtag_vocabulary
+from utils.llm import get_llm_client
+from elasticsearch import AsyncElasticsearch
+from typing import List, Dict, Optional, Tuple
+import asyncio
 import fitz
 import io
-import openai
 import re
 
-OPENAI_API_KEY = "YOUR_OPENAI_API_KEY"
-
 class PdfService:
-    def __init__(self, es: AsyncElasticsearch):
+    def __init__(self, es: AsyncElasticsearch, vocabulary: Optional[HashtagVocabulary] = None):
         self.es = es
         self.index = settings.es_hashtag_index
+        self.vocabulary = vocabulary if vocabulary is not None else get_hashtag_vocabulary()
 
-    async def extract_title(self, doc) -> str:
+    def extract_title(self, doc) -> str:
         meta_title = doc.metadata.get("title", "").strip()
         # print(doc.metadata)
         if meta_title:
@@ -52,7 +53,7 @@ class PdfService:
         return " ".join(title_candidates)
 
 
-    async def extract_abstract(self, doc) -> str:
+    def extract_abstract(self, doc) -> str:
         first_page = doc.load_page(0)
         text = first_page.get_text()
         lowered = text.lower()
@@ -79,9 +80,11 @@ class PdfService:
             result = text[:7000]
         return result
 
-    async def generate_hashtags(self, abstract):
+    def parse_pdf(self, contents: bytes) -> Tuple[str, str]:
+        doc = fitz.open(stream=io.BytesIO(contents), filetype="pdf")
+        return self.extract_title(doc), self.extract_abstract(doc)
 
-        openai.api_key = OPENAI_API_KEY
+    async def generate_hashtags(self, abstract):
         prompt = '''
         Given the following abstract, give me 10 terms of topics or classification or keywords.
         7 of terms should be common, broad, general in papers and 3 are more specific to abstract,
@@ -92,34 +95,22 @@ class PdfService:
         No need to exist in abstract
         '''
         prompt += abstract
-        response = openai.responses.create(
-            model="gpt-4o-mini",
-            input = prompt
-        )
-        return response.output_text
+        return await get_llm_client().complete(prompt, model=settings.hashtag_suggestion_model)
     
     async def extract_pdf_info(self, contents: bytes) -> Dict:
         try:
-            doc = fitz.open(stream=io.BytesIO(contents), filetype="pdf")
-
-            title = await self.extract_title(doc)
+            # PDF parsing is CPU-bound, keep it off the event loop
+            title, abstract = await asyncio.to_thread(self.parse_pdf, contents)
             # print("Title:", title)
             # print()
-            abstract = await self.extract_abstract(doc)
             # print("Abstract:", abstract)
             # print()
             hashtags = await self.generate_hashtags(abstract)
             hashtags = [hashtag.strip() for hashtag in hashtags.split(",")]
             print("Hashtags:", hashtags)
-            exist_hashtags = []
-            for hashtag in hashtags:
-                try:
-                    hashtag = normalize_hashtag(hashtag)
-                    await self.es.get(index=settings.es_hashtag_index, id=hashtag)
-                    # print("Hashtag:", hashtag)
-                    exist_hashtags.append(hashtag)
-                except NotFoundError:
-                    continue
+            hashtags = [normalize_hashtag(hashtag) for hashtag in hashtags]
+            missing_tags = await self.vocabulary.find_missing(self.es, hashtags)
+            exist_hashtags = [hashtag for hashtag in hashtags if hashtag not in missing_tags]
 
             return {
                 "title": title,
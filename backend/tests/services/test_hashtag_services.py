@@ -4,6 +4,7 @@ from services.hashtag_service import HashtagService
 from models import HashtagCreate, Hashtag, HashtagUpdate
 from utils.hashtag_normalization import normalize_hashtag
 from utils.embeddings import mock_embedding
+from utils.hashtag_vocabulary import HashtagVocabulary
 
 
 @pytest.mark.asyncio
@@ -32,4 +33,21 @@ async def test_get(es_client):
 
     response = await service.get("nonexistent-id")
     assert isinstance(response, tuple)
-    assert response[1] == 404
\ No newline at end of file
+    assert response[1] == 404
+
+@pytest.mark.asyncio
+async def test_vocabulary_verify_mode(es_client):
+    vocabulary = HashtagVocabulary(mode="verify")
+    vocabulary.loaded = True
+    service = HashtagService(es=es_client, vocabulary=vocabulary)
+
+    data = Hashtag(name="rag", description="RAG description", embedding=mock_embedding("rag"))
+    await es_client.index(index=service.index, id=data.name, document=data.model_dump(), refresh=True)
+
+    # Created by another worker: the miss is verified against the index
+    missing = await vocabulary.find_missing(es_client, ["rag", "agents"])
+    assert missing == {"agents"}
+    assert "rag" in vocabulary
+
+    await service.delete("rag")
+    assert "rag" not in vocabulary
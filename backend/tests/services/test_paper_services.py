@@ -0,0 +1,86 @@
+import pytest
+from core.config import settings
+from services.paper_service import PaperService
+from models import PaperCreate, PaperUpdate, Hashtag
+from utils.embeddings import mock_embedding
+
+
+async def index_hashtags(es, names):
+    for name in names:
+        hashtag = Hashtag(id=name, name=name, description=f"{name} description", embedding=mock_embedding(name))
+        await es.index(index=settings.es_hashtag_index, id=hashtag.id, document=hashtag.model_dump())
+    await es.indices.refresh(index=settings.es_hashtag_index)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create(es_client):
+    service = PaperService(es=es_client)
+    await index_hashtags(es_client, ["llm", "rag", "agents"])
+
+    papers = [
+        PaperCreate(arxiv_id="1", title="A", abstract="a", year=2023, hashtags=["LLM", "RAG"]),
+        PaperCreate(arxiv_id="2", title="B", abstract="b", year=2024, hashtags=["llm", "rag", "agents"]),
+        PaperCreate(arxiv_id="3", title="C", abstract="c", year=2024, hashtags=["llm", "unknown"]),
+        PaperCreate(arxiv_id="1", title="A again", abstract="a", year=2023, hashtags=["llm"]),
+    ]
+
+    response = await service.bulk_create(papers)
+
+    assert response.created == 2
+    assert response.failed == 2
+    assert [item.status for item in response.items] == [201, 201, 400, 409]
+
+    relation = await es_client.get(index=settings.es_hashtag_relations_index, id="llm__rag")
+    assert relation["_source"]["paper_cnt_total"] == 2
+    assert relation["_source"]["paper_cnt_by_year"] == [{"year": 2023, "cnt": 1}, {"year": 2024, "cnt": 1}]
+
+
+@pytest.mark.asyncio
+async def test_update_moves_relations(es_client):
+    service = PaperService(es=es_client)
+    await index_hashtags(es_client, ["llm", "rag", "agents"])
+
+    paper = await service.create(
+        PaperCreate(arxiv_id="1", title="A", abstract="a", year=2023, hashtags=["llm", "rag"])
+    )
+    await service.update(paper.id, PaperUpdate(year=2024, hashtags=["llm", "agents"]))
+
+    relation = await es_client.get(index=settings.es_hashtag_relations_index, id="agents__llm")
+    assert relation["_source"]["paper_cnt_by_year"] == [{"year": 2024, "cnt": 1}]
+
+    exists = await es_client.exists(index=settings.es_hashtag_relations_index, id="llm__rag")
+    assert not exists
+
+
+@pytest.mark.asyncio
+async def test_find_page_follows_cursors(es_client):
+    service = PaperService(es=es_client)
+    await service.bulk_create([
+        PaperCreate(arxiv_id=str(i), title=f"Paper {i}", abstract="a", year=2024) for i in range(5)
+    ])
+    await es_client.indices.refresh(index=settings.es_paper_index)
+
+    titles, cursor = [], None
+    while True:
+        page = await service.find_page(size=2, cursor=cursor)
+        titles.extend(paper.title for paper in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert sorted(titles) == [f"Paper {i}" for i in range(5)]
+    assert await service.find_page(cursor="not a cursor") == ({"error": "Invalid cursor"}, 400)
+
+
+@pytest.mark.asyncio
+async def test_find_all_keeps_the_unpaginated_list(es_client):
+    service = PaperService(es=es_client)
+    await service.bulk_create([
+        PaperCreate(arxiv_id=str(i), title=f"Paper {i}", abstract="a", year=2024) for i in range(3)
+    ])
+    await es_client.indices.refresh(index=settings.es_paper_index)
+
+    papers = await service.find_all(fields=["title"])
+
+    assert sorted(paper.title for paper in papers) == [f"Paper {i}" for i in range(3)]
+    assert all(paper.year is None for paper in papers)
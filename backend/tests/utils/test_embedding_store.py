@@ -0,0 +1,65 @@
+import json
+import numpy as np
+import pytest
+from utils.embedding_store import (
+    EmbeddingStore,
+    embedding_store_to_json,
+    iter_embeddings,
+    json_to_embedding_store,
+    read_embedding_ids,
+    write_embedding_store
+)
+from utils.embeddings import average_embeddings
+
+
+EMBEDDINGS = {
+    "Quantum Computing": [0.5, -0.25, 1.0],
+    "Data Compression": [0.125, 0.75, -1.0],
+    "量子": [0.0, 2.0, 0.25]
+}
+
+
+def test_write_and_read_store(tmp_path):
+    path = tmp_path / "tag_embs"
+    assert write_embedding_store(path, EMBEDDINGS.items()) == 3
+
+    store = EmbeddingStore(path)
+    assert len(store) == 3 and store.dim == 3
+    assert isinstance(store.vectors, np.memmap)
+    assert store.ids == list(EMBEDDINGS)
+    assert "量子" in store and "Missing" not in store
+    assert store.get("Data Compression").tolist() == EMBEDDINGS["Data Compression"]
+    assert store.get("Missing") is None
+
+    found, vectors = store.take(["量子", "Missing", "Quantum Computing"])
+    assert found == ["量子", "Quantum Computing"]
+    assert vectors.tolist() == [EMBEDDINGS["量子"], EMBEDDINGS["Quantum Computing"]]
+    assert average_embeddings(vectors) == [0.25, 0.875, 0.625]
+
+
+def test_float16_store_and_empty_store(tmp_path):
+    write_embedding_store(tmp_path / "half", EMBEDDINGS.items(), dtype="float16")
+    store = EmbeddingStore(tmp_path / "half")
+    assert store.vectors.dtype == np.float16
+    assert (tmp_path / "half" / "vectors.bin").stat().st_size == 3 * 3 * 2
+
+    write_embedding_store(tmp_path / "empty", [])
+    assert len(EmbeddingStore(tmp_path / "empty")) == 0
+
+
+def test_write_rejects_inconsistent_dims(tmp_path):
+    with pytest.raises(ValueError):
+        write_embedding_store(tmp_path / "bad", [("a", [1.0, 2.0]), ("b", [1.0])])
+    assert not (tmp_path / "bad").exists()
+
+
+def test_json_round_trip(tmp_path):
+    json_path = tmp_path / "tag_embs.json"
+    json_path.write_text(json.dumps(EMBEDDINGS, ensure_ascii=False), encoding="utf-8")
+
+    json_to_embedding_store(json_path, tmp_path / "store")
+    embedding_store_to_json(tmp_path / "store", tmp_path / "out.json")
+
+    assert json.loads((tmp_path / "out.json").read_text(encoding="utf-8")) == EMBEDDINGS
+    assert dict(iter_embeddings(tmp_path / "store")) == dict(iter_embeddings(json_path)) == EMBEDDINGS
+    assert read_embedding_ids(tmp_path / "store") == read_embedding_ids(json_path) == list(EMBEDDINGS)
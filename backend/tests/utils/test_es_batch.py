@@ -0,0 +1,57 @@
+import pytest
+from core.config import settings
+from utils.es_batch import mget_sources, msearch_hits
+
+
+class RecordingElasticsearch:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    async def mget(self, index, ids, source):
+        self.calls.append((index, list(ids), source))
+        return {
+            "docs": [
+                {"_id": id, "found": True, "_source": self.docs[id]} if id in self.docs else {"_id": id, "found": False}
+                for id in ids
+            ]
+        }
+
+
+@pytest.mark.asyncio
+async def test_mget_sources_chunks_and_skips_missing(monkeypatch):
+    monkeypatch.setattr(settings, "es_bulk_chunk_size", 2)
+    es = RecordingElasticsearch({"a": {"embedding": [1.0]}, "c": {"embedding": [3.0]}})
+
+    sources = await mget_sources(es, index="hashtags", ids=["a", "b", "a", "c"], source=["embedding"])
+
+    assert sources == {"a": {"embedding": [1.0]}, "c": {"embedding": [3.0]}}
+    assert es.calls == [
+        ("hashtags", ["a", "b"], ["embedding"]),
+        ("hashtags", ["c"], ["embedding"])
+    ]
+
+
+class MsearchElasticsearch:
+    def __init__(self):
+        self.calls = []
+
+    async def msearch(self, index, searches):
+        self.calls.append(len(searches) // 2)
+        responses = []
+        for body in searches[1::2]:
+            if body["q"] == "bad":
+                responses.append({"error": {"type": "search_phase_execution_exception"}, "status": 400})
+            else:
+                responses.append({"hits": {"hits": [{"_id": body["q"]}]}})
+        return {"responses": responses}
+
+
+@pytest.mark.asyncio
+async def test_msearch_hits_keeps_order_across_chunks():
+    es = MsearchElasticsearch()
+
+    results = await msearch_hits(es, index="relations", searches=[{"q": q} for q in ["a", "bad", "c"]], chunk_size=2)
+
+    assert results == [[{"_id": "a"}], [], [{"_id": "c"}]]
+    assert es.calls == [2, 1]
@@ -0,0 +1,109 @@
+import json
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import BadRequestError, NotFoundError
+from pydantic import BaseModel
+from core.config import settings
+from utils.es_pagination import decode_cursor, encode_cursor, search_page
+from utils.streaming import iter_ndjson
+
+
+def es_meta(status):
+    return ApiResponseMeta(status, "1.1", HttpHeaders(), 0.0, NodeConfig("http", "localhost", 9200))
+
+
+class PagingElasticsearch:
+    def __init__(self, doc_cnt):
+        self.docs = [{"_id": str(i), "_source": {"n": i}, "sort": [i]} for i in range(doc_cnt)]
+        self.open_pits = set()
+        self.pit_cnt = 0
+        self.keep_alives = []
+
+    def options(self, **kwargs):
+        return self
+
+    async def open_point_in_time(self, index, keep_alive):
+        self.pit_cnt += 1
+        pit_id = f"pit-{self.pit_cnt}"
+        self.open_pits.add(pit_id)
+        return {"id": pit_id}
+
+    async def close_point_in_time(self, id):
+        self.open_pits.discard(id)
+
+    async def search(self, pit, query, sort, search_after, source, size):
+        self.keep_alives.append(pit["keep_alive"])
+        # Ids we never issued cannot be decoded, closed ones are gone
+        if not pit["id"].startswith("pit-"):
+            raise BadRequestError("parse_exception", es_meta(400), {})
+        if pit["id"] not in self.open_pits:
+            raise NotFoundError("search_context_missing_exception", es_meta(404), {})
+        start = 0 if search_after is None else search_after[0] + 1
+        return {"pit_id": pit["id"], "hits": {"hits": self.docs[start: start + size]}}
+
+
+@pytest.mark.asyncio
+async def test_search_page_walks_all_docs_with_cursors():
+    es = PagingElasticsearch(doc_cnt=7)
+    seen, cursor, pages = [], None, 0
+
+    while True:
+        hits, cursor = await search_page(es, "papers", size=3, cursor=cursor)
+        seen.extend(hit["_source"]["n"] for hit in hits)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert seen == list(range(7))
+    assert pages == 3
+    assert es.pit_cnt == 1
+    assert not es.open_pits
+    # Only a listing that comes back for a second page keeps its point in time for long
+    assert es.keep_alives == [settings.es_first_page_keep_alive, settings.es_cursor_keep_alive, settings.es_cursor_keep_alive]
+
+
+@pytest.mark.asyncio
+async def test_search_page_closes_the_point_in_time_of_a_single_page():
+    es = PagingElasticsearch(doc_cnt=3)
+
+    hits, cursor = await search_page(es, "papers", size=3)
+
+    assert [hit["_source"]["n"] for hit in hits] == [0, 1, 2]
+    assert cursor is None
+    assert not es.open_pits
+
+
+@pytest.mark.asyncio
+async def test_search_page_rejects_forged_and_expired_cursors():
+    es = PagingElasticsearch(doc_cnt=7)
+
+    with pytest.raises(ValueError):
+        await search_page(es, "papers", size=3, cursor=encode_cursor("forged", [2]))
+    with pytest.raises(NotFoundError):
+        await search_page(es, "papers", size=3, cursor=encode_cursor("pit-9", [2]))
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    cursor = encode_cursor("pit-1", [42, "x"])
+    assert decode_cursor(cursor) == ("pit-1", [42, "x"])
+
+    for bad in ["not a cursor", encode_cursor("pit", [])[:-3], "eyJhIjogMX0="]:
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+class Item(BaseModel):
+    name: str
+
+
+@pytest.mark.asyncio
+async def test_iter_ndjson_chunks_lines():
+    async def items():
+        for i in range(5):
+            yield Item(name=f"tag {i}")
+
+    chunks = [chunk async for chunk in iter_ndjson(items(), flush_bytes=40)]
+
+    assert len(chunks) > 1
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [f"tag {i}" for i in range(5)]
@@ -0,0 +1,31 @@
+import json
+import pytest
+from utils.handle_json import iter_json_items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_json_array(tmp_path, chunk_size):
+    papers = [{"title": "A", "year": 2023, "hashtags": ["x", "y"]}, {"title": "B", "year": 12345}, 3.25]
+    path = tmp_path / "papers.json"
+    path.write_text(json.dumps(papers, indent=2))
+
+    assert list(iter_json_items(path, chunk_size=chunk_size)) == papers
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 16])
+def test_iter_json_object(tmp_path, chunk_size):
+    embeddings = {"Quantum Computing": [0.125, -1.5e-3], "Data Compression": [1, 2]}
+    path = tmp_path / "embs.json"
+    path.write_text(json.dumps(embeddings))
+
+    assert dict(iter_json_items(path, chunk_size=chunk_size)) == embeddings
+
+
+def test_iter_json_lines_and_empty(tmp_path):
+    lines_path = tmp_path / "papers.jsonl"
+    lines_path.write_text('{"title": "A"}\n\n{"title": "B"}\n')
+    empty_path = tmp_path / "empty.json"
+    empty_path.write_text(" [ ] ")
+
+    assert list(iter_json_items(lines_path)) == [{"title": "A"}, {"title": "B"}]
+    assert list(iter_json_items(empty_path)) == []
@@ -0,0 +1,90 @@
+import asyncio
+import math
+import numpy as np
+import pytest
+from core.config import settings
+from utils import hashtag_association_refresh
+from utils.hashtag_association import association_weights, build_tag_count_update
+from utils.hashtag_association_refresh import AssociationWeightRefresher
+from utils.hashtag_relations_update import aggregate_tag_deltas
+
+
+def test_association_weights_match_their_definitions():
+    weights = association_weights(np.array([2, 4]), np.array([4, 4]), np.array([5, 4]), paper_cnt=20)
+
+    assert weights["pmi"][0] == pytest.approx(math.log(2 * 20 / (4 * 5)))
+    assert weights["npmi"][0] == pytest.approx(math.log(2) / -math.log(2 / 20))
+    assert weights["jaccard"][0] == pytest.approx(2 / 7)
+    # Two tags always found together
+    assert weights["jaccard"][1] == pytest.approx(1.0)
+    assert weights["npmi"][1] == pytest.approx(1.0)
+
+
+def test_association_weights_stay_defined_for_stale_tag_counts():
+    # Tag counts behind the pair count, and a pair in every paper
+    weights = association_weights(np.array([3, 5]), np.array([1, 5]), np.array([0, 5]), paper_cnt=5)
+
+    for name, values in weights.items():
+        assert np.isfinite(values).all(), name
+    assert weights["npmi"][1] == 1.0
+
+
+def test_tag_count_update_adds_the_deltas_by_year_and_in_total():
+    action, body = build_tag_count_update("llm", {"2023": 2, "2024": -1})
+
+    assert (action["update"]["_index"], action["update"]["_id"]) == (settings.es_hashtag_counts_index, "llm")
+    assert body["script"]["params"] == {"tag": "llm", "deltas": {"2023": 2, "2024": -1}, "total": 1}
+    # Counts of a tag seen for the first time start from an empty doc
+    assert body["scripted_upsert"] and body["upsert"] == {}
+
+
+def test_aggregate_tag_deltas_counts_each_tag_once_per_paper():
+    tag_deltas = {}
+
+    aggregate_tag_deltas(tag_deltas, ["llm", "rag", "llm"], 1, 2024)
+    aggregate_tag_deltas(tag_deltas, ["llm"], -1, 2023)
+
+    assert tag_deltas == {"llm": {"2024": 1, "2023": -1}, "rag": {"2024": 1}}
+
+
+@pytest.mark.asyncio
+async def test_refresher_recomputes_the_weights_once_per_burst_of_writes(monkeypatch):
+    rebuilds = []
+
+    async def rebuild(es, write_counts):
+        rebuilds.append(write_counts)
+
+    monkeypatch.setattr(hashtag_association_refresh, "rebuild_association_weights", rebuild)
+    refresher = AssociationWeightRefresher(delay=0.05, max_delay=1.0)
+    task = asyncio.create_task(refresher.refresh_forever(es=None))
+
+    for _ in range(3):
+        refresher.mark_stale()
+        await asyncio.sleep(0.01)
+    assert rebuilds == [] and refresher.stale
+
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    # The counts index kept by paper writes is not rewritten
+    assert rebuilds == [False]
+    assert not refresher.stale
+
+
+@pytest.mark.asyncio
+async def test_refresher_does_not_wait_past_the_max_delay(monkeypatch):
+    rebuilds = []
+
+    async def rebuild(es, write_counts):
+        rebuilds.append(write_counts)
+
+    monkeypatch.setattr(hashtag_association_refresh, "rebuild_association_weights", rebuild)
+    refresher = AssociationWeightRefresher(delay=0.05, max_delay=0.1)
+    task = asyncio.create_task(refresher.refresh_forever(es=None))
+
+    for _ in range(8):
+        refresher.mark_stale()
+        await asyncio.sleep(0.02)
+    task.cancel()
+
+    assert len(rebuilds) == 1
@@ -0,0 +1,197 @@
+import asyncio
+import numpy as np
+import pytest
+from core.config import settings
+from services.hashtag_service import HashtagService
+from utils.hashtag_graph_budget import GraphBudget
+from utils.hashtag_neighbor_lists import build_neighbor_lists
+from utils.hashtag_vocabulary import HashtagVocabulary
+from utils.search_cache import SearchResultCache
+
+
+RELATIONS = [
+    ("llm", "rag", 9),
+    ("llm", "agents", 7),
+    ("agents", "planning", 4),
+    ("rag", "retrieval", 5),
+    ("retrieval", "bm25", 3),
+    ("qubit", "photonics", 2)
+]
+
+
+HASHTAG_COUNTS = {"llm": 12, "rag": 10, "agents": 8}
+
+
+def relation_source(src, dst, cnt):
+    return {"src": src, "dst": dst, "paper_cnt_total": cnt, "paper_cnt_by_year": {"2024": cnt}}
+
+
+class RelationsElasticsearch:
+    # Serves the top relations of each tag, one _msearch request per call, and documents by id
+    # from the relations, neighbor list and hashtag indices
+    def __init__(self, delay=0.0, neighbor_lists=None):
+        self.delay = delay
+        self.neighbor_lists = neighbor_lists or {}
+        self.msearch_calls = []
+        self.mget_calls = []
+
+    async def mget(self, index, ids, source):
+        self.mget_calls.append((index, len(ids)))
+        if index == settings.es_hashtag_neighbors_index:
+            docs = self.neighbor_lists
+        elif index == settings.es_hashtag_counts_index:
+            docs = {
+                tag: {"paper_count": cnt, "paper_cnt_by_year": [{"year": 2024, "cnt": cnt}]}
+                for tag, cnt in HASHTAG_COUNTS.items()
+            }
+        else:
+            pairs = {tuple(sorted((src, dst))): cnt for src, dst, cnt in RELATIONS}
+            docs = {f"{src}__{dst}": relation_source(src, dst, cnt) for (src, dst), cnt in pairs.items()}
+        return {"docs": [{"_id": id, "found": id in docs, "_source": docs.get(id)} for id in ids]}
+
+    async def msearch(self, index, searches):
+        self.msearch_calls.append(len(searches) // 2)
+        await asyncio.sleep(self.delay)
+        responses = []
+        for body in searches[1::2]:
+            tag = body["query"]["bool"]["should"][0]["terms"]["src"][0]
+            matching = sorted(
+                (relation for relation in RELATIONS if tag in relation[:2]),
+                key=lambda relation: -relation[2]
+            )[:body["size"]]
+            responses.append({"hits": {"hits": [{"_source": relation_source(src, dst, cnt)} for src, dst, cnt in matching]}})
+        return {"responses": responses}
+
+
+@pytest.mark.asyncio
+async def test_expand_graph_issues_one_msearch_per_level():
+    es = RelationsElasticsearch()
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    graph = await service.expand_graph(["llm"], steps=2)
+
+    assert sorted(node.name for node in graph.nodes) == ["agents", "llm", "planning", "rag", "retrieval"]
+    assert [(edge.src, edge.dst) for edge in graph.edges] == [
+        ("llm", "rag"), ("llm", "agents"), ("rag", "retrieval"), ("agents", "planning")
+    ]
+    assert es.msearch_calls == [1, 2]
+    # One mget finding no neighbor lists, then one _msearch
+    assert [(level.level, level.frontier, level.es_calls) for level in graph.levels] == [(1, 1, 2), (2, 2, 2)]
+
+
+@pytest.mark.asyncio
+async def test_expand_graph_stops_when_the_frontier_is_empty():
+    es = RelationsElasticsearch()
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    graph = await service.expand_graph(["qubit"], steps=5)
+
+    assert sorted(node.name for node in graph.nodes) == ["photonics", "qubit"]
+    assert len(graph.levels) == 2
+
+
+@pytest.mark.asyncio
+async def test_expand_graph_stops_at_the_budget():
+    es = RelationsElasticsearch()
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    graph = await service.expand_graph(["llm"], steps=5, budget=GraphBudget(["llm"], max_edges=3))
+
+    assert [(edge.src, edge.dst) for edge in graph.edges] == [("llm", "rag"), ("llm", "agents"), ("rag", "retrieval")]
+    assert graph.truncated_by == "max_edges"
+    assert es.msearch_calls == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_expand_graph_returns_the_levels_done_before_the_deadline():
+    es = RelationsElasticsearch(delay=0.05)
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    graph = await service.expand_graph(["llm"], steps=2, budget=GraphBudget(["llm"], timeout_ms=20))
+
+    assert [node.name for node in graph.nodes] == ["llm"]
+    assert graph.edges == []
+    assert graph.truncated_by == "deadline"
+
+
+@pytest.mark.asyncio
+async def test_expand_graph_keeps_the_relations_found_before_the_deadline():
+    # llm is answered from its neighbor list, retrieval needs the slow search
+    lists = materialized_lists(cap=10)
+    es = RelationsElasticsearch(delay=0.05, neighbor_lists={"llm": lists["llm"]})
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    graph = await service.expand_graph(["llm", "retrieval"], steps=1, budget=GraphBudget(["llm", "retrieval"], timeout_ms=20))
+
+    assert [(edge.src, edge.dst) for edge in graph.edges] == [("llm", "rag"), ("agents", "llm")]
+    assert graph.truncated_by == "deadline"
+
+
+@pytest.mark.asyncio
+async def test_delta_expansion_returns_only_what_the_client_lacks():
+    es = RelationsElasticsearch()
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+    known = ["llm", "rag", "agents"]
+
+    graph = await service.expand_graph(["rag"], steps=1, budget=GraphBudget(["rag"], known_nodes=known))
+
+    assert [node.name for node in graph.nodes] == ["retrieval"]
+    assert [(edge.src, edge.dst) for edge in graph.edges] == [("llm", "rag"), ("rag", "retrieval")]
+    assert es.msearch_calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_graph_nodes_carry_their_paper_counts():
+    es = RelationsElasticsearch()
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    graph = await service.expand_graph(["llm"], steps=1)
+
+    assert [(node.name, node.paper_count) for node in graph.nodes] == [("llm", 12), ("rag", 10), ("agents", 8)]
+    assert graph.nodes[0].paper_cnt_by_year[0].cnt == 12
+    # One mget for the counts of the whole graph
+    assert es.mget_calls[-1] == (settings.es_hashtag_counts_index, 3)
+
+
+def materialized_lists(cap):
+    tags = sorted({tag for src, dst, _ in RELATIONS for tag in (src, dst)})
+    tag_ids = {tag: i for i, tag in enumerate(tags)}
+    return {
+        tag: {"neighbors": [{"name": name, "weight": weight} for name, weight in neighbors], "floor": floor}
+        for tag, neighbors, floor in build_neighbor_lists(
+            tags,
+            np.array([tag_ids[src] for src, _, _ in RELATIONS], dtype=np.int32),
+            np.array([tag_ids[dst] for _, dst, _ in RELATIONS], dtype=np.int32),
+            np.array([cnt for _, _, cnt in RELATIONS], dtype=np.int64),
+            cap=cap
+        )
+    }
+
+
+@pytest.mark.asyncio
+async def test_expand_graph_reads_neighbor_lists_instead_of_searching():
+    es = RelationsElasticsearch(neighbor_lists=materialized_lists(cap=10))
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    graph = await service.expand_graph(["llm"], steps=2)
+
+    assert [(edge.src, edge.dst, edge.total_cnt) for edge in graph.edges] == [
+        ("llm", "rag", 9), ("agents", "llm", 7), ("rag", "retrieval", 5), ("agents", "planning", 4)
+    ]
+    assert es.msearch_calls == []
+    assert [level.es_calls for level in graph.levels] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_truncated_neighbor_lists_fall_back_to_search():
+    # With one entry per list, the next relation of llm may be as heavy as the first one shown
+    es = RelationsElasticsearch(neighbor_lists=materialized_lists(cap=1))
+    service = HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    assert [(n.name, n.weight) for n in await service.top_neighbors("llm", size=1)] == [("rag", 9)]
+    assert es.msearch_calls == []
+
+    graph = await service.expand_graph(["llm"], steps=1)
+
+    assert [(edge.src, edge.dst) for edge in graph.edges] == [("llm", "rag"), ("llm", "agents")]
+    assert es.msearch_calls == [1]
@@ -0,0 +1,65 @@
+from models import HashtagEdge
+from utils.hashtag_graph_budget import GraphBudget
+
+
+def candidate(src, dst, weight):
+    return (weight, src, dst, (src, dst, weight))
+
+
+def make_edge(payload):
+    src, dst, weight = payload
+    return HashtagEdge(src=src, dst=dst, weight=weight, total_cnt=weight, cnt_by_year={})
+
+
+def test_edges_are_taken_by_weight_across_the_frontier():
+    budget = GraphBudget(["a", "b"], max_edges=2)
+
+    frontier = budget.take_level(
+        [candidate("a", "x", 1), candidate("a", "y", 2), candidate("b", "z", 9)],
+        make_edge
+    )
+
+    assert [(edge.src, edge.dst) for edge in budget.edges] == [("b", "z"), ("a", "y")]
+    assert frontier == ["z", "y"]
+    assert budget.graph().truncated_by == "max_edges"
+
+
+def test_node_budget_still_takes_edges_between_known_tags():
+    budget = GraphBudget(["a", "b"], max_nodes=3)
+
+    budget.take_level(
+        [candidate("a", "x", 5), candidate("a", "y", 4), candidate("a", "b", 1)],
+        make_edge
+    )
+
+    graph = budget.graph()
+    assert [node.name for node in graph.nodes] == ["a", "b", "x"]
+    assert [(edge.src, edge.dst) for edge in graph.edges] == [("a", "x"), ("a", "b")]
+    assert graph.truncated_by == "max_nodes"
+
+
+def test_fanout_caps_the_new_tags_of_a_level():
+    budget = GraphBudget(["a"], max_fanout=1)
+
+    frontier = budget.take_level([candidate("a", "x", 5), candidate("a", "y", 4)], make_edge)
+
+    assert frontier == ["x"]
+    assert budget.graph().truncated_by == "max_fanout"
+
+
+def test_expired_budget_reports_the_deadline():
+    budget = GraphBudget(["a"], timeout_ms=0)
+
+    assert budget.expired()
+    assert budget.graph().truncated_by == "deadline"
+    assert [node.name for node in budget.graph().nodes] == ["a"]
+
+
+def test_known_nodes_are_neither_returned_nor_expanded():
+    budget = GraphBudget(["a"], known_nodes=["a", "b"])
+
+    frontier = budget.take_level([candidate("a", "b", 5), candidate("a", "x", 4)], make_edge)
+
+    assert frontier == ["x"]
+    assert [node.name for node in budget.graph().nodes] == ["x"]
+    assert [(edge.src, edge.dst) for edge in budget.edges] == [("a", "b"), ("a", "x")]
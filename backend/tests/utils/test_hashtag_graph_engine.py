@@ -0,0 +1,237 @@
+import asyncio
+import pytest
+from core.config import settings
+from utils.hashtag_graph import HashtagGraphEngine
+from utils.hashtag_graph_budget import GraphBudget
+from utils.hashtag_relations_update import update_hashtag_relations
+
+
+RELATIONS = {
+    ("llm", "rag"): {"2023": 5, "2024": 4},
+    ("agents", "llm"): {"2024": 7},
+    ("agents", "planning"): {"2022": 4},
+    ("rag", "retrieval"): {"2021": 2, "2022": 3},
+    ("bm25", "retrieval"): {"2020": 3},
+    ("photonics", "qubit"): {"2019": 2}
+}
+
+
+class RelationsPitElasticsearch:
+    # Serves the relations and hashtag counts indices through the point-in-time API, in one page each
+    def __init__(self, relations, measures=None, paper_counts=None):
+        self.relations = relations
+        self.measures = measures or {}
+        self.paper_counts = paper_counts or {}
+
+    async def open_point_in_time(self, index, keep_alive):
+        return {"id": index}
+
+    async def close_point_in_time(self, id):
+        return {}
+
+    async def search(self, pit, query, sort, search_after, source, size):
+        if search_after is not None:
+            return {"hits": {"hits": []}}
+        if pit["id"] == settings.es_hashtag_counts_index:
+            return {"hits": {"hits": [
+                {"_id": tag, "_source": {"paper_count": sum(cnt_by_year.values()), "paper_cnt_by_year": [
+                    {"year": int(year), "cnt": cnt} for year, cnt in sorted(cnt_by_year.items())
+                ]}, "sort": [n]}
+                for n, (tag, cnt_by_year) in enumerate(self.paper_counts.items())
+            ]}}
+        return {"hits": {"hits": [
+            {"_source": {"src": src, "dst": dst, "paper_cnt_by_year": cnt_by_year, **self.measures.get((src, dst), {})}, "sort": [n]}
+            for n, ((src, dst), cnt_by_year) in enumerate(self.relations.items())
+        ]}}
+
+
+async def load_engine(relations=RELATIONS, max_overlay_edges=1000, measures=None, paper_counts=None):
+    engine = HashtagGraphEngine(max_overlay_edges=max_overlay_edges)
+    await engine.load(RelationsPitElasticsearch(relations, measures, paper_counts))
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_load_builds_weight_sorted_adjacency():
+    engine = await load_engine()
+
+    assert engine.edge_count == 6
+    assert engine.top_neighbors("llm", 10) == [("rag", 9), ("agents", 7)]
+    assert engine.top_neighbors("retrieval", 1) == [("rag", 5)]
+    assert engine.top_neighbors("unknown", 10) == []
+
+
+@pytest.mark.asyncio
+async def test_expand_matches_the_index_traversal():
+    engine = await load_engine()
+
+    graph = engine.expand(["llm"], steps=2, size=10)
+
+    assert sorted(node.name for node in graph.nodes) == ["agents", "llm", "planning", "rag", "retrieval"]
+    assert [(edge.src, edge.dst, edge.total_cnt) for edge in graph.edges] == [
+        ("llm", "rag", 9), ("agents", "llm", 7), ("rag", "retrieval", 5), ("agents", "planning", 4)
+    ]
+    assert graph.edges[0].cnt_by_year == {"2023": 5, "2024": 4}
+    assert [level.es_calls for level in graph.levels] == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_year_window_reranks_neighbors_by_counts_inside_it():
+    engine = await load_engine()
+    engine.apply_deltas({("agents", "llm"): {"2022": 2}})
+
+    assert engine.top_neighbors("llm", 10, year_from=2024) == [("agents", 7), ("rag", 4)]
+    assert engine.top_neighbors("llm", 10, year_to=2023) == [("rag", 5), ("agents", 2)]
+    assert engine.top_neighbors("llm", 10, year_from=2025) == []
+
+    graph = engine.expand(["rag"], steps=1, size=10, year_from=2022, year_to=2023)
+    assert [(edge.src, edge.dst, edge.total_cnt, edge.cnt_by_year) for edge in graph.edges] == [
+        ("llm", "rag", 5, {"2023": 5}), ("rag", "retrieval", 3, {"2022": 3})
+    ]
+
+
+@pytest.mark.asyncio
+async def test_association_weighting_ranks_by_the_stored_measures():
+    engine = await load_engine(measures={
+        ("llm", "rag"): {"npmi": 0.2},
+        ("agents", "llm"): {"npmi": 0.6},
+        ("agents", "planning"): {"npmi": 0.9}
+    })
+    # A relation first seen in the overlay has no measure until the next load
+    engine.apply_deltas({("llm", "transformers"): {"2025": 1}})
+
+    assert engine.top_neighbors("llm", 10, weighting="npmi") == [("agents", pytest.approx(0.6)), ("rag", pytest.approx(0.2))]
+    assert engine.top_neighbors("rag", 10, weighting="npmi") == [("llm", pytest.approx(0.2))]
+
+    graph = engine.expand(["llm"], steps=2, size=10, weighting="npmi")
+    assert [(edge.src, edge.dst, edge.total_cnt) for edge in graph.edges] == [
+        ("agents", "llm", 7), ("llm", "rag", 9), ("agents", "planning", 4)
+    ]
+    assert graph.edges[2].weight == pytest.approx(0.9)
+
+    await engine.compact()
+    assert engine.top_neighbors("llm", 10, weighting="npmi") == [("agents", pytest.approx(0.6)), ("rag", pytest.approx(0.2))]
+    with pytest.raises(ValueError):
+        engine.top_neighbors("llm", 10, year_from=2024, weighting="npmi")
+
+
+@pytest.mark.asyncio
+async def test_expand_keeps_the_heaviest_edges_within_the_budget():
+    engine = await load_engine()
+
+    graph = engine.expand(["llm", "retrieval"], steps=2, size=10, budget=GraphBudget(["llm", "retrieval"], max_nodes=4))
+
+    assert [(edge.src, edge.dst, edge.total_cnt) for edge in graph.edges] == [
+        ("llm", "rag", 9), ("agents", "llm", 7), ("rag", "retrieval", 5)
+    ]
+    assert [node.name for node in graph.nodes] == ["llm", "retrieval", "rag", "agents"]
+    assert graph.truncated_by == "max_nodes"
+
+
+@pytest.mark.asyncio
+async def test_k_hop_walks_every_relation():
+    engine = await load_engine()
+
+    assert engine.k_hop(["bm25"], hops=3) == {"bm25": 0, "retrieval": 1, "rag": 2, "llm": 3}
+
+
+@pytest.mark.asyncio
+async def test_deltas_are_served_from_the_overlay_and_survive_compaction():
+    engine = await load_engine()
+
+    engine.apply_deltas({
+        ("agents", "llm"): {"2024": 3},
+        ("llm", "rag"): {"2023": -5, "2024": -4},
+        ("llm", "transformers"): {"2025": 1}
+    })
+    overlay = (engine.top_neighbors("llm", 10), engine.expand(["llm"], steps=1, size=10).edges)
+
+    await engine.compact()
+
+    assert overlay[0] == [("agents", 10), ("transformers", 1)]
+    assert engine.top_neighbors("llm", 10) == overlay[0]
+    assert engine.expand(["llm"], steps=1, size=10).edges == overlay[1]
+    assert engine.edge_count == 6
+
+
+@pytest.mark.asyncio
+async def test_overlay_is_compacted_at_its_limit_and_tags_can_be_removed():
+    engine = await load_engine(max_overlay_edges=2)
+
+    engine.apply_deltas({("a", "b"): {"2024": 1}, ("b", "c"): {"2024": 2}})
+    assert engine.top_neighbors("b", 10) == [("c", 2), ("a", 1)]
+    await engine._compaction
+    assert engine.edge_count == 8
+    assert engine.top_neighbors("b", 10) == [("c", 2), ("a", 1)]
+
+    engine.remove_tag("rag")
+    await engine.compact()
+    assert engine.top_neighbors("llm", 10) == [("agents", 7)]
+    assert engine.k_hop(["retrieval"], hops=5) == {"retrieval": 0, "bm25": 1}
+
+
+class BulkElasticsearch:
+    async def bulk(self, operations):
+        items = []
+        for action in operations[::2]:
+            if action["update"]["_index"] == settings.es_hashtag_counts_index:
+                items.append({"update": {"status": 200}})
+            elif action["update"]["_id"] == "bad__pair":
+                items.append({"update": {"status": 400, "error": {"reason": "rejected"}}})
+            else:
+                items.append({"update": {"status": 200}})
+        return {"errors": True, "items": items}
+
+
+@pytest.mark.asyncio
+async def test_update_hashtag_relations_applies_written_deltas_to_the_graph():
+    engine = await load_engine()
+
+    await update_hashtag_relations(
+        BulkElasticsearch(),
+        {("llm", "rag"): {"2024": 1}, ("bad", "pair"): {"2024": 1}},
+        graph=engine,
+        tag_deltas={"llm": {"2024": 1}, "rag": {"2024": 1}}
+    )
+
+    assert engine.top_neighbors("llm", 1) == [("rag", 10)]
+    assert engine.top_neighbors("bad", 10) == []
+    assert engine.node("llm").paper_count == 1
+
+
+@pytest.mark.asyncio
+async def test_nodes_carry_paper_counts_kept_current_by_tag_deltas():
+    engine = await load_engine(paper_counts={"llm": {"2023": 5, "2024": 11}, "rag": {"2023": 9}})
+    engine.apply_tag_deltas({"llm": {"2024": -1, "2025": 2}, "rag": {"2023": -9}})
+
+    graph = engine.expand(["llm"], steps=1, size=10)
+
+    llm = graph.nodes[0]
+    assert (llm.name, llm.paper_count) == ("llm", 17)
+    assert [(entry.year, entry.cnt) for entry in llm.paper_cnt_by_year] == [(2023, 5), (2024, 10), (2025, 2)]
+    assert [(node.name, node.paper_count) for node in graph.nodes[1:]] == [("rag", 0), ("agents", 0)]
+    assert "rag" not in engine.paper_counts
+
+
+@pytest.mark.asyncio
+async def test_tag_deltas_applied_during_a_load_are_kept():
+    engine = HashtagGraphEngine()
+    load = asyncio.create_task(engine.load(RelationsPitElasticsearch(RELATIONS, paper_counts={"llm": {"2024": 3}})))
+    await asyncio.sleep(0)
+    engine.apply_tag_deltas({"llm": {"2024": 1}})
+    await load
+
+    assert engine.node("llm").paper_count == 4
+
+
+@pytest.mark.asyncio
+async def test_deltas_applied_during_compaction_are_kept():
+    engine = await load_engine()
+    engine.apply_deltas({("llm", "transformers"): {"2025": 1}})
+
+    compaction = asyncio.create_task(engine.compact())
+    await asyncio.sleep(0)
+    engine.apply_deltas({("llm", "transformers"): {"2025": 20}})
+    await compaction
+
+    assert engine.top_neighbors("llm", 1) == [("transformers", 21)]
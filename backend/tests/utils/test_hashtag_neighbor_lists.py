@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from core.config import settings
+from utils.hashtag_association_refresh import AssociationWeightRefresher
+from utils.hashtag_neighbor_lists import build_neighbor_lists, top_of_neighbor_list
+from utils.hashtag_relations_update import update_hashtag_relations
+
+
+def neighbor_doc(weights, floor=0):
+    return {"neighbors": [{"name": f"t{i}", "weight": weight} for i, weight in enumerate(weights)], "floor": floor}
+
+
+def test_build_neighbor_lists_keeps_the_heaviest_and_records_the_floor():
+    tags = ["a", "b", "c", "d"]
+    lists = {
+        tag: (neighbors, floor)
+        for tag, neighbors, floor in build_neighbor_lists(
+            tags,
+            np.array([0, 0, 0, 1], dtype=np.int32),
+            np.array([1, 2, 3, 2], dtype=np.int32),
+            np.array([5, 2, 7, 2], dtype=np.int64),
+            cap=2
+        )
+    }
+
+    assert lists["a"] == ([("d", 7), ("b", 5)], 2)
+    assert lists["b"] == ([("a", 5), ("c", 2)], 0)
+    assert lists["d"] == ([("a", 7)], 0)
+
+
+def test_list_is_only_used_when_nothing_left_out_can_outrank_it():
+    assert top_of_neighbor_list(neighbor_doc([9, 5, 3], floor=2), 2) == [("t0", 9), ("t1", 5)]
+    assert top_of_neighbor_list(neighbor_doc([9, 5, 3], floor=3), 3) is None
+    assert top_of_neighbor_list(neighbor_doc([9, 5]), 10) == [("t0", 9), ("t1", 5)]
+    assert top_of_neighbor_list(neighbor_doc([9, 5], floor=1), 10) is None
+
+
+class RelationsBulkElasticsearch:
+    # Relation updates return the new total, neighbor list updates are recorded
+    def __init__(self):
+        self.neighbor_updates = {}
+        self.weight_updates = {}
+
+    async def bulk(self, operations):
+        items = []
+        for action, body in zip(operations[::2], operations[1::2]):
+            if action["update"]["_index"] == settings.es_hashtag_neighbors_index:
+                self.neighbor_updates[action["update"]["_id"]] = body["script"]["params"]["weights"]
+                items.append({"update": {"status": 200, "result": "updated"}})
+            elif "doc" in body:
+                self.weight_updates[action["update"]["_id"]] = body["doc"]
+                items.append({"update": {"status": 200, "result": "updated"}})
+            elif action["update"]["_id"] == "a__c":
+                items.append({"update": {"status": 200, "result": "deleted"}})
+            else:
+                items.append({"update": {"status": 200, "result": "updated", "get": {"_source": {"paper_cnt_total": 4}}}})
+        return {"errors": False, "items": items}
+
+
+@pytest.mark.asyncio
+async def test_relation_updates_refresh_the_lists_of_both_tags():
+    es = RelationsBulkElasticsearch()
+    refresher = AssociationWeightRefresher()
+
+    await update_hashtag_relations(
+        es,
+        {("a", "b"): {"2024": 1}, ("a", "c"): {"2024": -1}},
+        weight_refresher=refresher
+    )
+
+    assert es.neighbor_updates == {"a": {"b": 4, "c": 0}, "b": {"a": 4}, "c": {"a": 0}}
+    # Association weights are left to the background refresh
+    assert es.weight_updates == {}
+    assert refresher.stale
@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+from services.hashtag_service import HashtagService
+from utils.hashtag_vocabulary import HashtagVocabulary
+from utils.search_cache import SearchResultCache
+
+
+class VectorElasticsearch:
+    # Scores every doc by cosine similarity for both the knn option and script_score
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.calls = []
+
+    async def mget(self, index, ids, source):
+        return {"docs": [
+            {"_id": i, "found": i in self.embeddings, "_source": {"embedding": self.embeddings.get(i)}}
+            for i in ids
+        ]}
+
+    async def search(self, index, size, source, query=None, knn=None):
+        self.calls.append({"query": query, "knn": knn, "size": size})
+
+        if "function_score" in str(query):
+            hits = [{"_id": i, "_source": {"embedding": e}} for i, e in self.embeddings.items()]
+            return {"hits": {"hits": hits[:size]}}
+
+        if knn is not None:
+            vector = knn["query_vector"]
+            excluded = knn["filter"]["bool"]["must_not"][0]["terms"]["_id"]
+            size = knn["k"]
+        else:
+            vector = query["script_score"]["script"]["params"]["query_vector"]
+            excluded = query["script_score"]["query"]["bool"]["must_not"][0]["terms"]["_id"]
+
+        def cosine(embedding):
+            return np.dot(vector, embedding) / (np.linalg.norm(vector) * np.linalg.norm(embedding))
+
+        ranked = sorted(
+            (i for i in self.embeddings if i not in excluded),
+            key=lambda i: -cosine(self.embeddings[i])
+        )
+        return {"hits": {"hits": [{"_id": i, "_source": {"name": i, "description": i}} for i in ranked[:size]]}}
+
+
+EMBEDDINGS = {
+    "llm": [1.0, 0.0, 0.0],
+    "transformer": [0.9, 0.1, 0.0],
+    "attention": [0.8, 0.2, 0.1],
+    "qubit": [0.0, 1.0, 0.0],
+    "photonics": [0.0, 0.1, 1.0]
+}
+
+
+def build_service(es):
+    return HashtagService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+
+@pytest.mark.asyncio
+async def test_knn_mode_uses_knn_option_and_excludes_selected_tags():
+    es = VectorElasticsearch(EMBEDDINGS)
+    service = build_service(es)
+
+    recommended = await service.recommend_related_hashtags(["llm"], size=2, mode="knn", num_candidates=1)
+
+    assert [tag.name for tag in recommended] == ["transformer", "attention"]
+    knn = es.calls[-1]["knn"]
+    assert es.calls[-1]["query"] is None
+    assert knn["field"] == "embedding" and knn["k"] == 2
+    assert knn["num_candidates"] == 2  # never fewer candidates than results
+    assert knn["filter"]["bool"]["must_not"] == [{"terms": {"_id": ["llm"]}}]
+
+
+@pytest.mark.asyncio
+async def test_exact_mode_matches_knn_ranking():
+    es = VectorElasticsearch(EMBEDDINGS)
+    service = build_service(es)
+
+    exact = await service.recommend_related_hashtags(["qubit", "photonics"], size=3, mode="exact")
+    knn = await service.recommend_related_hashtags(["qubit", "photonics"], size=3, mode="knn")
+
+    assert "script_score" in es.calls[0]["query"]
+    assert [tag.name for tag in exact] == [tag.name for tag in knn]
+
+
+@pytest.mark.asyncio
+async def test_recommend_without_known_embeddings_or_with_unknown_mode():
+    service = build_service(VectorElasticsearch(EMBEDDINGS))
+
+    assert await service.recommend_related_hashtags(["missing"]) == []
+    with pytest.raises(ValueError):
+        await service.recommend_related_hashtags(["llm"], mode="hnsw")
+
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_recall_and_latencies():
+    service = build_service(VectorElasticsearch(EMBEDDINGS))
+
+    report = await service.benchmark_recommendations(queries=2, tags_per_query=2, size=2, num_candidates=10)
+
+    assert report.queries == 2
+    assert report.recall == 1.0
+    assert report.num_candidates == 10
+    assert 0 <= report.knn_p50_ms <= report.knn_p95_ms
+    assert 0 <= report.exact_p50_ms <= report.exact_p95_ms
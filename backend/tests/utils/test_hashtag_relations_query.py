@@ -0,0 +1,46 @@
+from utils.hashtag_relations_query import build_neighbors_search, relation_counts, relation_weight
+
+
+RELATION = {
+    "src": "llm",
+    "dst": "rag",
+    "paper_cnt_total": 9,
+    "paper_cnt_by_year": [{"year": 2022, "cnt": 1}, {"year": 2023, "cnt": 5}, {"year": 2024, "cnt": 3}]
+}
+
+
+def test_neighbors_search_without_window_sorts_by_total():
+    body = build_neighbors_search("llm", 10)
+
+    assert body["size"] == 10
+    assert body["sort"] == [{"paper_cnt_total": {"order": "desc"}}]
+    assert "nested" not in str(body["query"])
+
+
+def test_neighbors_search_sorts_by_a_stored_measure():
+    body = build_neighbors_search("llm", 10, weighting="npmi")
+
+    assert body["sort"] == [{"npmi": {"order": "desc"}}]
+    assert {"exists": {"field": "npmi"}} in body["query"]["bool"]["filter"]
+    assert "npmi" in body["_source"]
+
+
+def test_neighbors_search_scores_counts_inside_the_window():
+    body = build_neighbors_search("llm", 5, year_from=2023)
+
+    nested = body["query"]["bool"]["must"][0]["nested"]
+    assert nested["score_mode"] == "sum"
+    assert nested["query"]["function_score"]["query"] == {"range": {"paper_cnt_by_year.year": {"gte": 2023}}}
+    assert body["sort"] == [{"_score": {"order": "desc"}}]
+
+
+def test_relation_counts_filters_years():
+    assert relation_counts(RELATION) == (9, {"2022": 1, "2023": 5, "2024": 3})
+    assert relation_counts(RELATION, year_from=2023, year_to=2023) == (5, {"2023": 5})
+    assert relation_counts(RELATION, year_to=2020) == (0, {})
+
+
+def test_relation_weight_reads_the_stored_measure():
+    assert relation_weight(RELATION, 9) == 9
+    assert relation_weight({**RELATION, "jaccard": 0.5}, 9, "jaccard") == 0.5
+    assert relation_weight(RELATION, 9, "pmi") is None
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+import random
+from models import HashtagAssociationRebuildReport, HashtagNeighborListRebuildReport, HashtagRelationRebuildReport
+from utils import hashtag_relations_rebuild
+from utils.hashtag_relations_rebuild import PairCountAccumulator, count_tag_years, rebuild_relation_indices
+from utils.hashtag_relations_update import build_tag_pairs, aggregate_pair_deltas, aggregate_tag_deltas
+
+
+def sample_papers(n=300, seed=0):
+    rng = random.Random(seed)
+    tags = [f"tag{i}" for i in range(40)]
+    return [(rng.sample(tags, rng.randint(0, 6)), rng.randint(2015, 2025)) for _ in range(n)]
+
+
+def expected_relations(papers):
+    deltas = {}
+    for tags, year in papers:
+        aggregate_pair_deltas(deltas, build_tag_pairs(tags), delta=1, year=year)
+    return deltas
+
+
+def test_accumulator_in_memory():
+    papers = sample_papers()
+    accumulator = PairCountAccumulator(max_entries=1_000_000)
+    for tags, year in papers:
+        accumulator.add(tags, year)
+
+    relations = {(src, dst): cnt_by_year for src, dst, cnt_by_year in accumulator.iter_relations()}
+    assert relations == expected_relations(papers)
+    assert accumulator.runs == []
+
+
+def test_accumulator_spills_and_merges(tmp_path):
+    papers = sample_papers()
+    accumulator = PairCountAccumulator(max_entries=50, spill_dir=str(tmp_path))
+    for tags, year in papers:
+        accumulator.add(tags, year)
+
+    relations = list(accumulator.iter_relations())
+    assert len(accumulator.runs) > 1
+    assert {(src, dst): cnt_by_year for src, dst, cnt_by_year in relations} == expected_relations(papers)
+    assert len(relations) == len({(src, dst) for src, dst, _ in relations})
+
+    accumulator.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_tag_years_match_the_incremental_deltas():
+    papers = sample_papers()
+    tags = sorted({tag for paper_tags, _ in papers for tag in paper_tags})
+    tag_ids = {tag: i for i, tag in enumerate(tags)}
+    expected = {}
+    for paper_tags, year in papers:
+        aggregate_tag_deltas(expected, paper_tags, delta=1, year=year)
+
+    entries = [(tag_ids[tag], year) for paper_tags, year in papers for tag in set(paper_tags)]
+    # A paper without a year counts in no year
+    entries.append((0, -1))
+    counts = count_tag_years(tags, np.array([tag for tag, _ in entries], dtype=np.int32), np.array([year for _, year in entries], dtype=np.int32))
+
+    assert counts == expected
+
+
+class RefreshElasticsearch:
+    def __init__(self, calls):
+        self.indices = self
+        self.calls = calls
+
+    async def refresh(self, index):
+        self.calls.append(("refresh", index))
+
+
+@pytest.mark.asyncio
+async def test_relation_rebuild_also_rebuilds_what_derives_from_relations(monkeypatch):
+    calls = []
+
+    async def relations(es, delete_old, max_entries, spill_dir):
+        calls.append(("relations", delete_old))
+        return HashtagRelationRebuildReport(index="r", papers=1, relations=1, failed=0, spilled_runs=0, took_ms=0)
+
+    async def weights(es):
+        calls.append(("weights",))
+        return HashtagAssociationRebuildReport(papers=1, hashtags=2, relations=1, failed=0, took_ms=0)
+
+    async def lists(es, delete_old):
+        calls.append(("lists", delete_old))
+        return HashtagNeighborListRebuildReport(index="n", relations=1, lists=2, failed=0, took_ms=0)
+
+    monkeypatch.setattr(hashtag_relations_rebuild, "rebuild_hashtag_relations", relations)
+    monkeypatch.setattr(hashtag_relations_rebuild, "rebuild_association_weights", weights)
+    monkeypatch.setattr(hashtag_relations_rebuild, "rebuild_neighbor_lists", lists)
+
+    report = await rebuild_relation_indices(RefreshElasticsearch(calls), delete_old=False)
+
+    assert [call[0] for call in calls] == ["relations", "weights", "refresh", "lists"]
+    assert calls[0] == ("relations", False) and calls[-1] == ("lists", False)
+    assert report.association_weights.relations == 1
+    assert report.neighbor_lists.lists == 2
@@ -0,0 +1,30 @@
+from utils.hashtag_relations_update import (
+    build_tag_pairs,
+    aggregate_pair_deltas,
+    encode_cnt_by_year,
+    decode_cnt_by_year
+)
+
+
+def test_build_tag_pairs_sorted():
+    assert build_tag_pairs(["b", "a", "c"]) == [("a", "b"), ("b", "c"), ("a", "c")]
+
+
+def test_aggregate_pair_deltas_merges_papers():
+    deltas = {}
+    aggregate_pair_deltas(deltas, build_tag_pairs(["a", "b", "c"]), delta=1, year=2023)
+    aggregate_pair_deltas(deltas, build_tag_pairs(["b", "a"]), delta=1, year=2024)
+    aggregate_pair_deltas(deltas, build_tag_pairs(["a", "b"]), delta=-1, year=2023)
+
+    assert deltas[("a", "b")] == {"2023": 0, "2024": 1}
+    assert deltas[("b", "c")] == {"2023": 1}
+    assert deltas[("a", "c")] == {"2023": 1}
+
+
+def test_cnt_by_year_round_trips_through_the_nested_layout():
+    encoded = encode_cnt_by_year({"2024": 2, "2021": 1, "2022": 0})
+
+    assert encoded == [{"year": 2021, "cnt": 1}, {"year": 2024, "cnt": 2}]
+    assert decode_cnt_by_year(encoded) == {"2021": 1, "2024": 2}
+    assert decode_cnt_by_year({"2023": 3}) == {"2023": 3}
+    assert decode_cnt_by_year(None) == {}
@@ -0,0 +1,159 @@
+import pytest
+import numpy as np
+from models import HashtagListItem
+from services.hashtag_service import HashtagService
+from utils.hashtag_graph import HashtagGraphEngine
+from utils.hashtag_vector_index import HashtagVectorIndex
+from utils.hashtag_vocabulary import HashtagVocabulary
+from utils.search_cache import SearchResultCache
+
+
+def item(name):
+    return HashtagListItem(name=name, description=f"about {name}")
+
+
+def build_index(embeddings):
+    index = HashtagVectorIndex(dim=len(next(iter(embeddings.values()))))
+    for hashtag_id, embedding in embeddings.items():
+        index.upsert(hashtag_id, embedding, item(hashtag_id))
+    index.loaded = True
+    return index
+
+
+def brute_force(embeddings, query, size, exclude=()):
+    def cosine(embedding):
+        return np.dot(query, embedding) / (np.linalg.norm(query) * np.linalg.norm(embedding))
+    ranked = sorted((i for i in embeddings if i not in exclude), key=lambda i: -cosine(embeddings[i]))
+    return ranked[:size]
+
+
+RNG = np.random.default_rng(0)
+EMBEDDINGS = {f"tag{i}": RNG.normal(size=16).tolist() for i in range(500)}
+
+
+def test_search_matches_brute_force_and_excludes():
+    index = build_index(EMBEDDINGS)
+    query = RNG.normal(size=16)
+
+    hits = index.search(query / np.linalg.norm(query), 10, exclude=["tag3"])
+
+    assert [hashtag_id for hashtag_id, _ in hits] == brute_force(EMBEDDINGS, query, 10, exclude=["tag3"])
+    scores = [score for _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_batch_search_equals_single_searches():
+    index = build_index(EMBEDDINGS)
+    queries = RNG.normal(size=(4, 16)).astype(np.float32)
+    excludes = [["tag1"], [], ["tag2", "tag9"], ["unknown"]]
+
+    batch = index.search_batch(queries, 5, excludes)
+
+    for query, exclude, hits in zip(queries, excludes, batch):
+        assert [h for h, _ in hits] == [h for h, _ in index.search(query, 5, exclude=exclude)]
+
+
+def test_pool_averages_raw_embeddings():
+    index = build_index({"a": [2.0, 0.0], "b": [0.0, 1.0]})
+
+    pooled = index.pool(["a", "b", "unknown"])
+
+    assert np.allclose(pooled, np.array([1.0, 0.5]) / np.linalg.norm([1.0, 0.5]))
+    assert index.pool(["unknown"]) is None
+
+
+def test_remove_keeps_rows_contiguous_and_size_caps_results():
+    index = build_index({"a": [1.0, 0.0], "b": [0.9, 0.1], "c": [0.0, 1.0]})
+
+    index.remove("a")
+    index.upsert("c", [1.0, 0.0], item("c"))
+
+    assert len(index) == 2 and "a" not in index
+    assert index.rows == {"c": 0, "b": 1}
+    assert [h for h, _ in index.search(np.array([1.0, 0.0]), 10)] == ["c", "b"]
+    assert index.search(np.array([1.0, 0.0]), 10, exclude=["b", "c"]) == []
+
+
+class PitElasticsearch:
+    # Serves the hashtag index through the point-in-time API, with a write in the middle of the load
+    def __init__(self, embeddings, on_search=None):
+        self.embeddings = embeddings
+        self.on_search = on_search
+
+    async def open_point_in_time(self, index, keep_alive):
+        return {"id": "pit"}
+
+    async def close_point_in_time(self, id):
+        return {}
+
+    async def search(self, pit, sort, size, source, search_after=None, query=None):
+        if search_after is not None:
+            return {"pit_id": "pit", "hits": {"hits": []}}
+        if self.on_search:
+            self.on_search()
+        hits = [
+            {"_id": i, "_source": {"name": i, "description": i, "embedding": e}, "sort": [n]}
+            for n, (i, e) in enumerate(self.embeddings.items())
+        ]
+        return {"pit_id": "pit", "hits": {"hits": hits}}
+
+
+@pytest.mark.asyncio
+async def test_load_replays_writes_made_during_the_load():
+    index = HashtagVectorIndex(dim=2)
+    es = PitElasticsearch(
+        {"a": [1.0, 0.0], "b": [0.0, 1.0]},
+        on_search=lambda: (index.upsert("c", [1.0, 1.0], item("c")), index.remove("b"))
+    )
+
+    await index.load(es)
+
+    assert index.loaded
+    assert sorted(index.rows) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_clear_during_a_load_drops_the_snapshot():
+    index = HashtagVectorIndex(dim=2)
+    es = PitElasticsearch(
+        {"a": [1.0, 0.0], "b": [0.0, 1.0]},
+        on_search=lambda: (index.clear(), index.upsert("c", [1.0, 1.0], item("c")))
+    )
+
+    await index.load(es)
+
+    assert sorted(index.rows) == ["c"]
+
+
+def loaded_graph_engine():
+    # Paper counts come from the engine rather than from Elasticsearch
+    engine = HashtagGraphEngine()
+    engine.loaded = True
+    return engine
+
+
+class UnreachableElasticsearch:
+    async def search(self, **kwargs):
+        raise AssertionError("memory mode must not query Elasticsearch")
+
+    async def mget(self, **kwargs):
+        raise AssertionError("memory mode must not query Elasticsearch")
+
+
+@pytest.mark.asyncio
+async def test_memory_mode_recommends_without_elasticsearch():
+    index = build_index(EMBEDDINGS)
+    service = HashtagService(
+        UnreachableElasticsearch(),
+        vocabulary=HashtagVocabulary(),
+        search_cache=SearchResultCache(),
+        vector_index=index,
+        graph_engine=loaded_graph_engine()
+    )
+
+    recommended = await service.recommend_related_hashtags(["tag0", "tag1"], size=3, mode="memory")
+    batch = await service.recommend_batch([["tag0", "tag1"], ["unknown"]], size=3)
+
+    pooled = np.mean([EMBEDDINGS["tag0"], EMBEDDINGS["tag1"]], axis=0)
+    assert [tag.name for tag in recommended] == brute_force(EMBEDDINGS, pooled, 3, exclude=["tag0", "tag1"])
+    assert batch == [recommended, []]
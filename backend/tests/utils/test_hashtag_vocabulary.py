@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from utils.hashtag_vocabulary import HashtagVocabulary
+
+
+class UnreachableElasticsearch:
+    async def mget(self, **kwargs):
+        raise AssertionError("trusted vocabulary must not query Elasticsearch")
+
+
+class SlowHashtagsElasticsearch:
+    # Serves a snapshot of the hashtags index through the point-in-time API, pausing before the page
+    def __init__(self, ids):
+        self.ids = ids
+        self.searching = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def open_point_in_time(self, index, keep_alive):
+        return {"id": "pit"}
+
+    async def close_point_in_time(self, id):
+        return {}
+
+    async def search(self, pit, query, sort, search_after, source, size):
+        if search_after is not None:
+            return {"hits": {"hits": []}}
+        self.searching.set()
+        await self.resume.wait()
+        return {"hits": {"hits": [{"_id": hashtag_id, "sort": [n]} for n, hashtag_id in enumerate(self.ids)]}}
+
+
+@pytest.mark.asyncio
+async def test_trust_mode_answers_from_memory():
+    vocabulary = HashtagVocabulary(mode="trust")
+    vocabulary.loaded = True
+    vocabulary.add("llm")
+    vocabulary.add("rag")
+
+    missing = await vocabulary.find_missing(UnreachableElasticsearch(), ["llm", "rag", "agents"])
+    assert missing == {"agents"}
+
+    vocabulary.discard("rag")
+    assert "rag" not in vocabulary
+    assert len(vocabulary) == 1
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        HashtagVocabulary(mode="sometimes")
+
+
+@pytest.mark.asyncio
+async def test_changes_made_during_a_load_are_kept():
+    vocabulary = HashtagVocabulary(mode="trust")
+    vocabulary.add("stale")
+    es = SlowHashtagsElasticsearch(["llm", "rag", "stale"])
+
+    load = asyncio.create_task(vocabulary.load(es))
+    await es.searching.wait()
+    # Created and deleted by this worker after the snapshot was taken
+    vocabulary.add("agents")
+    vocabulary.discard("stale")
+    es.resume.set()
+    await load
+
+    assert vocabulary.ids == {"llm", "rag", "agents"}
+    assert await vocabulary.find_missing(UnreachableElasticsearch(), ["agents", "stale"]) == {"stale"}
+
+
+@pytest.mark.asyncio
+async def test_clear_during_a_load_drops_the_snapshot():
+    vocabulary = HashtagVocabulary(mode="trust")
+    es = SlowHashtagsElasticsearch(["llm", "rag"])
+
+    load = asyncio.create_task(vocabulary.load(es))
+    await es.searching.wait()
+    # Every hashtag deleted, then one created again, after the snapshot was taken
+    vocabulary.clear()
+    vocabulary.add("agents")
+    es.resume.set()
+    await load
+
+    assert vocabulary.ids == {"agents"}
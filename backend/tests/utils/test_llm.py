@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from utils.llm import LLMClient, LLMProvider, LocalProvider
+
+
+class SlowProvider(LLMProvider):
+    def __init__(self, delay=0.05, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def complete(self, prompt, model, **params):
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            if self.failures:
+                self.failures -= 1
+                await asyncio.sleep(1)
+            await asyncio.sleep(self.delay)
+            return prompt.upper()
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced():
+    provider = SlowProvider()
+    client = LLMClient(provider, max_concurrency=4)
+
+    results = await asyncio.gather(*(client.complete("same", model="m") for _ in range(5)))
+
+    assert results == ["SAME"] * 5
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    provider = SlowProvider()
+    client = LLMClient(provider, max_concurrency=2)
+
+    await asyncio.gather(*(client.complete(f"prompt {i}", model="m") for i in range(6)))
+
+    assert provider.calls == 6
+    assert provider.max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_retried():
+    provider = SlowProvider(delay=0, failures=2)
+    client = LLMClient(provider, timeout=0.05, max_retries=2, retry_backoff=0)
+
+    assert await client.complete("retry", model="m") == "RETRY"
+    assert provider.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_timeout_raised_after_retries():
+    provider = SlowProvider(delay=0, failures=5)
+    client = LLMClient(provider, timeout=0.05, max_retries=1, retry_backoff=0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.complete("fail", model="m")
+
+
+@pytest.mark.asyncio
+async def test_local_provider_is_deterministic():
+    client = LLMClient(LocalProvider())
+
+    first = await client.embed(["quantum computing"], model="m", dimensions=8)
+    second = await client.embed(["quantum computing"], model="m", dimensions=8)
+
+    assert first == second
+    assert len(first[0]) == 8
+    assert await client.complete("a", model="m") == await client.complete("a", model="m")
@@ -0,0 +1,75 @@
+import pytest
+from utils.llm import LLMClient, LocalProvider, OpenAIProvider
+from utils.llm_cache import LLMCache, build_request_key
+
+
+class CountingProvider(LocalProvider):
+    def __init__(self):
+        self.embedded = []
+
+    async def embed(self, texts, model, dimensions):
+        self.embedded.extend(texts)
+        return await super().embed(texts, model, dimensions)
+
+
+def test_cache_round_trip_and_stats(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"))
+    key = build_request_key("complete", "local", "m", "prompt", {"temperature": 0.3})
+
+    assert cache.get(key) is None
+    cache.put(key, "answer")
+    assert cache.get(key) == "answer"
+
+    stats = cache.stats()
+    assert (stats.entries, stats.hits, stats.misses) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+
+    # Persisted across processes sharing the file
+    cache.close()
+    assert LLMCache(path=str(tmp_path / "cache.sqlite3")).get(key) == "answer"
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"), max_bytes=100)
+    cache.put("old", "x" * 40)
+    cache.put("new", "y" * 40)
+    cache.get("old")
+    cache.put("newest", "z" * 40)
+
+    assert cache.get("new") is None
+    assert cache.get("old") is not None
+    assert cache.stats().size_bytes <= 100
+
+
+@pytest.mark.asyncio
+async def test_client_only_embeds_uncached_texts(tmp_path):
+    provider = CountingProvider()
+    client = LLMClient(provider, cache=LLMCache(path=str(tmp_path / "cache.sqlite3")))
+
+    first = await client.embed(["a", "b"], model="m", dimensions=4)
+    second = await client.embed(["b", "c", "a"], model="m", dimensions=4)
+
+    assert provider.embedded == ["a", "b", "c"]
+    assert second[0] == first[1] and second[2] == first[0]
+
+
+class StubOpenAIProvider(OpenAIProvider):
+    def __init__(self):
+        self.embedded = []
+
+    async def embed(self, texts, model, dimensions):
+        self.embedded.extend(texts)
+        return [[1.0] * dimensions for _ in texts]
+
+
+@pytest.mark.asyncio
+async def test_providers_with_the_same_model_do_not_share_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    local = LLMClient(LocalProvider(), cache=LLMCache(path=path))
+    await local.embed(["a"], model="m", dimensions=4)
+
+    provider = StubOpenAIProvider()
+    client = LLMClient(provider, cache=LLMCache(path=path))
+
+    assert await client.embed(["a"], model="m", dimensions=4) == [[1.0] * 4]
+    assert provider.embedded == ["a"]
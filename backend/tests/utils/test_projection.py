@@ -0,0 +1,56 @@
+import pytest
+from models import HashtagListItem, PaperListItem
+from services.hashtag_service import HASHTAG_LIST_SOURCE, HashtagService, resolve_hashtag_projection
+from utils.projection import resolve_projection, source_fields
+
+
+def test_source_fields_match_response_model():
+    assert source_fields(HashtagListItem) == ["name", "description", "paper_count", "paper_cnt_by_year"]
+
+
+def test_resolve_projection():
+    assert resolve_projection(PaperListItem, None) is None
+    assert resolve_projection(PaperListItem, []) is None
+    assert resolve_projection(PaperListItem, ["title,year", "title", " hashtags "]) == ["id", "title", "year", "hashtags"]
+
+    with pytest.raises(ValueError, match="embedding"):
+        resolve_projection(PaperListItem, ["title", "embedding"])
+
+
+def test_projected_item_leaves_out_unset_fields():
+    item = PaperListItem(id="p1", title="A", doi=None)
+    assert item.model_dump(exclude_unset=True) == {"id": "p1", "title": "A", "doi": None}
+
+
+def test_hashtag_projection_splits_source_and_paper_count_fields():
+    assert resolve_hashtag_projection(None) == (HASHTAG_LIST_SOURCE, ["paper_count", "paper_cnt_by_year"])
+    assert resolve_hashtag_projection(["description"]) == (["name", "description"], [])
+    assert resolve_hashtag_projection(["paper_count"]) == (["name"], ["paper_count"])
+
+    with pytest.raises(ValueError, match="embedding"):
+        resolve_hashtag_projection(["embedding"])
+
+
+class SearchElasticsearch:
+    # Answers one hashtag search and records its _source includes
+    def __init__(self):
+        self.sources = []
+
+    async def search(self, index, query, size, source):
+        self.sources.append(source)
+        return {"hits": {"hits": [{"_source": {"name": "llm"}}]}}
+
+    async def mget(self, **kwargs):
+        raise AssertionError("no paper counts were requested")
+
+
+@pytest.mark.asyncio
+async def test_hashtag_search_returns_only_the_requested_fields():
+    es = SearchElasticsearch()
+    service = HashtagService(es, vector_index=None)
+
+    items = await service.fuzzy_search_by_name("llm", fields=["name"])
+
+    assert es.sources == [["name"]]
+    assert [item.model_dump(exclude_unset=True) for item in items] == [{"name": "llm"}]
+    assert await service.fuzzy_search_by_name("llm", fields=["embedding"]) == ({"error": "Unknown fields: embedding"}, 400)
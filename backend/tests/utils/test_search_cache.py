@@ -0,0 +1,88 @@
+import pytest
+from models import PaperSearchRequest
+from services.paper_service import PaperService
+from utils.hashtag_vocabulary import HashtagVocabulary
+from utils.search_cache import SearchResultCache, canonical_search_request
+
+
+def test_canonical_search_request():
+    a = PaperSearchRequest(query="  Quantum   Error ", must=["b", "a", "b"], should=["x"], fields=["year,title"])
+    b = PaperSearchRequest(query="quantum error", must=["a", "b"], should=["x"], must_not=[], fields=["title", "year"])
+
+    assert canonical_search_request(a) == canonical_search_request(b)
+    assert canonical_search_request(a).must == ["a", "b"]
+    assert canonical_search_request(PaperSearchRequest(query="  ")).query is None
+    assert canonical_search_request(a) != canonical_search_request(PaperSearchRequest(query="quantum error", size=5))
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("utils.search_cache.time.monotonic", lambda: now[0])
+    cache = SearchResultCache(max_entries=2, ttl=10, write_settle=1)
+
+    cache.put("a", 1, cache.generation)
+    cache.put("b", 2, cache.generation)
+    assert cache.get("a") == 1
+    cache.put("c", 3, cache.generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    now[0] += 10
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.expirations) == (3, 2, 1, 1)
+    assert stats.hit_rate == 0.6
+
+
+def test_writes_invalidate_and_block_stale_puts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("utils.search_cache.time.monotonic", lambda: now[0])
+    cache = SearchResultCache(max_entries=10, ttl=60, write_settle=1)
+    cache.put("a", 1, cache.generation)
+
+    # A search started before the write must not store its result
+    generation = cache.generation
+    cache.invalidate()
+    assert cache.get("a") is None
+    now[0] += 5
+    cache.put("a", "stale", generation)
+    assert cache.get("a") is None
+
+    # Right after a write the index may not be refreshed yet
+    cache.invalidate()
+    cache.put("a", "unrefreshed", cache.generation)
+    assert cache.get("a") is None
+
+    now[0] += 1
+    cache.put("a", 2, cache.generation)
+    assert cache.get("a") == 2
+
+
+class CountingElasticsearch:
+    def __init__(self):
+        self.searches = 0
+
+    async def search(self, index, query, size, source):
+        self.searches += 1
+        return {"hits": {"hits": [{"_source": {"id": "p1", "title": "A"}}]}}
+
+    async def delete_by_query(self, index, body, refresh):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_paper_search_uses_cache_until_a_write():
+    es = CountingElasticsearch()
+    cache = SearchResultCache(max_entries=10, ttl=60, write_settle=0)
+    service = PaperService(es, vocabulary=HashtagVocabulary(), search_cache=cache)
+
+    first = await service.search(PaperSearchRequest(must=["b", "a"]))
+    second = await service.search(PaperSearchRequest(must=["a", "b"]))
+    assert first == second
+    assert es.searches == 1
+
+    await service.delete_all()
+    await service.search(PaperSearchRequest(must=["a", "b"]))
+    assert es.searches == 2
@@ -0,0 +1,53 @@
+import pytest
+from models import PaperFacetRequest, PaperSearchRequest, PaperSearchResponse
+from services.paper_service import PaperService
+from utils.hashtag_vocabulary import HashtagVocabulary
+from utils.search_cache import SearchResultCache
+from utils.search_facets import build_facet_aggs, parse_facet_aggs
+
+
+def test_build_facet_aggs_skips_disabled_facets():
+    aggs = build_facet_aggs(PaperFacetRequest(hashtags=5, authors=0, year_interval=None))
+    assert aggs == {"hashtags": {"terms": {"field": "hashtags", "size": 5}}}
+
+    assert set(build_facet_aggs(PaperFacetRequest())) == {"hashtags", "authors", "years"}
+
+
+def test_parse_facet_aggs():
+    counts = parse_facet_aggs({
+        "hashtags": {"buckets": [{"key": "llm", "doc_count": 7}, {"key": "rag", "doc_count": 3}]},
+        "years": {"buckets": [{"key": 2023.0, "doc_count": 4}]}
+    })
+
+    assert [(bucket.key, bucket.count) for bucket in counts.hashtags] == [("llm", 7), ("rag", 3)]
+    assert counts.authors == []
+    assert [(bucket.year, bucket.count) for bucket in counts.years] == [(2023, 4)]
+
+
+class AggregatingElasticsearch:
+    def __init__(self):
+        self.requests = []
+
+    async def search(self, index, query, size, source, **params):
+        self.requests.append(params)
+        response = {"hits": {"total": {"value": 42}, "hits": [{"_source": {"id": "p1", "title": "A"}}]}}
+        if "aggs" in params:
+            response["aggregations"] = {"hashtags": {"buckets": [{"key": "llm", "doc_count": 42}]}}
+        return response
+
+
+@pytest.mark.asyncio
+async def test_search_returns_facets_in_one_request():
+    es = AggregatingElasticsearch()
+    service = PaperService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache(write_settle=0))
+
+    plain = await service.search(PaperSearchRequest(must=["llm"]))
+    faceted = await service.search(PaperSearchRequest(must=["llm"], facets=PaperFacetRequest(authors=0)))
+
+    assert isinstance(plain, list)
+    assert isinstance(faceted, PaperSearchResponse)
+    assert faceted.total == 42
+    assert faceted.facets.hashtags[0].key == "llm"
+    assert es.requests[0] == {}
+    assert es.requests[1]["track_total_hits"] is True
+    assert set(es.requests[1]["aggs"]) == {"hashtags", "years"}
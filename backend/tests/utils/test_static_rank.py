@@ -0,0 +1,47 @@
+import pytest
+from models import Paper, PaperSearchRequest
+from services.paper_service import PaperService
+from utils.hashtag_vocabulary import HashtagVocabulary
+from utils.static_rank import build_static_rank_query, compute_static_rank
+from utils.search_cache import SearchResultCache
+
+
+def test_compute_static_rank_is_positive_and_grows_with_year():
+    assert compute_static_rank(None) is None
+    assert compute_static_rank(1950, base_year=1990) == 1.0
+    assert compute_static_rank(1990, base_year=1990) == 1.0
+    assert compute_static_rank(2024, base_year=1990) == 35.0
+
+
+def test_static_rank_query_keeps_matching_in_must():
+    inner = {"bool": {"should": [{"terms": {"hashtags": ["llm"]}}]}}
+    query = build_static_rank_query(inner)
+
+    assert query["bool"]["must"] == [inner]
+    assert "rank_feature" in query["bool"]["should"][0]
+
+
+def test_paper_document_carries_static_rank():
+    service = PaperService(es=None, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+    paper = Paper(id="p1", title="A", abstract="a", year=2024)
+
+    assert service.build_paper_document(paper)["static_rank"] == compute_static_rank(2024)
+
+
+class QueryRecordingElasticsearch:
+    query = None
+
+    async def search(self, index, query, size, source):
+        self.query = query
+        return {"hits": {"hits": []}}
+
+
+@pytest.mark.asyncio
+async def test_search_scores_with_rank_feature():
+    es = QueryRecordingElasticsearch()
+    service = PaperService(es, vocabulary=HashtagVocabulary(), search_cache=SearchResultCache())
+
+    await service.search(PaperSearchRequest(query="quantum"))
+
+    assert "function_score" not in str(es.query)
+    assert es.query["bool"]["should"][0]["rank_feature"]["field"] == "static_rank"
@@ -0,0 +1,142 @@
+from utils.handle_json import iter_json_items
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import json
+import os
+import shutil
+import numpy as np
+
+IDS_FILE = "ids.txt"
+VECTORS_FILE = "vectors.bin"
+META_FILE = "meta.json"
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+class EmbeddingStore:
+    """
+    Read side of an on-disk embedding matrix.
+
+    A store is a directory holding:
+    - vectors.bin: the row-major (count, dim) matrix as raw float32 or float16
+    - ids.txt: one id per line, line i labels row i
+    - meta.json: count, dim and dtype
+
+    The matrix is memory-mapped, so opening a store costs the id table only
+    and rows are read from the page cache on first access.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        meta = json.loads((self.path / META_FILE).read_text(encoding="utf-8"))
+        self.dim: int = meta["dim"]
+        self.dtype = np.dtype(meta["dtype"])
+
+        with open(self.path / IDS_FILE, "r", encoding="utf-8") as f:
+            self.ids: List[str] = f.read().split("\n")[:meta["count"]]
+        if len(self.ids) != meta["count"]:
+            raise ValueError(f"{self.path / IDS_FILE} holds {len(self.ids)} ids, expected {meta['count']}")
+
+        if meta["count"]:
+            self.vectors = np.memmap(self.path / VECTORS_FILE, dtype=self.dtype, mode="r", shape=(meta["count"], self.dim))
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=self.dtype)
+        self._rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.rows
+
+    @property
+    def rows(self) -> Dict[str, int]:
+        # Built on first lookup, iterating the store does not need it
+        if self._rows is None:
+            self._rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        return self._rows
+
+    def get(self, item_id: str) -> Optional[np.ndarray]:
+        row = self.rows.get(item_id)
+        return None if row is None else self.vectors[row]
+
+    def take(self, ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        # Returns the found ids and their vectors, in the order asked
+        found = [item_id for item_id in ids if item_id in self.rows]
+        return found, self.vectors[[self.rows[item_id] for item_id in found]]
+
+    def items(self) -> Iterator[Tuple[str, np.ndarray]]:
+        return zip(self.ids, self.vectors)
+
+
+def write_embedding_store(
+    path: Union[str, Path],
+    items: Iterable[Tuple[str, Sequence[float]]],
+    dtype: str = "float32"
+) -> int:
+    """
+    Writes (item_id, vector) pairs into a store at `path`, one row at a time.
+
+    The store is built next to `path` and moved into place when complete, so
+    readers never see a partial store. Returns the number of rows written.
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    count, dim = 0, None
+    with open(tmp_path / IDS_FILE, "w", encoding="utf-8") as ids_file, open(tmp_path / VECTORS_FILE, "wb") as vectors_file:
+        for item_id, vector in items:
+            if "\n" in item_id:
+                raise ValueError(f"Embedding id contains a newline: {item_id!r}")
+
+            vector = np.asarray(vector, dtype=dtype)
+            if dim is None:
+                dim = len(vector)
+            elif vector.shape != (dim,):
+                raise ValueError(f"Embedding of {item_id!r} has shape {vector.shape}, expected ({dim},)")
+
+            ids_file.write(f"{item_id}\n")
+            vectors_file.write(vector.tobytes())
+            count += 1
+
+    (tmp_path / META_FILE).write_text(json.dumps({"count": count, "dim": dim or 0, "dtype": dtype}), encoding="utf-8")
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return count
+
+
+def json_to_embedding_store(json_path: Union[str, Path], store_path: Union[str, Path], dtype: str = "float32") -> int:
+    # Streams a {"tag": [floats]} JSON file, so the JSON is never held in memory
+    return write_embedding_store(store_path, iter_json_items(json_path), dtype=dtype)
+
+
+def embedding_store_to_json(store_path: Union[str, Path], json_path: Union[str, Path]) -> int:
+    store = EmbeddingStore(store_path)
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i, (item_id, vector) in enumerate(store.items()):
+            f.write(",\n" if i else "\n")
+            f.write(f"{json.dumps(item_id, ensure_ascii=False)}: {json.dumps(vector.astype(np.float32).tolist())}")
+        f.write("\n}")
+    return len(store)
+
+
+def read_embedding_ids(path: Union[str, Path]) -> List[str]:
+    if Path(path).is_dir():
+        return EmbeddingStore(path).ids
+    return [item_id for item_id, _ in iter_json_items(path)]
+
+
+def iter_embeddings(path: Union[str, Path]) -> Iterator[Tuple[str, List[float]]]:
+    # Reads either format: a store directory or a JSON object of float lists
+    if Path(path).is_dir():
+        for item_id, vector in EmbeddingStore(path).items():
+            yield item_id, vector.astype(np.float32).tolist()
+    else:
+        yield from iter_json_items(path)
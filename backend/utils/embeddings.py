@@ -1,24 +1,20 @@
 from core.config import settings
+from utils.llm import get_embedding_client
+import numpy as np
 import random
-from typing import List
+from typing import List, Union
 
 def mock_embedding(tag: str, dim: int = settings.hashtag_emb_dim) -> list[float]:
     return [random.uniform(-1, 1) for _ in range(dim)]
 
 
-def generate_hashtag_embeddings(tag: str, dim: int = settings.hashtag_emb_dim) -> list[float]:
-    return mock_embedding(tag, dim)
+async def generate_hashtag_embeddings(tag: str, dim: int = settings.hashtag_emb_dim) -> list[float]:
+    embeddings = await get_embedding_client().embed([tag], model=settings.embedding_model, dimensions=dim)
+    return embeddings[0]
 
 
-def average_embeddings(embeddings: List[List[float]]) -> List[float]:
-    if not embeddings:
+def average_embeddings(embeddings: Union[np.ndarray, List[List[float]]]) -> List[float]:
+    if len(embeddings) == 0:
         return []
 
-    dim = len(embeddings[0])
-    pooled = [0.0] * dim
-
-    for emb in embeddings:
-        for i in range(dim):
-            pooled[i] += emb[i]
-
-    return [x / len(embeddings) for x in pooled]
\ No newline at end of file
+    return np.asarray(embeddings, dtype=np.float64).mean(axis=0).tolist()
\ No newline at end of file
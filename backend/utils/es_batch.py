@@ -0,0 +1,56 @@
+from core.config import settings
+from core.logging import logger
+
+from elasticsearch import AsyncElasticsearch
+from typing import Any, Dict, Iterable, List
+import asyncio
+
+
+async def mget_sources(
+    es: AsyncElasticsearch,
+    index: str,
+    ids: Iterable[str],
+    source: Any = True
+) -> Dict[str, Dict[str, Any]]:
+    # Fetch many documents by id in one round trip per chunk, keyed by id. Missing ids are left out.
+    # `source` is passed through as _source: True, False or a list of fields to include.
+    ids = list(dict.fromkeys(ids))
+    sources = {}
+    chunk_size = settings.es_bulk_chunk_size
+
+    for start in range(0, len(ids), chunk_size):
+        es_resp = await es.mget(index=index, ids=ids[start: start + chunk_size], source=source)
+        for doc in es_resp["docs"]:
+            if doc.get("found"):
+                sources[doc["_id"]] = doc.get("_source", {})
+
+    return sources
+
+
+async def msearch_hits(
+    es: AsyncElasticsearch,
+    index: str,
+    searches: List[Dict[str, Any]],
+    chunk_size: int = settings.es_msearch_chunk_size
+) -> List[List[Dict[str, Any]]]:
+    # Run many search bodies through _msearch, one request per chunk with the chunks in flight together.
+    # Returns the hits of each search in the order given. A failed search is logged and has no hits.
+    async def run(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        operations = []
+        for body in chunk:
+            operations.append({})
+            operations.append(body)
+        es_resp = await es.msearch(index=index, searches=operations)
+        return es_resp["responses"]
+
+    chunks = [searches[start: start + chunk_size] for start in range(0, len(searches), chunk_size)]
+    responses = [response for chunk_responses in await asyncio.gather(*(run(chunk) for chunk in chunks)) for response in chunk_responses]
+
+    results = []
+    for response in responses:
+        if "error" in response:
+            logger.warning(f"Search in _msearch on {index} failed: {response['error']}")
+            results.append([])
+        else:
+            results.append(response["hits"]["hits"])
+    return results
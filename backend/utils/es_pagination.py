@@ -0,0 +1,114 @@
+from core.config import settings
+
+from elasticsearch import AsyncElasticsearch, BadRequestError
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import base64
+import binascii
+import json
+
+
+async def iter_pit_hits(
+    es: AsyncElasticsearch,
+    index: str,
+    query: Optional[Dict[str, Any]] = None,
+    sort: Optional[List[Any]] = None,
+    source: Any = True,
+    page_size: int = settings.es_scan_page_size
+) -> AsyncIterator[Dict[str, Any]]:
+    # Stream every matching hit with point-in-time + search_after, one page in memory at a time
+    keep_alive = settings.es_pit_keep_alive
+    pit = await es.open_point_in_time(index=index, keep_alive=keep_alive)
+    pit_id = pit["id"]
+    search_after = None
+
+    try:
+        while True:
+            es_resp = await es.search(
+                pit={"id": pit_id, "keep_alive": keep_alive},
+                query=query or {"match_all": {}},
+                sort=sort or ["_shard_doc"],
+                search_after=search_after,
+                source=source,
+                size=page_size
+            )
+            pit_id = es_resp.get("pit_id", pit_id)
+            hits = es_resp["hits"]["hits"]
+
+            for hit in hits:
+                yield hit
+
+            if len(hits) < page_size:
+                break
+            search_after = hits[-1]["sort"]
+    finally:
+        await es.close_point_in_time(id=pit_id)
+
+
+def encode_cursor(pit_id: str, search_after: List[Any]) -> str:
+    data = json.dumps({"pit": pit_id, "after": search_after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
+    # Raises ValueError for anything that is not a cursor we issued
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return state["pit"], state["after"]
+    except (binascii.Error, UnicodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def search_page(
+    es: AsyncElasticsearch,
+    index: str,
+    size: int,
+    cursor: Optional[str] = None,
+    query: Optional[Dict[str, Any]] = None,
+    source: Any = True,
+    keep_alive: str = settings.es_cursor_keep_alive,
+    first_keep_alive: str = settings.es_first_page_keep_alive
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Returns one page of hits and the opaque cursor of the next page.
+
+    The first page opens a point in time, and the cursor carries it together
+    with the search_after position, so every page of a listing sees the same
+    snapshot. One hit more than `size` is read to tell whether another page
+    follows, and the point in time is closed once the last page is served,
+    the first one included. Otherwise it lives for `first_keep_alive` after
+    the first page, as most listings stop there, and for `keep_alive` after
+    each later one.
+
+    Raises ValueError for a cursor we did not issue, including one whose
+    point in time Elasticsearch rejects, and NotFoundError for an expired one.
+    """
+    if cursor is None:
+        keep_alive = first_keep_alive
+        pit_id = (await es.open_point_in_time(index=index, keep_alive=keep_alive))["id"]
+        search_after = None
+    else:
+        pit_id, search_after = decode_cursor(cursor)
+
+    try:
+        es_resp = await es.search(
+            pit={"id": pit_id, "keep_alive": keep_alive},
+            query=query or {"match_all": {}},
+            sort=["_shard_doc"],
+            search_after=search_after,
+            source=source,
+            size=size + 1
+        )
+    except BadRequestError as e:
+        # A forged or corrupted point in time id passes decode_cursor but cannot be parsed by Elasticsearch
+        if cursor is None:
+            raise
+        raise ValueError("Invalid cursor") from e
+    pit_id = es_resp.get("pit_id", pit_id)
+    hits = es_resp["hits"]["hits"]
+
+    if len(hits) <= size:
+        await es.options(ignore_status=404).close_point_in_time(id=pit_id)
+        return hits, None
+
+    hits = hits[:size]
+    return hits, encode_cursor(pit_id, hits[-1]["sort"])
@@ -12,4 +12,93 @@ def save_json(data: dict, file_path: str):
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=True)
     
-    print(f"Data successfully saved to {file_path}")
\ No newline at end of file
+    print(f"Data successfully saved to {file_path}")
+
+def iter_json_items(file_path: str, chunk_size: int = 1 << 16):
+    """
+    Streams a JSON file without loading it whole.
+
+    Yields the elements of a top-level array, the (key, value) pairs of a
+    top-level object, or one value per line of a .jsonl file.
+    """
+    if str(file_path).endswith(".jsonl"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            # Returns False once the file is exhausted
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A number cut at the chunk border ("3." of "3.25") still decodes, so make sure it ended
+                    if eof or (end < len(buffer) and buffer[end] not in "0123456789.eE+-"):
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        def expect(char):
+            nonlocal pos
+            skip_whitespace()
+            if pos >= len(buffer) or buffer[pos] != char:
+                raise ValueError(f"Expected '{char}' in {file_path}")
+            pos += 1
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            return
+
+        opening = buffer[pos]
+        if opening not in "[{":
+            raise ValueError(f"{file_path} must hold a JSON array or object")
+        closing = "]" if opening == "[" else "}"
+        pos += 1
+
+        first = True
+        while True:
+            skip_whitespace()
+            if pos < len(buffer) and buffer[pos] == closing:
+                return
+            if not first:
+                expect(",")
+                skip_whitespace()
+            first = False
+
+            if opening == "[":
+                yield decode()
+            else:
+                key = decode()
+                expect(":")
+                skip_whitespace()
+                yield key, decode()
@@ -1,13 +1,12 @@
 from core.config import settings
-import openai
+from core.logging import logger
+from utils.llm import get_llm_client
 
 def placeholder_hashtag_description(tag: str):
     return f"<The description of {tag}>" 
 
 
-def generate_hashtag_description(tag: str):
-    client = openai.OpenAI(api_key=settings.openai_api_key)
-    
+async def generate_hashtag_description(tag: str):
     prompt = f"""
     Describe the following research terms in one short, informative sentence.
 
@@ -21,14 +20,12 @@ def generate_hashtag_description(tag: str):
     Description:"""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
+        return await get_llm_client().complete(
+            prompt,
+            model=settings.hashtag_description_model,
             temperature=0.3,
             max_tokens=50
         )
-        resp_text = response.choices[0].message.content.strip()
-        return resp_text
     except Exception as e:
-        print(f"Error generating for '{tag}': {e}")
+        logger.warning(f"Error generating for '{tag}': {e}")
         return None
\ No newline at end of file
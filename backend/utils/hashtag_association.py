@@ -0,0 +1,129 @@
+from core.config import settings
+from core.logging import logger
+from models import HashtagPaperCounts
+from utils.es_batch import mget_sources
+
+from elasticsearch import AsyncElasticsearch
+from typing import Dict, Iterable, List
+import numpy as np
+
+
+# Association measures stored on every relation next to its paper count
+ASSOCIATION_WEIGHTINGS = ("pmi", "npmi", "jaccard")
+
+
+def association_weights(
+    pair_cnt: np.ndarray,
+    src_cnt: np.ndarray,
+    dst_cnt: np.ndarray,
+    paper_cnt: int
+) -> Dict[str, np.ndarray]:
+    """
+    PMI, NPMI and Jaccard of relations from their paper count, the paper
+    counts of both tags and the number of tagged papers, one array each.
+
+    Tag counts lower than the pair count, as a count not yet updated can
+    be, are raised to it so every measure stays defined.
+    """
+    pair = np.asarray(pair_cnt, dtype=np.float64)
+    src = np.maximum(np.asarray(src_cnt, dtype=np.float64), pair)
+    dst = np.maximum(np.asarray(dst_cnt, dtype=np.float64), pair)
+    total = np.maximum(float(paper_cnt), np.maximum(src, dst))
+
+    pmi = np.log(pair * total / (src * dst))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # A pair found in every paper has p = 1, where NPMI is defined as 1
+        npmi = np.where(pair < total, pmi / -np.log(pair / total), 1.0)
+    jaccard = pair / (src + dst - pair)
+    return {"pmi": pmi, "npmi": npmi, "jaccard": jaccard}
+
+
+def build_tag_count_update(tag: str, cnt_by_year: Dict[str, int]) -> List[Dict]:
+    """
+    Scripted upsert adding per-year paper deltas to the counts of `tag`,
+    merged into its nested counts like relation deltas.
+
+    Counts live in their own small documents of the hashtag_counts index,
+    so a paper write never rewrites a hashtag document and its embedding.
+    A count document whose papers are all gone is deleted.
+    """
+    return [
+        {
+            "update": {
+                "_index": settings.es_hashtag_counts_index,
+                "_id": tag,
+                "retry_on_conflict": settings.es_retry_on_conflict
+            }
+        },
+        {
+            "script": {
+                "source": """
+                    if (ctx._source.tag == null) {
+                        ctx._source.tag = params.tag;
+                    }
+                    def byYear = new HashMap();
+                    if (ctx._source.paper_cnt_by_year != null) {
+                        for (entry in ctx._source.paper_cnt_by_year) {
+                            byYear[entry.year] = entry.cnt;
+                        }
+                    }
+                    for (entry in params.deltas.entrySet()) {
+                        int year = Integer.parseInt(entry.getKey());
+                        def cnt = byYear.getOrDefault(year, 0) + entry.getValue();
+                        if (cnt > 0) {
+                            byYear[year] = cnt;
+                        } else {
+                            byYear.remove(year);
+                        }
+                    }
+                    def entries = new ArrayList();
+                    for (year in new TreeSet(byYear.keySet())) {
+                        entries.add(['year': year, 'cnt': byYear[year]]);
+                    }
+                    ctx._source.paper_cnt_by_year = entries;
+                    ctx._source.paper_count = Math.max(0, (ctx._source.paper_count ?: 0) + params.total);
+                    if (entries.isEmpty() && ctx._source.paper_count == 0) {
+                        ctx.op = ctx.op == 'create' ? 'none' : 'delete';
+                    }
+                """,
+                "params": {"tag": tag, "deltas": cnt_by_year, "total": sum(cnt_by_year.values())},
+                "lang": "painless"
+            },
+            "scripted_upsert": True,
+            "upsert": {}
+        }
+    ]
+
+
+async def update_tag_paper_counts(es: AsyncElasticsearch, tag_deltas: Dict[str, Dict[str, int]]) -> int:
+    # Applies {tag: {year: delta}} to the paper_count of hashtag documents, returns the updates that failed
+    operations = []
+    for tag, cnt_by_year in tag_deltas.items():
+        cnt_by_year = {year: cnt for year, cnt in cnt_by_year.items() if cnt != 0}
+        if cnt_by_year:
+            operations.extend(build_tag_count_update(tag, cnt_by_year))
+    return await bulk_updates(es, operations, "hashtag paper counts")
+
+
+async def get_tag_paper_counts(es: AsyncElasticsearch, tags: Iterable[str]) -> Dict[str, HashtagPaperCounts]:
+    # Paper counts of the tags in one mget per chunk. Tags no paper uses have no count document.
+    docs = await mget_sources(es, settings.es_hashtag_counts_index, tags, source=["paper_count", "paper_cnt_by_year"])
+    return {tag: HashtagPaperCounts(**doc) for tag, doc in docs.items()}
+
+
+async def bulk_updates(es: AsyncElasticsearch, operations: List[Dict], what: str) -> int:
+    # Sends (action, body) update pairs in chunks. Documents deleted meanwhile are not counted as failures.
+    failed = 0
+    chunk_size = 2 * settings.es_bulk_chunk_size
+
+    for start in range(0, len(operations), chunk_size):
+        es_resp = await es.bulk(operations=operations[start: start + chunk_size])
+        if es_resp["errors"]:
+            failed += sum(
+                1 for item in es_resp["items"]
+                if "error" in item["update"] and item["update"].get("status") != 404
+            )
+
+    if failed:
+        logger.warning(f"Failed to update {failed} {what}")
+    return failed
@@ -0,0 +1,70 @@
+from core.config import settings
+from core.logging import logger
+from utils.hashtag_relations_rebuild import rebuild_association_weights
+
+from elasticsearch import AsyncElasticsearch
+from typing import Optional
+import asyncio
+import time
+
+
+class AssociationWeightRefresher:
+    """
+    Debounced background recomputation of the association measures.
+
+    A paper write changes the number of tagged papers and the counts of its
+    tags, which moves the measures of every relation of those tags, not just
+    of the pairs it touched. Writes only mark the measures stale, and
+    `refresh_forever` recomputes all of them with rebuild_association_weights
+    once no write was seen for `delay` seconds, or at the latest `max_delay`
+    seconds after the first write since the last refresh.
+    """
+    def __init__(
+        self,
+        delay: float = settings.association_refresh_delay,
+        max_delay: float = settings.association_refresh_max_delay
+    ):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._stale_since: Optional[float] = None
+        self._written_at = 0.0
+        self._stale = asyncio.Event()
+
+    @property
+    def stale(self) -> bool:
+        return self._stale_since is not None
+
+    def mark_stale(self):
+        now = time.monotonic()
+        if self._stale_since is None:
+            self._stale_since = now
+        self._written_at = now
+        self._stale.set()
+
+    async def refresh_forever(self, es: AsyncElasticsearch):
+        while True:
+            await self._stale.wait()
+            while True:
+                due = min(self._written_at + self.delay, self._stale_since + self.max_delay)
+                if time.monotonic() >= due:
+                    break
+                await asyncio.sleep(due - time.monotonic())
+
+            # Writes made during the recomputation mark the measures stale again
+            self._stale.clear()
+            self._stale_since = None
+            try:
+                await rebuild_association_weights(es, write_counts=False)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the association weights: {e}")
+                self.mark_stale()
+
+
+# Association weight refresher of this worker
+weight_refresher: Optional[AssociationWeightRefresher] = None
+
+def get_association_weight_refresher() -> AssociationWeightRefresher:
+    global weight_refresher
+    if weight_refresher is None:
+        weight_refresher = AssociationWeightRefresher()
+    return weight_refresher
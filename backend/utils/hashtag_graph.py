@@ -0,0 +1,567 @@
+from core.config import settings
+from core.logging import logger
+from models import HashtagEdge, HashtagGraph, HashtagGraphLevelStats, HashtagNode, HashtagPaperCounts, HashtagYearCount
+from utils.es_pagination import iter_pit_hits
+from utils.hashtag_association import ASSOCIATION_WEIGHTINGS
+from utils.hashtag_graph_budget import GraphBudget
+from utils.hashtag_relations_query import in_window
+from utils.hashtag_relations_update import decode_cnt_by_year
+
+from elasticsearch import AsyncElasticsearch
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import numpy as np
+import time
+
+
+class HashtagGraphEngine:
+    """
+    The hashtag co-occurrence graph of this worker in array-backed adjacency.
+
+    Each relation is an edge e with `edge_src[e] < edge_dst[e]` as int32
+    node ids and its paper count in `edge_total[e]`. Counts per year form a
+    sparse edges x years matrix in CSR layout: the years and counts of edge e
+    are `year_keys[year_indptr[e]:year_indptr[e + 1]]` and `year_counts[...]`.
+
+    Adjacency is CSR over both directions of every edge: the neighbors of
+    node i are `neighbors[indptr[i]:indptr[i + 1]]`, sorted by descending
+    weight, so the top N neighbors are the first N entries of the slice and
+    `neighbor_edges` points back to the edge.
+
+    The stored association measures of edge e are `edge_pmi[e]`,
+    `edge_npmi[e]` and `edge_jaccard[e]`, NaN until they are computed.
+
+    Relation deltas are kept in a small overlay merged at query time, and
+    folded into the arrays once the overlay holds `max_overlay_edges` edges.
+
+    The paper counts of every tag, loaded from the hashtag_counts index and
+    kept current by paper writes, are held by tag name in `paper_counts`, so
+    graph nodes are answered without an Elasticsearch round trip.
+    """
+    def __init__(self, max_overlay_edges: int = settings.hashtag_graph_max_overlay_edges):
+        self.max_overlay_edges = max_overlay_edges
+        self.tags: List[str] = []
+        self.tag_ids: Dict[str, int] = {}
+        self.loaded = False
+        self._set_arrays(build_graph_arrays(0, *(np.empty(0, dtype=dtype) for dtype in (np.int32, np.int32, np.int32, np.int16, np.int32))))
+        # (src id, dst id) -> {year: count delta}, and node id -> {neighbor id: total delta}
+        self._edge_overlay: Dict[Tuple[int, int], Dict[int, int]] = {}
+        self._node_overlay: Dict[int, Dict[int, int]] = {}
+        # Deltas applied while the arrays are rebuilt, replayed on the new arrays. None stands for clear().
+        self._pending: Optional[List[Optional[Dict[Tuple[str, str], Dict[str, int]]]]] = None
+        # tag -> (paper count, {year: count}), and the tag deltas applied while they are loaded
+        self.paper_counts: Dict[str, Tuple[int, Dict[int, int]]] = {}
+        self._pending_tags: Optional[List[Optional[Dict[str, Dict[str, int]]]]] = None
+        self._rebuild_lock = asyncio.Lock()
+        self._compaction: Optional[asyncio.Task] = None
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_total)
+
+    @property
+    def nbytes(self) -> int:
+        # Bytes held by the arrays, without the tag strings
+        return sum(values.nbytes for values in self._arrays().values())
+
+    async def load(self, es: AsyncElasticsearch):
+        async with self._rebuild_lock:
+            self._pending, self._pending_tags = [], []
+            try:
+                tags, tag_ids = [], {}
+                src, dst, entry_edges, years, counts = array("i"), array("i"), array("i"), array("h"), array("i")
+                associations = {name: array("f") for name in ASSOCIATION_WEIGHTINGS}
+
+                def tag_id(tag: str) -> int:
+                    if tag not in tag_ids:
+                        tag_ids[tag] = len(tags)
+                        tags.append(tag)
+                    return tag_ids[tag]
+
+                async for hit in iter_pit_hits(
+                    es, index=settings.es_hashtag_relations_index, source=["src", "dst", "paper_cnt_by_year", *ASSOCIATION_WEIGHTINGS]
+                ):
+                    relation = hit["_source"]
+                    edge = len(src)
+                    src.append(tag_id(relation["src"]))
+                    dst.append(tag_id(relation["dst"]))
+                    for name, values in associations.items():
+                        values.append(relation.get(name, float("nan")))
+                    for year, cnt in decode_cnt_by_year(relation.get("paper_cnt_by_year")).items():
+                        if cnt:
+                            entry_edges.append(edge)
+                            years.append(int(year))
+                            counts.append(cnt)
+
+                # Built off the event loop, a large graph takes seconds
+                arrays = await asyncio.to_thread(
+                    build_graph_arrays, len(tags), *(np.frombuffer(values, dtype=values.typecode) if len(values) else np.empty(0, dtype=values.typecode)
+                                                     for values in (src, dst, entry_edges, years, counts)),
+                    associations={name: np.asarray(values, dtype=np.float32) for name, values in associations.items()}
+                )
+                paper_counts = {}
+                async for hit in iter_pit_hits(es, index=settings.es_hashtag_counts_index, source=["paper_count", "paper_cnt_by_year"]):
+                    counts = hit["_source"]
+                    paper_counts[hit["_id"]] = (
+                        counts.get("paper_count", 0),
+                        {entry["year"]: entry["cnt"] for entry in counts.get("paper_cnt_by_year") or []}
+                    )
+
+                self._replace(tags, tag_ids, arrays)
+                self.paper_counts = paper_counts
+                for tag_deltas in self._pending_tags:
+                    if tag_deltas is None:
+                        self.paper_counts = {}
+                    else:
+                        self._apply_tag_deltas(tag_deltas)
+            finally:
+                self._pending, self._pending_tags = None, None
+
+        self.loaded = True
+        logger.info(f"Loaded {self.edge_count} hashtag relations into the graph engine ({self.nbytes / 2**20:.1f} MB)")
+
+    async def refresh_forever(self, es: AsyncElasticsearch, interval: float = settings.hashtag_graph_refresh_interval):
+        # Picks up relations written by other workers
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load(es)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the hashtag graph engine: {e}")
+
+    async def compact(self):
+        # Folds the overlay into the arrays, rebuilt off the event loop while queries keep using the overlay
+        async with self._rebuild_lock:
+            if not self._edge_overlay:
+                return
+            self._pending = []
+            try:
+                inputs = self._compaction_input()
+                # Relations first seen in the overlay have no measures until the next load
+                associations = {
+                    name: np.concatenate([getattr(self, f"edge_{name}"), np.full(len(inputs[0]) - self.edge_count, np.nan, dtype=np.float32)])
+                    for name in ASSOCIATION_WEIGHTINGS
+                }
+                arrays = await asyncio.to_thread(build_graph_arrays, len(self.tags), *inputs, associations=associations)
+                self._replace(self.tags, self.tag_ids, arrays)
+            finally:
+                self._pending = None
+
+    def set_relations(
+        self,
+        edge_src: np.ndarray,
+        edge_dst: np.ndarray,
+        entry_edges: np.ndarray,
+        years: np.ndarray,
+        counts: np.ndarray,
+        associations: Optional[Dict[str, np.ndarray]] = None
+    ):
+        """
+        Replaces the graph with the given relations, as COO arrays over node ids.
+
+        Edge e joins `edge_src[e]` and `edge_dst[e]`, and entry i adds
+        `counts[i]` papers of `years[i]` to edge `entry_edges[i]`. Node ids
+        index `tags`, which must already hold every node. `associations`
+        maps a measure name to its value for each edge.
+        """
+        self._edge_overlay, self._node_overlay = {}, {}
+        self._set_arrays(build_graph_arrays(len(self.tags), edge_src, edge_dst, entry_edges, years, counts, associations=associations))
+
+    def apply_deltas(self, deltas: Dict[Tuple[str, str], Dict[str, int]]):
+        # Same (src, dst) -> {year: delta} shape update_hashtag_relations writes to the index
+        if self._pending is not None:
+            self._pending.append(deltas)
+        elif not self.loaded:
+            return
+
+        self._apply(deltas)
+
+        if len(self._edge_overlay) >= self.max_overlay_edges and not self._rebuild_lock.locked():
+            try:
+                self._compaction = asyncio.get_running_loop().create_task(self.compact())
+            except RuntimeError:
+                pass  # no event loop, compact() is left to the caller
+
+    def apply_tag_deltas(self, tag_deltas: Dict[str, Dict[str, int]]):
+        # Same {tag: {year: delta}} shape update_tag_paper_counts writes to the counts index
+        if self._pending_tags is not None:
+            self._pending_tags.append(tag_deltas)
+        elif not self.loaded:
+            return
+        self._apply_tag_deltas(tag_deltas)
+
+    def node(self, tag: str) -> HashtagNode:
+        counts = self.tag_paper_counts(tag)
+        return HashtagNode(name=tag, paper_count=counts.paper_count, paper_cnt_by_year=counts.paper_cnt_by_year)
+
+    def tag_paper_counts(self, tag: str) -> HashtagPaperCounts:
+        paper_count, cnt_by_year = self.paper_counts.get(tag, (0, {}))
+        return HashtagPaperCounts(
+            paper_count=paper_count,
+            paper_cnt_by_year=[HashtagYearCount(year=year, cnt=cnt) for year, cnt in sorted(cnt_by_year.items())]
+        )
+
+    def remove_tag(self, tag: str):
+        # Drops every relation of the tag, as deleting it from the relations index does
+        self.paper_counts.pop(tag, None)
+        node = self.tag_ids.get(tag)
+        if node is None:
+            return
+        deltas = {}
+        for neighbor, _, edge in self._neighbors(node):
+            pair = (node, neighbor) if tag < self.tags[neighbor] else (neighbor, node)
+            cnt_by_year = self._edge_years(pair, edge)
+            deltas[(self.tags[pair[0]], self.tags[pair[1]])] = {year: -cnt for year, cnt in cnt_by_year.items()}
+        self.apply_deltas(deltas)
+
+    def clear(self):
+        if self._pending is not None:
+            self._pending.append(None)
+        if self._pending_tags is not None:
+            self._pending_tags.append(None)
+        self._clear()
+        self.paper_counts = {}
+
+    def top_neighbors(
+        self,
+        tag: str,
+        size: int,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        weighting: str = "count"
+    ) -> List[Tuple[str, float]]:
+        node = self.tag_ids.get(tag)
+        if node is None:
+            return []
+        return [
+            (self.tags[neighbor], weight)
+            for neighbor, weight, _ in self._neighbors(node, size, year_from=year_from, year_to=year_to, weighting=weighting)
+        ]
+
+    def k_hop(self, tags: Iterable[str], hops: int) -> Dict[str, int]:
+        # Every tag within `hops` of the given ones over all relations, with its distance
+        distances = np.full(len(self.tags), -1, dtype=np.int32)
+        frontier = np.unique([self.tag_ids[tag] for tag in tags if tag in self.tag_ids]).astype(np.int64)
+        distances[frontier] = 0
+        base_nodes = len(self.indptr) - 1
+
+        for hop in range(1, hops + 1):
+            if not len(frontier):
+                break
+            # Slices of nodes without overlay are gathered in bulk, the others merged one by one
+            plain = frontier[(frontier < base_nodes) & np.array([node not in self._node_overlay for node in frontier.tolist()], dtype=bool)]
+            reached = [self.neighbors[gather_ranges(self.indptr[plain], self.indptr[plain + 1])]]
+            for node in frontier.tolist():
+                if node in self._node_overlay:
+                    reached.append(np.array([neighbor for neighbor, _, _ in self._neighbors(node)], dtype=np.int32))
+
+            reached = np.unique(np.concatenate(reached))
+            frontier = reached[distances[reached] < 0].astype(np.int64)
+            distances[frontier] = hop
+
+        return {self.tags[node]: int(distances[node]) for node in np.flatnonzero(distances >= 0).tolist()}
+
+    def expand(
+        self,
+        start_tags: List[str],
+        steps: int,
+        size: int,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        budget: Optional[GraphBudget] = None,
+        weighting: str = "count"
+    ) -> HashtagGraph:
+        # Same traversal as the index-backed expand_graph: the top `size` relations of each frontier tag
+        budget = budget or GraphBudget(start_tags)
+
+        for level in range(1, steps + 1):
+            if not budget.frontier or budget.exhausted() or budget.expired():
+                break
+            queue = budget.frontier
+            started = time.perf_counter()
+
+            candidates = []
+            for tag in queue:
+                # A level cut by the deadline still offers the relations found so far
+                if budget.expired():
+                    break
+                node = self.tag_ids.get(tag)
+                if node is None:
+                    continue
+                for neighbor, weight, edge in self._neighbors(node, size, year_from=year_from, year_to=year_to, weighting=weighting):
+                    other = self.tags[neighbor]
+                    src, dst = (tag, other) if tag < other else (other, tag)
+                    candidates.append((weight, src, dst, (src, dst, weight, edge)))
+
+            budget.take_level(candidates, lambda payload: self._edge(*payload, year_from=year_from, year_to=year_to))
+            budget.levels.append(HashtagGraphLevelStats(
+                level=level, frontier=len(queue), es_calls=0, took_ms=(time.perf_counter() - started) * 1000
+            ))
+
+        return budget.graph(make_node=self.node)
+
+    def _edge(
+        self,
+        src: str,
+        dst: str,
+        weight: float,
+        edge: int,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> HashtagEdge:
+        pair = (self.tag_ids[src], self.tag_ids[dst])
+        cnt_by_year = {
+            str(year): cnt for year, cnt in self._edge_years(pair, edge).items()
+            if in_window(year, year_from, year_to)
+        }
+        return HashtagEdge(src=src, dst=dst, weight=weight, total_cnt=sum(cnt_by_year.values()), cnt_by_year=cnt_by_year)
+
+    def _neighbors(
+        self,
+        node: int,
+        size: Optional[int] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        weighting: str = "count"
+    ) -> List[Tuple[int, float, int]]:
+        # (neighbor, weight, edge) by descending weight, edge is -1 for relations only in the overlay.
+        # With a year window the weight is the paper count inside it. With an association `weighting`
+        # it is the stored measure, and relations without one are left out.
+        if node < len(self.indptr) - 1:
+            start, end = self.indptr[node], self.indptr[node + 1]
+        else:
+            start = end = 0
+        windowed = year_from is not None or year_to is not None
+        if windowed and weighting != "count":
+            raise ValueError("Association weightings are not available within a year window")
+
+        overlay = self._node_overlay.get(node)
+        if not overlay and not windowed and weighting == "count":
+            end = end if size is None else min(end, start + size)
+            return list(zip(self.neighbors[start:end].tolist(), self.neighbor_weights[start:end].tolist(), self.neighbor_edges[start:end].tolist()))
+
+        neighbors = self.neighbors[start:end]
+        edges = self.neighbor_edges[start:end]
+        weights = self.neighbor_weights[start:end].astype(np.int64)
+        if windowed:
+            starts, ends = self.year_indptr[edges], self.year_indptr[edges + 1]
+            positions = gather_ranges(starts, ends)
+            owners = np.repeat(np.arange(len(edges)), ends - starts)
+            years = self.year_keys[positions]
+            inside = np.ones(len(positions), dtype=bool)
+            if year_from is not None:
+                inside &= years >= year_from
+            if year_to is not None:
+                inside &= years <= year_to
+            weights = np.bincount(owners[inside], weights=self.year_counts[positions][inside], minlength=len(edges)).astype(np.int64)
+
+        # Overlay deltas of neighbors already in the arrays are added in place, the rest are new relations
+        added = []
+        if overlay:
+            by_id = np.argsort(neighbors, kind="stable")
+            for neighbor, delta in overlay.items():
+                if windowed:
+                    pair = (node, neighbor) if self.tags[node] < self.tags[neighbor] else (neighbor, node)
+                    delta = sum(cnt for year, cnt in self._edge_overlay.get(pair, {}).items() if in_window(year, year_from, year_to))
+                found = np.searchsorted(neighbors, neighbor, sorter=by_id)
+                if found < len(neighbors) and neighbors[by_id[found]] == neighbor:
+                    weights[by_id[found]] += delta
+                elif delta > 0:
+                    added.append((neighbor, delta, -1))
+
+        live = weights > 0
+        if weighting != "count":
+            weights = getattr(self, f"edge_{weighting}")[edges].astype(np.float64)
+            live &= ~np.isnan(weights)
+            added = []
+
+        # Only the `size` heaviest relations and their ties are turned into Python tuples
+        live = np.flatnonzero(live)
+        if size is not None and len(live) > size:
+            threshold = np.partition(weights[live], len(live) - size)[len(live) - size]
+            live = live[weights[live] >= threshold]
+        ranked = sorted(
+            list(zip(neighbors[live].tolist(), weights[live].tolist(), edges[live].tolist())) + added,
+            key=lambda entry: (-entry[1], entry[0])
+        )
+        return ranked if size is None else ranked[:size]
+
+    def _edge_years(self, pair: Tuple[int, int], edge: int) -> Dict[int, int]:
+        cnt_by_year = {}
+        if edge >= 0:
+            start, end = self.year_indptr[edge], self.year_indptr[edge + 1]
+            cnt_by_year = dict(zip(self.year_keys[start:end].tolist(), self.year_counts[start:end].tolist()))
+        for year, delta in self._edge_overlay.get(pair, {}).items():
+            cnt_by_year[year] = cnt_by_year.get(year, 0) + delta
+        return {year: cnt for year, cnt in cnt_by_year.items() if cnt > 0}
+
+    def _find_edge(self, src: int, dst: int) -> Optional[int]:
+        if src >= len(self.indptr) - 1:
+            return None
+        start, end = self.indptr[src], self.indptr[src + 1]
+        found = np.flatnonzero(self.neighbors[start:end] == dst)
+        return int(self.neighbor_edges[start + found[0]]) if len(found) else None
+
+    def _tag_id(self, tag: str) -> int:
+        node = self.tag_ids.get(tag)
+        if node is None:
+            node = len(self.tags)
+            self.tag_ids[tag] = node
+            self.tags.append(tag)
+        return node
+
+    def _apply(self, deltas: Dict[Tuple[str, str], Dict[str, int]]):
+        for (src, dst), cnt_by_year in deltas.items():
+            pair = (self._tag_id(src), self._tag_id(dst))
+            overlay = self._edge_overlay.setdefault(pair, {})
+            for year, cnt in cnt_by_year.items():
+                if cnt:
+                    overlay[int(year)] = overlay.get(int(year), 0) + cnt
+
+            # Kept even when the total does not change, windowed queries still see the pair
+            total = sum(cnt_by_year.values())
+            for node, neighbor in (pair, pair[::-1]):
+                node_overlay = self._node_overlay.setdefault(node, {})
+                node_overlay[neighbor] = node_overlay.get(neighbor, 0) + total
+
+    def _apply_tag_deltas(self, tag_deltas: Dict[str, Dict[str, int]]):
+        # Mirrors the count script: years without papers are dropped, the total never goes below 0
+        for tag, deltas in tag_deltas.items():
+            paper_count, cnt_by_year = self.paper_counts.get(tag, (0, {}))
+            cnt_by_year = dict(cnt_by_year)
+            for year, delta in deltas.items():
+                cnt = cnt_by_year.get(int(year), 0) + delta
+                if cnt > 0:
+                    cnt_by_year[int(year)] = cnt
+                else:
+                    cnt_by_year.pop(int(year), None)
+            paper_count = max(0, paper_count + sum(deltas.values()))
+            if paper_count or cnt_by_year:
+                self.paper_counts[tag] = (paper_count, cnt_by_year)
+            else:
+                self.paper_counts.pop(tag, None)
+
+    def _clear(self):
+        self.tags, self.tag_ids = [], {}
+        self._edge_overlay, self._node_overlay = {}, {}
+        self._set_arrays(build_graph_arrays(0, *(np.empty(0, dtype=dtype) for dtype in (np.int32, np.int32, np.int32, np.int16, np.int32))))
+
+    def _replace(self, tags: List[str], tag_ids: Dict[str, int], arrays: Dict[str, np.ndarray]):
+        # Swaps in rebuilt arrays with an empty overlay, then replays what was applied meanwhile
+        self.tags, self.tag_ids = tags, tag_ids
+        self._edge_overlay, self._node_overlay = {}, {}
+        self._set_arrays(arrays)
+        for deltas in self._pending:
+            if deltas is None:
+                self._clear()
+            else:
+                self._apply(deltas)
+
+    def _compaction_input(self) -> Tuple[np.ndarray, ...]:
+        # The arrays as COO input for build_graph_arrays, with the overlay entries appended
+        new_src, new_dst = array("i"), array("i")
+        overlay_edges, overlay_years, overlay_counts = array("i"), array("h"), array("i")
+        for pair, cnt_by_year in self._edge_overlay.items():
+            edge = self._find_edge(*pair)
+            if edge is None:
+                edge = self.edge_count + len(new_src)
+                new_src.append(pair[0])
+                new_dst.append(pair[1])
+            for year, cnt in cnt_by_year.items():
+                overlay_edges.append(edge)
+                overlay_years.append(year)
+                overlay_counts.append(cnt)
+
+        entry_edges = np.repeat(np.arange(self.edge_count, dtype=np.int32), np.diff(self.year_indptr))
+        return (
+            np.concatenate([self.edge_src, np.asarray(new_src, dtype=np.int32)]),
+            np.concatenate([self.edge_dst, np.asarray(new_dst, dtype=np.int32)]),
+            np.concatenate([entry_edges, np.asarray(overlay_edges, dtype=np.int32)]),
+            np.concatenate([self.year_keys, np.asarray(overlay_years, dtype=np.int16)]),
+            np.concatenate([self.year_counts, np.asarray(overlay_counts, dtype=np.int32)])
+        )
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in GRAPH_ARRAYS}
+
+    def _set_arrays(self, arrays: Dict[str, np.ndarray]):
+        for name in GRAPH_ARRAYS:
+            setattr(self, name, arrays[name])
+
+
+def gather_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # Positions of every [start, end) range, concatenated in order
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return (offsets + np.arange(lengths.sum())).astype(np.int64)
+
+
+GRAPH_ARRAYS = (
+    "edge_src", "edge_dst", "edge_total", "year_indptr", "year_keys", "year_counts",
+    "indptr", "neighbors", "neighbor_weights", "neighbor_edges",
+    *(f"edge_{name}" for name in ASSOCIATION_WEIGHTINGS)
+)
+
+
+def build_graph_arrays(
+    node_count: int,
+    edge_src: np.ndarray,
+    edge_dst: np.ndarray,
+    entry_edges: np.ndarray,
+    years: np.ndarray,
+    counts: np.ndarray,
+    associations: Optional[Dict[str, np.ndarray]] = None
+) -> Dict[str, np.ndarray]:
+    # Sums duplicate (edge, year) entries, drops empty years and edges, then lays out both CSRs.
+    # `associations` holds the measures of each input edge, NaN where unknown.
+    keys = entry_edges.astype(np.int64) * 65536 + (years.astype(np.int64) & 0xFFFF)
+    keys, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+    positive = counts > 0
+    keys, counts = keys[positive], counts[positive]
+    entry_edges = keys // 65536
+
+    totals = np.bincount(entry_edges, weights=counts, minlength=len(edge_src)).astype(np.int64)
+    kept = np.flatnonzero(totals > 0)
+    renumber = np.full(len(edge_src), -1, dtype=np.int64)
+    renumber[kept] = np.arange(len(kept))
+
+    edge_src = edge_src[kept].astype(np.int32)
+    edge_dst = edge_dst[kept].astype(np.int32)
+    edge_total = totals[kept].astype(np.int32)
+    entry_edges = renumber[entry_edges]
+
+    edge_ids = np.arange(len(kept), dtype=np.int32)
+    nodes = np.concatenate([edge_src, edge_dst])
+    neighbors = np.concatenate([edge_dst, edge_src])
+    weights = np.concatenate([edge_total, edge_total])
+    order = np.lexsort((neighbors, -weights.astype(np.int64), nodes))
+
+    associations = associations or {}
+    return {
+        **{
+            f"edge_{name}": (associations[name][kept] if name in associations else np.full(len(kept), np.nan)).astype(np.float32)
+            for name in ASSOCIATION_WEIGHTINGS
+        },
+        "edge_src": edge_src,
+        "edge_dst": edge_dst,
+        "edge_total": edge_total,
+        "year_indptr": np.concatenate([[0], np.cumsum(np.bincount(entry_edges, minlength=len(kept)))]).astype(np.int64),
+        "year_keys": (keys % 65536).astype(np.int16),
+        "year_counts": counts.astype(np.int32),
+        "indptr": np.concatenate([[0], np.cumsum(np.bincount(nodes, minlength=node_count))]).astype(np.int64),
+        "neighbors": neighbors[order],
+        "neighbor_weights": weights[order],
+        "neighbor_edges": np.concatenate([edge_ids, edge_ids])[order]
+    }
+
+
+# Hashtag graph engine of this worker
+graph_engine: Optional[HashtagGraphEngine] = None
+
+def get_hashtag_graph_engine() -> Optional[HashtagGraphEngine]:
+    global graph_engine
+    if graph_engine is None and settings.hashtag_graph_engine_enabled:
+        graph_engine = HashtagGraphEngine()
+    return graph_engine
@@ -0,0 +1,110 @@
+from core.config import settings
+from models import HashtagEdge, HashtagGraph, HashtagGraphLevelStats, HashtagNode
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import time
+
+
+# (weight, src, dst, payload) of a relation found at the current level
+GraphCandidate = Tuple[int, str, str, Any]
+
+
+class GraphBudget:
+    """
+    Limits of one graph expansion and the graph built under them.
+
+    Each level, the relations found for the whole frontier are offered at
+    once and taken by descending weight, so a budget keeps the heaviest
+    edges rather than those of the first tags expanded. A relation whose new
+    tags would exceed `max_nodes` or the `max_fanout` new tags of a level is
+    skipped, but lighter relations between tags already in the graph are
+    still taken. `truncated_by` names the first budget that cut the graph.
+
+    Tags in `known_nodes` are already held by the client: they are neither
+    returned nor expanded again, so a delta expansion from a clicked tag
+    only carries the relations and tags the client has not seen. Every
+    relation found is incident to an expanded tag or to a new one.
+    """
+    def __init__(
+        self,
+        start_tags: Sequence[str],
+        max_nodes: int = settings.graph_max_nodes,
+        max_edges: int = settings.graph_max_edges,
+        max_fanout: int = settings.graph_max_fanout,
+        timeout_ms: float = settings.graph_timeout_ms,
+        known_nodes: Sequence[str] = ()
+    ):
+        self.max_nodes = max_nodes
+        self.max_edges = max_edges
+        self.max_fanout = max_fanout
+        self.deadline = time.perf_counter() + timeout_ms / 1000
+        self.truncated_by: Optional[str] = None
+        self.known = set(known_nodes)
+
+        self.nodes: Dict[str, None] = {}     # insertion ordered set
+        self.edges: List[HashtagEdge] = []
+        self.levels: List[HashtagGraphLevelStats] = []
+        self._seen_edges = set()
+
+        for tag in start_tags:
+            if len(self.nodes) >= max_nodes:
+                self._truncate("max_nodes")
+                break
+            self.nodes.setdefault(tag)
+        self.frontier: List[str] = list(self.nodes)
+
+    def remaining_s(self) -> float:
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def expired(self) -> bool:
+        if self.remaining_s() > 0:
+            return False
+        self._truncate("deadline")
+        return True
+
+    def exhausted(self) -> bool:
+        # Nothing more can be added, further levels would only cost time
+        return len(self.edges) >= self.max_edges or (
+            len(self.nodes) >= self.max_nodes and not self.frontier
+        )
+
+    def take_level(self, candidates: List[GraphCandidate], make_edge: Callable[[Any], HashtagEdge]) -> List[str]:
+        # Takes the level's relations by weight and returns the next frontier
+        added: List[str] = []
+        # sorted is stable: equal weights keep the order of the frontier
+        for weight, src, dst, payload in sorted(candidates, key=lambda candidate: -candidate[0]):
+            if (src, dst) in self._seen_edges:
+                continue
+            if len(self.edges) >= self.max_edges:
+                self._truncate("max_edges")
+                break
+
+            new_tags = [tag for tag in (src, dst) if tag not in self.nodes and tag not in self.known]
+            if len(self.nodes) + len(new_tags) > self.max_nodes:
+                self._truncate("max_nodes")
+                continue
+            if len(added) + len(new_tags) > self.max_fanout:
+                self._truncate("max_fanout")
+                continue
+
+            self._seen_edges.add((src, dst))
+            self.edges.append(make_edge(payload))
+            for tag in new_tags:
+                self.nodes.setdefault(tag)
+                added.append(tag)
+
+        self.frontier = added
+        return added
+
+    def graph(self, make_node: Callable[[str], HashtagNode] = lambda tag: HashtagNode(name=tag)) -> HashtagGraph:
+        # Without `make_node` nodes carry no paper counts, the caller fills them in for the whole graph
+        return HashtagGraph(
+            nodes=[make_node(tag) for tag in self.nodes if tag not in self.known],
+            edges=self.edges,
+            levels=self.levels,
+            truncated_by=self.truncated_by
+        )
+
+    def _truncate(self, budget: str):
+        if self.truncated_by is None:
+            self.truncated_by = budget
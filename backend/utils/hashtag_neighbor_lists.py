@@ -0,0 +1,238 @@
+from core.config import settings
+from core.logging import logger
+from models import HashtagNeighborListRebuildReport
+from schemas.v1 import hashtag_neighbors_index_mapping
+from migrations.index_migration import build_index_name, point_alias
+from utils.es_batch import mget_sources
+from utils.es_pagination import iter_pit_hits
+
+from elasticsearch import AsyncElasticsearch
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import numpy as np
+import time
+
+
+def build_neighbor_list_update(tag: str, weights: Dict[str, int], cap: int = settings.hashtag_neighbors_top_n) -> List[Dict]:
+    """
+    Scripted upsert setting the current paper count of some relations of `tag`.
+
+    `weights` holds absolute totals, 0 for a deleted relation. The list is
+    re-sorted and trimmed to `cap` entries, and `floor` is raised to the
+    heaviest relation trimmed or never admitted, so it stays an upper bound
+    of every relation the list leaves out.
+    """
+    return [
+        {
+            "update": {
+                "_index": settings.es_hashtag_neighbors_index,
+                "_id": tag,
+                "retry_on_conflict": settings.es_retry_on_conflict
+            }
+        },
+        {
+            "script": {
+                "source": """
+                    if (ctx._source.neighbors == null) {
+                        ctx._source.tag = params.tag;
+                        ctx._source.neighbors = new ArrayList();
+                        ctx._source.floor = 0;
+                    }
+                    def weights = new HashMap();
+                    for (entry in ctx._source.neighbors) {
+                        weights[entry.name] = entry.weight;
+                    }
+                    for (entry in params.weights.entrySet()) {
+                        if (entry.getValue() > 0) {
+                            weights[entry.getKey()] = entry.getValue();
+                        } else {
+                            weights.remove(entry.getKey());
+                        }
+                    }
+                    def entries = new ArrayList();
+                    for (entry in weights.entrySet()) {
+                        entries.add(['name': entry.getKey(), 'weight': entry.getValue()]);
+                    }
+                    entries.sort((a, b) -> a.weight != b.weight ? b.weight - a.weight : a.name.compareTo(b.name));
+                    int floor = ctx._source.floor;
+                    while (entries.size() > params.cap) {
+                        int evicted = entries.remove(entries.size() - 1).weight;
+                        if (evicted > floor) {
+                            floor = evicted;
+                        }
+                    }
+                    ctx._source.neighbors = entries;
+                    ctx._source.floor = floor;
+                    if (entries.isEmpty() && floor == 0) {
+                        ctx.op = ctx.op == 'create' ? 'none' : 'delete';
+                    }
+                """,
+                "params": {"tag": tag, "weights": weights, "cap": cap},
+                "lang": "painless"
+            },
+            "scripted_upsert": True,
+            "upsert": {}
+        }
+    ]
+
+
+async def update_neighbor_lists(es: AsyncElasticsearch, totals: Dict[Tuple[str, str], int]) -> int:
+    # Applies the new paper_cnt_total of relations to the lists of both tags, returns the lists that failed
+    weights_by_tag: Dict[str, Dict[str, int]] = {}
+    for (src, dst), total in totals.items():
+        weights_by_tag.setdefault(src, {})[dst] = total
+        weights_by_tag.setdefault(dst, {})[src] = total
+
+    operations = [
+        operation
+        for tag, weights in weights_by_tag.items()
+        for operation in build_neighbor_list_update(tag, weights)
+    ]
+    failed = 0
+    chunk_size = 2 * settings.es_bulk_chunk_size
+
+    for start in range(0, len(operations), chunk_size):
+        es_resp = await es.bulk(operations=operations[start: start + chunk_size])
+        if es_resp["errors"]:
+            failed += sum(1 for item in es_resp["items"] if "error" in item["update"])
+
+    if failed:
+        logger.warning(f"Failed to update {failed} hashtag neighbor lists, they are fixed by the next rebuild")
+    return failed
+
+
+def top_of_neighbor_list(doc: Dict[str, Any], size: int) -> Optional[List[Tuple[str, int]]]:
+    """
+    The `size` heaviest relations of a neighbor list document, or None when
+    the list cannot tell them: a relation left out of it may weigh as much
+    as the last of them.
+    """
+    neighbors = doc.get("neighbors") or []
+    floor = doc.get("floor") or 0
+
+    if len(neighbors) < size:
+        return [(entry["name"], entry["weight"]) for entry in neighbors] if floor == 0 else None
+    if size > 0 and neighbors[size - 1]["weight"] <= floor:
+        return None
+    return [(entry["name"], entry["weight"]) for entry in neighbors[:size]]
+
+
+async def get_neighbor_lists(es: AsyncElasticsearch, tags: Iterable[str], size: int) -> Dict[str, List[Tuple[str, int]]]:
+    # Top `size` neighbors of the tags answered by their lists in one mget. Tags missing here need a search.
+    docs = await mget_sources(es, settings.es_hashtag_neighbors_index, tags, source=["neighbors", "floor"])
+    lists = {}
+    for tag, doc in docs.items():
+        top = top_of_neighbor_list(doc, size)
+        if top is not None:
+            lists[tag] = top
+    return lists
+
+
+def build_neighbor_lists(
+    tags: List[str],
+    edge_src: np.ndarray,
+    edge_dst: np.ndarray,
+    edge_total: np.ndarray,
+    cap: int = settings.hashtag_neighbors_top_n
+) -> Iterator[Tuple[str, List[Tuple[str, int]], int]]:
+    # (tag, top `cap` neighbors, floor) of every tag with a relation, from edge arrays
+    nodes = np.concatenate([edge_src, edge_dst])
+    neighbors = np.concatenate([edge_dst, edge_src])
+    weights = np.concatenate([edge_total, edge_total])
+    names = np.asarray(tags, dtype=object)
+    name_ranks = np.empty(len(tags), dtype=np.int64)
+    name_ranks[np.argsort(names)] = np.arange(len(tags))
+
+    # Same order as the update script: by node, then descending weight, then neighbor name
+    order = np.lexsort((name_ranks[neighbors], -weights, nodes))
+    nodes, neighbors, weights = nodes[order], neighbors[order], weights[order]
+
+    starts = np.flatnonzero(np.r_[True, nodes[1:] != nodes[:-1]])
+    ends = np.r_[starts[1:], len(nodes)]
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        kept = min(end, start + cap)
+        floor = int(weights[kept]) if kept < end else 0
+        yield (
+            tags[nodes[start]],
+            list(zip(names[neighbors[start:kept]].tolist(), weights[start:kept].tolist())),
+            floor
+        )
+
+
+async def read_relation_arrays(es: AsyncElasticsearch) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    tag_ids: Dict[str, int] = {}
+    tags: List[str] = []
+    edge_src, edge_dst, edge_total = array("i"), array("i"), array("q")
+
+    def tag_id(tag: str) -> int:
+        if tag not in tag_ids:
+            tag_ids[tag] = len(tags)
+            tags.append(tag)
+        return tag_ids[tag]
+
+    async for hit in iter_pit_hits(
+        es, index=settings.es_hashtag_relations_index, source=["src", "dst", "paper_cnt_total"]
+    ):
+        relation = hit["_source"]
+        if relation.get("paper_cnt_total", 0) > 0:
+            edge_src.append(tag_id(relation["src"]))
+            edge_dst.append(tag_id(relation["dst"]))
+            edge_total.append(relation["paper_cnt_total"])
+
+    return (
+        tags,
+        np.frombuffer(edge_src, dtype=np.int32),
+        np.frombuffer(edge_dst, dtype=np.int32),
+        np.frombuffer(edge_total, dtype=np.int64)
+    )
+
+
+async def rebuild_neighbor_lists(
+    es: AsyncElasticsearch,
+    cap: int = settings.hashtag_neighbors_top_n,
+    delete_old: bool = True
+) -> HashtagNeighborListRebuildReport:
+    """
+    Recomputes every neighbor list from the hashtag_relations index.
+
+    Relations are read once into arrays, sorted per tag off the event loop
+    and bulk-loaded into a fresh versioned index the alias is switched to.
+    """
+    start = time.perf_counter()
+    alias = settings.es_hashtag_neighbors_index
+    new_index = build_index_name(alias, settings.es_index_version)
+
+    tags, edge_src, edge_dst, edge_total = await read_relation_arrays(es)
+    neighbor_lists = await asyncio.to_thread(lambda: list(build_neighbor_lists(tags, edge_src, edge_dst, edge_total, cap)))
+
+    await es.indices.create(index=new_index, body=hashtag_neighbors_index_mapping)
+    loaded, failed = 0, 0
+    chunk_size = settings.es_bulk_chunk_size
+
+    for chunk_start in range(0, len(neighbor_lists), chunk_size):
+        operations = []
+        for tag, neighbors, floor in neighbor_lists[chunk_start: chunk_start + chunk_size]:
+            operations.append({"index": {"_index": new_index, "_id": tag}})
+            operations.append({
+                "tag": tag,
+                "neighbors": [{"name": name, "weight": weight} for name, weight in neighbors],
+                "floor": floor
+            })
+        es_resp = await es.bulk(operations=operations)
+        errors = sum(1 for item in es_resp["items"] if "error" in item["index"]) if es_resp["errors"] else 0
+        loaded += len(es_resp["items"]) - errors
+        failed += errors
+
+    await es.indices.refresh(index=new_index)
+    await point_alias(es, alias, new_index, delete_old=delete_old)
+
+    logger.info(f"Rebuilt {loaded} hashtag neighbor lists from {len(edge_src)} relations into {new_index}")
+
+    return HashtagNeighborListRebuildReport(
+        index=new_index,
+        relations=len(edge_src),
+        lists=loaded,
+        failed=failed,
+        took_ms=int((time.perf_counter() - start) * 1000)
+    )
@@ -0,0 +1,92 @@
+from utils.hashtag_relations_update import decode_cnt_by_year
+
+from typing import Any, Dict, Optional, Tuple
+
+
+def in_window(year: int, year_from: Optional[int], year_to: Optional[int]) -> bool:
+    return (year_from is None or year >= year_from) and (year_to is None or year <= year_to)
+
+
+def build_neighbors_search(
+    tag: str,
+    size: int,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    weighting: str = "count"
+) -> Dict[str, Any]:
+    """
+    Search body for the top `size` relations of `tag`.
+
+    Without a window relations are sorted by paper_cnt_total, or by the
+    stored association measure named by `weighting`. With a window, the
+    score of a relation is the sum of its nested counts inside it, so
+    filtering, ranking and top-N selection all run in Elasticsearch.
+    """
+    tag_query = {
+        "bool": {
+            "should": [
+                {"terms": {"src": [tag]}},
+                {"terms": {"dst": [tag]}},
+            ]
+        }
+    }
+    body = {"size": size, "_source": ["src", "dst", "paper_cnt_total", "paper_cnt_by_year"]}
+
+    if year_from is None and year_to is None:
+        body["query"] = tag_query
+        if weighting == "count":
+            body["sort"] = [{"paper_cnt_total": {"order": "desc"}}]
+        else:
+            # Relations whose measures are not computed yet are left out
+            body["query"] = {"bool": {"filter": [tag_query, {"exists": {"field": weighting}}]}}
+            body["sort"] = [{weighting: {"order": "desc"}}]
+            body["_source"].append(weighting)
+        return body
+
+    year_range = {}
+    if year_from is not None:
+        year_range["gte"] = year_from
+    if year_to is not None:
+        year_range["lte"] = year_to
+
+    body["query"] = {
+        "bool": {
+            "filter": [tag_query],
+            "must": [{
+                "nested": {
+                    "path": "paper_cnt_by_year",
+                    "score_mode": "sum",
+                    "query": {
+                        "function_score": {
+                            "query": {"range": {"paper_cnt_by_year.year": year_range}},
+                            "field_value_factor": {"field": "paper_cnt_by_year.cnt"},
+                            "boost_mode": "replace"
+                        }
+                    }
+                }
+            }]
+        }
+    }
+    body["sort"] = [{"_score": {"order": "desc"}}]
+    return body
+
+
+def relation_weight(relation: Dict[str, Any], total_cnt: int, weighting: str = "count") -> Optional[float]:
+    # Weight of a relation under `weighting`, None when its measure is not stored yet
+    if weighting == "count":
+        return total_cnt
+    return relation.get(weighting)
+
+
+def relation_counts(
+    relation: Dict[str, Any],
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None
+) -> Tuple[int, Dict[str, int]]:
+    # (paper count, counts by year) of a relation document, inside the window when one is given
+    cnt_by_year = decode_cnt_by_year(relation.get("paper_cnt_by_year"))
+    if year_from is None and year_to is None:
+        return relation.get("paper_cnt_total", 1), cnt_by_year
+
+    cnt_by_year = {year: cnt for year, cnt in cnt_by_year.items() if in_window(int(year), year_from, year_to)}
+    return sum(cnt_by_year.values()), cnt_by_year
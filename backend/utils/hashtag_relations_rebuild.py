@@ -0,0 +1,392 @@
+from core.config import settings
+from core.logging import logger
+from models import HashtagRelationRebuildReport, HashtagAssociationRebuildReport, HashtagPaperCountRebuildReport
+from schemas.v1 import hashtag_counts_index_mapping, hashtag_relations_index_mapping
+from migrations.index_migration import build_index_name, point_alias
+from utils.es_pagination import iter_pit_hits
+from utils.hashtag_association import ASSOCIATION_WEIGHTINGS, association_weights, bulk_updates
+from utils.hashtag_neighbor_lists import read_relation_arrays, rebuild_neighbor_lists
+from utils.hashtag_relations_update import build_tag_pairs, build_relation_id, encode_cnt_by_year
+
+from elasticsearch import AsyncElasticsearch
+from array import array
+from heapq import merge
+import asyncio
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import os
+import tempfile
+import time
+
+
+class PairCountAccumulator:
+    """
+    Counts (src, dst, year) co-occurrences as packed int64 keys.
+
+    Keys are buffered in an int64 array and compacted with np.unique into
+    sorted (key, count) arrays, so a unique entry costs 16 bytes. Once the
+    compacted arrays hold `max_entries` entries they are spilled to disk as a
+    sorted run and merged back when iterating, which bounds memory no matter
+    how many papers are counted.
+    """
+    YEAR_BITS = 12
+    TAG_BITS = 25
+
+    def __init__(
+        self,
+        max_entries: int = settings.relations_rebuild_max_entries,
+        spill_dir: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.tag_ids: Dict[str, int] = {}
+        self.tags: List[str] = []
+        self.pending = array("q")
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.runs: List[Tuple[str, str]] = []
+        self._tmp_dir = None
+
+    def add(self, tags: List[str], year: int):
+        if not 0 <= year < (1 << self.YEAR_BITS):
+            raise ValueError(f"Year out of range: {year}")
+
+        for src, dst in build_tag_pairs(tags):
+            self.pending.append(self._encode(self._tag_id(src), self._tag_id(dst), year))
+
+        if len(self.pending) >= self.max_entries:
+            self._compact()
+
+    def iter_relations(self) -> Iterator[Tuple[str, str, Dict[str, int]]]:
+        # Yields (src, dst, cnt_by_year) grouped per pair in key order
+        self._compact()
+
+        if self.runs:
+            if len(self.keys):
+                self._spill()
+            entries = merge(*(self._iter_run(keys_path, counts_path) for keys_path, counts_path in self.runs))
+        else:
+            entries = zip(self.keys.tolist(), self.counts.tolist())
+
+        current_pair = None
+        cnt_by_year = {}
+
+        for key, cnt in entries:
+            pair = key >> self.YEAR_BITS
+            if pair != current_pair:
+                if current_pair is not None:
+                    yield self._decode_pair(current_pair) + (cnt_by_year,)
+                current_pair = pair
+                cnt_by_year = {}
+
+            year = str(key & ((1 << self.YEAR_BITS) - 1))
+            cnt_by_year[year] = cnt_by_year.get(year, 0) + cnt
+
+        if current_pair is not None:
+            yield self._decode_pair(current_pair) + (cnt_by_year,)
+
+    def close(self):
+        if self._tmp_dir:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+        self.runs = []
+
+    def _tag_id(self, tag: str) -> int:
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = len(self.tags)
+            if tag_id >= (1 << self.TAG_BITS):
+                raise ValueError("Too many distinct hashtags to pack into pair keys")
+            self.tag_ids[tag] = tag_id
+            self.tags.append(tag)
+        return tag_id
+
+    def _encode(self, src: int, dst: int, year: int) -> int:
+        return (((src << self.TAG_BITS) | dst) << self.YEAR_BITS) | year
+
+    def _decode_pair(self, pair: int) -> Tuple[str, str]:
+        src = pair >> self.TAG_BITS
+        dst = pair & ((1 << self.TAG_BITS) - 1)
+        return self.tags[src], self.tags[dst]
+
+    def _compact(self):
+        if not len(self.pending):
+            return
+
+        keys = np.concatenate([self.keys, np.frombuffer(self.pending, dtype=np.int64)])
+        counts = np.concatenate([self.counts, np.ones(len(self.pending), dtype=np.int64)])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        self.pending = array("q")
+
+        if len(self.keys) >= self.max_entries:
+            self._spill()
+
+    def _spill(self):
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="relations_rebuild_", dir=self.spill_dir)
+
+        run = len(self.runs)
+        keys_path = os.path.join(self._tmp_dir.name, f"run_{run}_keys.npy")
+        counts_path = os.path.join(self._tmp_dir.name, f"run_{run}_counts.npy")
+        np.save(keys_path, self.keys)
+        np.save(counts_path, self.counts)
+        self.runs.append((keys_path, counts_path))
+
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def _iter_run(self, keys_path: str, counts_path: str, chunk_size: int = 65536):
+        keys = np.load(keys_path, mmap_mode="r")
+        counts = np.load(counts_path, mmap_mode="r")
+        for start in range(0, len(keys), chunk_size):
+            yield from zip(keys[start: start + chunk_size].tolist(), counts[start: start + chunk_size].tolist())
+
+
+async def count_relations_from_papers(
+    es: AsyncElasticsearch,
+    accumulator: PairCountAccumulator
+) -> int:
+    paper_cnt = 0
+    async for hit in iter_pit_hits(es, index=settings.es_paper_index, source=["hashtags", "year"]):
+        paper = hit["_source"]
+        if paper.get("year") is not None:
+            accumulator.add(paper.get("hashtags") or [], paper["year"])
+        paper_cnt += 1
+    return paper_cnt
+
+
+async def bulk_load_relations(
+    es: AsyncElasticsearch,
+    index: str,
+    relations: Iterator[Tuple[str, str, Dict[str, int]]]
+) -> Tuple[int, int]:
+    loaded, failed = 0, 0
+    operations = []
+
+    async def flush():
+        nonlocal loaded, failed, operations
+        if not operations:
+            return
+
+        es_resp = await es.bulk(operations=operations)
+        loaded += len(es_resp["items"])
+        if es_resp["errors"]:
+            errors = sum(1 for item in es_resp["items"] if "error" in item["index"])
+            loaded -= errors
+            failed += errors
+        operations = []
+
+    for src, dst, cnt_by_year in relations:
+        operations.append({"index": {"_index": index, "_id": build_relation_id(src, dst)}})
+        operations.append({
+            "src": src,
+            "dst": dst,
+            "paper_cnt_total": sum(cnt_by_year.values()),
+            "paper_cnt_by_year": encode_cnt_by_year(cnt_by_year)
+        })
+        if len(operations) >= 2 * settings.es_bulk_chunk_size:
+            await flush()
+
+    await flush()
+    return loaded, failed
+
+
+async def rebuild_hashtag_relations(
+    es: AsyncElasticsearch,
+    delete_old: bool = True,
+    max_entries: int = settings.relations_rebuild_max_entries,
+    spill_dir: Optional[str] = None
+) -> HashtagRelationRebuildReport:
+    """
+    Recomputes the hashtag_relations index from the papers index.
+
+    Papers are streamed once, pair counts are bulk-loaded into a fresh
+    versioned index and the alias is switched to it. Writes made to the old
+    index while the rebuild runs are not carried over.
+    """
+    start = time.perf_counter()
+    alias = settings.es_hashtag_relations_index
+    new_index = build_index_name(alias, settings.es_index_version)
+
+    accumulator = PairCountAccumulator(max_entries=max_entries, spill_dir=spill_dir)
+    try:
+        paper_cnt = await count_relations_from_papers(es, accumulator)
+        spilled_runs = len(accumulator.runs)
+
+        await es.indices.create(index=new_index, body=hashtag_relations_index_mapping)
+        loaded, failed = await bulk_load_relations(es, new_index, accumulator.iter_relations())
+        spilled_runs = max(spilled_runs, len(accumulator.runs))
+    finally:
+        accumulator.close()
+
+    await es.indices.refresh(index=new_index)
+
+    await point_alias(es, alias, new_index, delete_old=delete_old)
+
+    logger.info(f"Rebuilt {loaded} hashtag relations from {paper_cnt} papers into {new_index}")
+
+    return HashtagRelationRebuildReport(
+        index=new_index,
+        papers=paper_cnt,
+        relations=loaded,
+        failed=failed,
+        spilled_runs=spilled_runs,
+        took_ms=int((time.perf_counter() - start) * 1000)
+    )
+
+
+def count_tag_years(tags: List[str], paper_tags: np.ndarray, paper_years: np.ndarray) -> Dict[str, Dict[str, int]]:
+    # {tag: {year: papers}} from one (tag id, year) entry per tagged paper, grouped with one np.unique.
+    # Year -1 marks a paper without a year, counted in no year.
+    keys, counts = np.unique(paper_tags.astype(np.int64) << 16 | (paper_years.astype(np.int64) & 0xFFFF), return_counts=True)
+    cnt_by_tag: Dict[str, Dict[str, int]] = {tag: {} for tag in tags}
+    for key, cnt in zip(keys.tolist(), counts.tolist()):
+        year = key & 0xFFFF
+        if year != 0xFFFF:
+            cnt_by_tag[tags[key >> 16]][str(year)] = cnt
+    return cnt_by_tag
+
+
+async def count_tag_papers(es: AsyncElasticsearch) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]], int]:
+    # Papers of every tag, in total and by year, and the number of tagged papers, counted in one pass over the papers
+    tag_ids: Dict[str, int] = {}
+    tags: List[str] = []
+    paper_tags, paper_years = array("i"), array("i")
+    paper_cnt = 0
+
+    async for hit in iter_pit_hits(es, index=settings.es_paper_index, source=["hashtags", "year"]):
+        paper = hit["_source"]
+        hashtags = set(paper.get("hashtags") or [])
+        if hashtags:
+            paper_cnt += 1
+        year = paper["year"] if paper.get("year") is not None else -1
+        for tag in hashtags:
+            if tag not in tag_ids:
+                tag_ids[tag] = len(tags)
+                tags.append(tag)
+            paper_tags.append(tag_ids[tag])
+            paper_years.append(year)
+
+    if not len(paper_tags):
+        return {}, {}, paper_cnt
+    paper_tags_np, paper_years_np = np.frombuffer(paper_tags, dtype=np.int32), np.frombuffer(paper_years, dtype=np.int32)
+    counts = np.bincount(paper_tags_np, minlength=len(tags))
+    cnt_by_year = await asyncio.to_thread(count_tag_years, tags, paper_tags_np, paper_years_np)
+    return dict(zip(tags, counts.tolist())), cnt_by_year, paper_cnt
+
+
+async def write_tag_paper_counts(
+    es: AsyncElasticsearch,
+    tag_counts: Dict[str, int],
+    cnt_by_year: Dict[str, Dict[str, int]],
+    delete_old: bool = True
+) -> Tuple[int, int]:
+    # Bulk-loads one count document per tag into a fresh versioned hashtag_counts index and switches
+    # the alias to it, so tags no paper uses any more lose theirs. Returns (hashtags, failed).
+    alias = settings.es_hashtag_counts_index
+    new_index = build_index_name(alias, settings.es_index_version)
+    await es.indices.create(index=new_index, body=hashtag_counts_index_mapping)
+
+    tags = list(tag_counts)
+    loaded, failed = 0, 0
+    chunk_size = settings.es_bulk_chunk_size
+
+    for chunk_start in range(0, len(tags), chunk_size):
+        operations = []
+        for tag in tags[chunk_start: chunk_start + chunk_size]:
+            operations.append({"index": {"_index": new_index, "_id": tag}})
+            operations.append({
+                "tag": tag,
+                "paper_count": tag_counts[tag],
+                "paper_cnt_by_year": encode_cnt_by_year(cnt_by_year.get(tag, {}))
+            })
+        es_resp = await es.bulk(operations=operations)
+        errors = sum(1 for item in es_resp["items"] if "error" in item["index"]) if es_resp["errors"] else 0
+        loaded += len(es_resp["items"]) - errors
+        failed += errors
+
+    await es.indices.refresh(index=new_index)
+    await point_alias(es, alias, new_index, delete_old=delete_old)
+    return loaded, failed
+
+
+async def rebuild_tag_paper_counts(es: AsyncElasticsearch) -> HashtagPaperCountRebuildReport:
+    # Recounts the papers of every hashtag, in total and by year, from the papers index.
+    # Paper writes made to the old counts index while it runs are not carried over.
+    start = time.perf_counter()
+    tag_counts, cnt_by_year, paper_cnt = await count_tag_papers(es)
+    hashtag_cnt, failed = await write_tag_paper_counts(es, tag_counts, cnt_by_year)
+
+    logger.info(f"Recounted the papers of {hashtag_cnt} hashtags from {paper_cnt} tagged papers")
+
+    return HashtagPaperCountRebuildReport(
+        papers=paper_cnt,
+        hashtags=hashtag_cnt,
+        failed=failed,
+        took_ms=int((time.perf_counter() - start) * 1000)
+    )
+
+
+async def rebuild_association_weights(es: AsyncElasticsearch, write_counts: bool = True) -> HashtagAssociationRebuildReport:
+    """
+    Recomputes the paper counts of every hashtag and the association
+    measures of every relation.
+
+    Papers and relations are each read once, the measures are computed for
+    all relations in one vectorized pass off the event loop and written
+    back as partial updates. Without `write_counts` the recounted paper
+    counts are only used for the measures and the hashtag_counts index,
+    which paper writes keep current, is left as it is.
+    """
+    start = time.perf_counter()
+    tag_counts, cnt_by_year, paper_cnt = await count_tag_papers(es)
+    tags, edge_src, edge_dst, edge_total = await read_relation_arrays(es)
+
+    tag_cnt = np.array([tag_counts.get(tag, 0) for tag in tags], dtype=np.int64)
+    weights = await asyncio.to_thread(association_weights, edge_total, tag_cnt[edge_src], tag_cnt[edge_dst], paper_cnt)
+
+    failed = 0
+    chunk_size = settings.es_bulk_chunk_size
+    for chunk_start in range(0, len(edge_src), chunk_size):
+        operations = []
+        for i in range(chunk_start, min(chunk_start + chunk_size, len(edge_src))):
+            relation_id = build_relation_id(tags[edge_src[i]], tags[edge_dst[i]])
+            operations.append({"update": {"_index": settings.es_hashtag_relations_index, "_id": relation_id}})
+            operations.append({"doc": {name: float(weights[name][i]) for name in ASSOCIATION_WEIGHTINGS}})
+        failed += await bulk_updates(es, operations, "hashtag relation weights")
+
+    hashtag_cnt = len(tag_counts)
+    if write_counts:
+        hashtag_cnt, hashtag_failed = await write_tag_paper_counts(es, tag_counts, cnt_by_year)
+        failed += hashtag_failed
+
+    logger.info(f"Recomputed association weights of {len(edge_src)} hashtag relations from {paper_cnt} tagged papers")
+
+    return HashtagAssociationRebuildReport(
+        papers=paper_cnt,
+        hashtags=hashtag_cnt,
+        relations=len(edge_src),
+        failed=failed,
+        took_ms=int((time.perf_counter() - start) * 1000)
+    )
+
+
+async def rebuild_relation_indices(
+    es: AsyncElasticsearch,
+    delete_old: bool = True,
+    max_entries: int = settings.relations_rebuild_max_entries,
+    spill_dir: Optional[str] = None
+) -> HashtagRelationRebuildReport:
+    """
+    Rebuilds the hashtag_relations index and everything derived from it:
+    the association measures of the new relations, then the neighbor lists.
+
+    Both the admin endpoint and the rebuild script go through here, so a
+    rebuild never leaves lists or measures of the old relations behind.
+    """
+    report = await rebuild_hashtag_relations(es, delete_old=delete_old, max_entries=max_entries, spill_dir=spill_dir)
+    report.association_weights = await rebuild_association_weights(es)
+    await es.indices.refresh(index=settings.es_hashtag_relations_index)
+    report.neighbor_lists = await rebuild_neighbor_lists(es, delete_old=delete_old)
+    return report
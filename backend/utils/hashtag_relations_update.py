@@ -1,73 +1,184 @@
 from core.config import settings
+from core.logging import logger
+from models import HashtagRelationFailure, HashtagRelationUpdateReport
+from utils.hashtag_association import update_tag_paper_counts
+from utils.hashtag_neighbor_lists import update_neighbor_lists
 
 from elasticsearch import AsyncElasticsearch
 from itertools import combinations
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from utils.hashtag_association_refresh import AssociationWeightRefresher
+    from utils.hashtag_graph import HashtagGraphEngine
 
 
 def build_tag_pairs(tags: List[str]) -> List[Tuple[str, str]]:
     return [tuple(sorted(pair)) for pair in combinations(tags, 2)]
 
 
-async def update_hashtag_relations(
-    es: AsyncElasticsearch, 
-    pairs: list[tuple[str, str]], 
+def build_relation_id(src: str, dst: str) -> str:
+    return f"{src}__{dst}"
+
+
+def aggregate_pair_deltas(
+    deltas: Dict[Tuple[str, str], Dict[str, int]],
+    pairs: List[Tuple[str, str]],
     delta: int,
     year: int
-):
-    for src, dst in pairs:
-        doc_id = f"{src}__{dst}"
+) -> Dict[Tuple[str, str], Dict[str, int]]:
+    # Merge the deltas of many papers so each pair is only written once
+    for pair in pairs:
+        cnt_by_year = deltas.setdefault(pair, {})
+        cnt_by_year[str(year)] = cnt_by_year.get(str(year), 0) + delta
+    return deltas
 
-        create_new_or_increase = {
-            "script": {
-                "source": """
-                    ctx._source.paper_cnt_total += params.delta;
-                    if (ctx._source.paper_cnt_by_year.containsKey(params.year)) {
-                        ctx._source.paper_cnt_by_year[params.year] += params.delta;
-                    } else {
-                        ctx._source.paper_cnt_by_year[params.year] = params.delta;
-                    }
-                """,
-                "params": {"delta": delta, "year": str(year)},
-                "lang": "painless"
-            },
-            "upsert": {
-                "src": src,
-                "dst": dst,
-                "paper_cnt_total": delta,
-                "paper_cnt_by_year": {str(year): delta}
+
+def aggregate_tag_deltas(
+    tag_deltas: Dict[str, Dict[str, int]],
+    tags: List[str],
+    delta: int,
+    year: int
+) -> Dict[str, Dict[str, int]]:
+    # Per-tag paper count deltas of many papers, in the same shape as the pair deltas
+    for tag in set(tags):
+        cnt_by_year = tag_deltas.setdefault(tag, {})
+        cnt_by_year[str(year)] = cnt_by_year.get(str(year), 0) + delta
+    return tag_deltas
+
+
+def encode_cnt_by_year(cnt_by_year: Dict[str, int]) -> List[Dict[str, int]]:
+    # Stored as nested {year, cnt} entries, in year order
+    return [{"year": int(year), "cnt": cnt} for year, cnt in sorted(cnt_by_year.items()) if cnt > 0]
+
+
+def decode_cnt_by_year(value: Any) -> Dict[str, int]:
+    # Also reads the former {"2024": cnt} object of documents written before the nested layout
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return {str(year): cnt for year, cnt in value.items() if cnt}
+    return {str(entry["year"]): entry["cnt"] for entry in value if entry.get("cnt")}
+
+
+def build_relation_update(src: str, dst: str, cnt_by_year: Dict[str, int]) -> List[Dict]:
+    # One scripted upsert covers creating, increasing, decreasing and deleting a relation
+    return [
+        {
+            "update": {
+                "_index": settings.es_hashtag_relations_index,
+                "_id": build_relation_id(src, dst),
+                "retry_on_conflict": settings.es_retry_on_conflict
             }
-        }
-        
-        decrease_or_delete = {
+        },
+        {
             "script": {
                 "source": """
-                    ctx._source.paper_cnt_total += params.delta;
-                    if (ctx._source.paper_cnt_by_year.containsKey(params.year)) {
-                        ctx._source.paper_cnt_by_year[params.year] += params.delta;
-                        if (ctx._source.paper_cnt_by_year[params.year] <= 0) {
-                            ctx._source.paper_cnt_by_year.remove(params.year);
+                    if (ctx._source.paper_cnt_total == null) {
+                        ctx._source.paper_cnt_total = 0;
+                    }
+                    def byYear = new HashMap();
+                    def stored = ctx._source.paper_cnt_by_year;
+                    if (stored instanceof Map) {
+                        for (entry in stored.entrySet()) {
+                            byYear[Integer.parseInt(entry.getKey())] = entry.getValue();
+                        }
+                    } else if (stored != null) {
+                        for (entry in stored) {
+                            byYear[entry.year] = entry.cnt;
+                        }
+                    }
+                    for (entry in params.deltas.entrySet()) {
+                        int year = Integer.parseInt(entry.getKey());
+                        def cnt = byYear.getOrDefault(year, 0) + entry.getValue();
+                        if (cnt > 0) {
+                            byYear[year] = cnt;
+                        } else {
+                            byYear.remove(year);
                         }
                     }
+                    def entries = new ArrayList();
+                    for (year in new TreeSet(byYear.keySet())) {
+                        entries.add(['year': year, 'cnt': byYear[year]]);
+                    }
+                    ctx._source.paper_cnt_by_year = entries;
+                    ctx._source.paper_cnt_total += params.total;
                     if (ctx._source.paper_cnt_total <= 0) {
-                        ctx.op = 'delete';
+                        ctx.op = ctx.op == 'create' ? 'none' : 'delete';
                     }
                 """,
-                "params": {"delta": delta, "year": str(year)},
+                "params": {"deltas": cnt_by_year, "total": sum(cnt_by_year.values())},
                 "lang": "painless"
-            }
+            },
+            "scripted_upsert": True,
+            "upsert": {"src": src, "dst": dst},
+            # The new total is returned to update the neighbor lists of both tags
+            "_source": ["paper_cnt_total"]
         }
-        
-        es_body = create_new_or_increase if delta > 0 else decrease_or_delete
-        
-        try:
-            await es.update(
-                index=settings.es_hashtag_relations_index,
-                id=doc_id,
-                body=es_body
-            )
-        except Exception as e:
-            print(f"Failed to update relation {src}-{dst}: {e}")
-            
-            
-        
\ No newline at end of file
+    ]
+
+
+async def update_hashtag_relations(
+    es: AsyncElasticsearch,
+    deltas: Dict[Tuple[str, str], Dict[str, int]],
+    graph: Optional["HashtagGraphEngine"] = None,
+    tag_deltas: Optional[Dict[str, Dict[str, int]]] = None,
+    weight_refresher: Optional["AssociationWeightRefresher"] = None
+) -> HashtagRelationUpdateReport:
+    # Deltas written to the index are also applied to the neighbor lists of their tags and to
+    # `graph`, the in-memory copy of this worker. The association weights are not recomputed
+    # here, the write only marks them stale in `weight_refresher`.
+    if tag_deltas:
+        await update_tag_paper_counts(es, tag_deltas)
+        if graph is not None:
+            graph.apply_tag_deltas(tag_deltas)
+
+    operations = []
+    pairs = []
+
+    for (src, dst), cnt_by_year in deltas.items():
+        cnt_by_year = {year: cnt for year, cnt in cnt_by_year.items() if cnt != 0}
+        if not cnt_by_year:
+            continue
+
+        operations.extend(build_relation_update(src, dst, cnt_by_year))
+        pairs.append((src, dst))
+
+    report = HashtagRelationUpdateReport()
+    totals: Dict[Tuple[str, str], int] = {}
+    chunk_size = settings.es_bulk_chunk_size
+
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start: start + chunk_size]
+        es_resp = await es.bulk(operations=operations[2 * start: 2 * (start + chunk_size)])
+        report.updated += len(chunk)
+
+        for (src, dst), item in zip(chunk, es_resp["items"]):
+            result = item["update"]
+            if "error" not in result:
+                totals[(src, dst)] = result.get("get", {}).get("_source", {}).get("paper_cnt_total", 0)
+                continue
+
+            error = result["error"]
+            report.updated -= 1
+            report.failed.append(HashtagRelationFailure(
+                src=src,
+                dst=dst,
+                status=result["status"],
+                error=error.get("reason") or error.get("type", "")
+            ))
+
+    if report.failed:
+        logger.warning(f"Failed to update {len(report.failed)} hashtag relations")
+
+    if totals:
+        await update_neighbor_lists(es, totals)
+        if weight_refresher is not None:
+            weight_refresher.mark_stale()
+
+    if graph is not None:
+        failed_pairs = {(failure.src, failure.dst) for failure in report.failed}
+        graph.apply_deltas({pair: cnt_by_year for pair, cnt_by_year in deltas.items() if pair not in failed_pairs})
+
+    return report
+
@@ -0,0 +1,210 @@
+from core.config import settings
+from core.logging import logger
+from models import HashtagListItem
+from utils.es_pagination import iter_pit_hits
+
+from elasticsearch import AsyncElasticsearch
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import numpy as np
+
+
+class HashtagVectorIndex:
+    """
+    Hashtag embeddings of this worker in one float32 matrix, for similarity
+    search without an Elasticsearch round trip.
+
+    Row i of the matrix holds the unit-normalized embedding of `ids[i]`, and
+    `norms[i]` its original length, so pooling averages the raw embeddings
+    as the exact mode does while scoring is a plain dot product. A deleted
+    row is filled with the last one, keeping the live rows contiguous.
+
+    Until the first load completes the index is not used for recommendations.
+    """
+    def __init__(self, dim: int = settings.hashtag_emb_dim):
+        self.dim = dim
+        self.ids: List[str] = []
+        self.items: List[HashtagListItem] = []
+        self.rows: Dict[str, int] = {}
+        self.loaded = False
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        # Writes and clears (None) made while a load is running, replayed on the loaded matrix
+        self._pending: Optional[List[Optional[Tuple[str, Optional[Sequence[float]], Optional[HashtagListItem]]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, hashtag_id: str) -> bool:
+        return hashtag_id in self.rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:len(self.ids)]
+
+    @property
+    def norms(self) -> np.ndarray:
+        return self._norms[:len(self.ids)]
+
+    async def load(self, es: AsyncElasticsearch):
+        self._pending = []
+        try:
+            loaded = HashtagVectorIndex(self.dim)
+            async for hit in iter_pit_hits(es, index=settings.es_hashtag_index, source=["name", "description", "embedding"]):
+                source = hit["_source"]
+                loaded.upsert(hit["_id"], source["embedding"], HashtagListItem(name=source["name"], description=source["description"]))
+
+            for write in self._pending:
+                if write is None:
+                    # Everything the snapshot read was deleted after it
+                    loaded = HashtagVectorIndex(self.dim)
+                    continue
+                hashtag_id, embedding, item = write
+                if embedding is None:
+                    loaded.remove(hashtag_id)
+                else:
+                    loaded.upsert(hashtag_id, embedding, item)
+        finally:
+            self._pending = None
+
+        self.ids, self.items, self.rows = loaded.ids, loaded.items, loaded.rows
+        self._vectors, self._norms = loaded._vectors, loaded._norms
+        self.loaded = True
+        logger.info(f"Loaded {len(self)} hashtag embeddings into the vector index")
+
+    async def refresh_forever(self, es: AsyncElasticsearch, interval: float = settings.hashtag_vector_index_refresh_interval):
+        # Picks up hashtags written by other workers
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load(es)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the hashtag vector index: {e}")
+
+    def upsert(self, hashtag_id: str, embedding: Sequence[float], item: HashtagListItem):
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Embedding of {hashtag_id!r} has shape {vector.shape}, expected ({self.dim},)")
+        if self._pending is not None:
+            self._pending.append((hashtag_id, embedding, item))
+
+        row = self.rows.get(hashtag_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self._vectors):
+                self._grow()
+            self.ids.append(hashtag_id)
+            self.items.append(item)
+            self.rows[hashtag_id] = row
+        else:
+            self.items[row] = item
+
+        norm = float(np.linalg.norm(vector))
+        self._vectors[row] = vector / norm if norm else vector
+        self._norms[row] = norm
+
+    def remove(self, hashtag_id: str):
+        if self._pending is not None:
+            self._pending.append((hashtag_id, None, None))
+
+        row = self.rows.pop(hashtag_id, None)
+        if row is None:
+            return
+
+        last = len(self.ids) - 1
+        if row != last:
+            self.ids[row], self.items[row] = self.ids[last], self.items[last]
+            self._vectors[row], self._norms[row] = self._vectors[last], self._norms[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+        self.items.pop()
+
+    def clear(self):
+        if self._pending is not None:
+            self._pending.append(None)
+        self.ids, self.items, self.rows = [], [], {}
+
+    def pool(self, hashtag_ids: Iterable[str]) -> Optional[np.ndarray]:
+        # Unit-length mean of the raw embeddings of the known ids, None when none is known
+        rows = [self.rows[hashtag_id] for hashtag_id in hashtag_ids if hashtag_id in self.rows]
+        if not rows:
+            return None
+
+        pooled = (self._vectors[rows] * self._norms[rows, None]).mean(axis=0)
+        norm = np.linalg.norm(pooled)
+        return pooled / norm if norm else pooled
+
+    def search(self, query: np.ndarray, size: int, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        return self.search_batch(query[None, :], size, [exclude])[0]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        size: int,
+        excludes: Optional[Sequence[Iterable[str]]] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Top `size` hashtags by cosine similarity for each row of `queries`.
+
+        All queries are scored in one matrix multiply. `excludes[i]` lists the
+        ids left out of the results of query i.
+        """
+        count = len(self.ids)
+        if count == 0 or size <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = np.asarray(queries, dtype=np.float32) @ self.vectors.T
+        for i, exclude in enumerate(excludes or ()):
+            rows = [self.rows[hashtag_id] for hashtag_id in exclude if hashtag_id in self.rows]
+            scores[i, rows] = -np.inf
+
+        # argpartition finds the top k in linear time, only those k are sorted
+        k = min(size, count)
+        top = np.argpartition(scores, count - k, axis=1)[:, count - k:] if k < count else np.tile(np.arange(count), (len(scores), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [(self.ids[row], float(score)) for row, score in zip(rows, row_scores) if score != -np.inf]
+            for rows, row_scores in zip(top.tolist(), top_scores.tolist())
+        ]
+
+    def recommend(self, selected_tags: Sequence[str], size: int) -> List[HashtagListItem]:
+        return self.recommend_batch([selected_tags], size)[0]
+
+    def recommend_batch(self, selections: Sequence[Sequence[str]], size: int) -> List[List[HashtagListItem]]:
+        pooled = [self.pool(selected_tags) for selected_tags in selections]
+        known = [i for i, vector in enumerate(pooled) if vector is not None]
+
+        results: List[List[HashtagListItem]] = [[] for _ in selections]
+        if not known:
+            return results
+
+        hits = self.search_batch(
+            np.stack([pooled[i] for i in known]),
+            size,
+            [selections[i] for i in known]
+        )
+        for i, query_hits in zip(known, hits):
+            results[i] = [self.items[self.rows[hashtag_id]] for hashtag_id, _ in query_hits]
+        return results
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self._vectors))
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        norms = np.empty(capacity, dtype=np.float32)
+        vectors[:len(self.ids)] = self.vectors
+        norms[:len(self.ids)] = self.norms
+        self._vectors, self._norms = vectors, norms
+
+
+# Hashtag vector index of this worker
+vector_index: Optional[HashtagVectorIndex] = None
+
+def get_hashtag_vector_index() -> Optional[HashtagVectorIndex]:
+    global vector_index
+    if vector_index is None and settings.hashtag_vector_index_enabled:
+        vector_index = HashtagVectorIndex()
+    return vector_index
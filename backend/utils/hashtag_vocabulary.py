@@ -0,0 +1,107 @@
+from core.config import settings
+from core.logging import logger
+from utils.es_batch import mget_sources
+from utils.es_pagination import iter_pit_hits
+
+from elasticsearch import AsyncElasticsearch
+from typing import Iterable, List, Optional, Set, Tuple
+import asyncio
+
+
+class HashtagVocabulary:
+    """
+    The set of normalized hashtag ids known to this worker.
+
+    Modes:
+    - "trust": existence checks are answered from memory only. Hashtags
+      created by other workers are rejected until the next refresh.
+    - "verify": cache misses are double-checked against the index with one
+      batched lookup, and found ids are added to the cache.
+
+    Until the first load completes every check goes to the index.
+    """
+    def __init__(self, mode: str = settings.hashtag_vocabulary_mode):
+        if mode not in ("trust", "verify"):
+            raise ValueError(f"Unknown hashtag vocabulary mode: {mode}")
+
+        self.mode = mode
+        self.ids: Set[str] = set()
+        self.loaded = False
+        # Adds, discards and clears (None) made while a load is running, replayed on the loaded set
+        self._pending: Optional[List[Optional[Tuple[str, bool]]]] = None
+
+    def __contains__(self, hashtag_id: str) -> bool:
+        return hashtag_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    async def load(self, es: AsyncElasticsearch):
+        self._pending = []
+        try:
+            ids = set()
+            async for hit in iter_pit_hits(es, index=settings.es_hashtag_index, source=False):
+                ids.add(hit["_id"])
+
+            for change in self._pending:
+                if change is None:
+                    # Everything the snapshot read was deleted after it
+                    ids = set()
+                    continue
+                hashtag_id, present = change
+                if present:
+                    ids.add(hashtag_id)
+                else:
+                    ids.discard(hashtag_id)
+        finally:
+            self._pending = None
+
+        self.ids = ids
+        self.loaded = True
+        logger.info(f"Loaded {len(ids)} hashtags into the vocabulary cache")
+
+    async def refresh_forever(self, es: AsyncElasticsearch, interval: float = settings.hashtag_vocabulary_refresh_interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load(es)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the hashtag vocabulary: {e}")
+
+    def add(self, hashtag_id: str):
+        if self._pending is not None:
+            self._pending.append((hashtag_id, True))
+        self.ids.add(hashtag_id)
+
+    def discard(self, hashtag_id: str):
+        if self._pending is not None:
+            self._pending.append((hashtag_id, False))
+        self.ids.discard(hashtag_id)
+
+    def clear(self):
+        if self._pending is not None:
+            self._pending.append(None)
+        self.ids = set()
+
+    async def find_missing(self, es: AsyncElasticsearch, hashtag_ids: Iterable[str]) -> Set[str]:
+        hashtag_ids = set(hashtag_ids)
+        missing = {hashtag_id for hashtag_id in hashtag_ids if hashtag_id not in self.ids}
+
+        if not missing or (self.loaded and self.mode == "trust"):
+            return missing
+
+        found = await mget_sources(es, index=settings.es_hashtag_index, ids=missing, source=False)
+        for hashtag_id in found:
+            self.add(hashtag_id)
+
+        return missing - found.keys()
+
+
+# Hashtag vocabulary cache of this worker
+vocabulary: Optional[HashtagVocabulary] = None
+
+def get_hashtag_vocabulary() -> HashtagVocabulary:
+    global vocabulary
+    if vocabulary is None:
+        vocabulary = HashtagVocabulary()
+    return vocabulary
@@ -0,0 +1,188 @@
+from core.config import settings
+from core.logging import logger
+from utils.llm_cache import LLMCache, build_request_key, get_llm_cache
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import openai
+import random
+
+
+class LLMProvider:
+    # Part of every cache key, so outputs of different providers for the same model never mix
+    name: str = ""
+
+    async def complete(self, prompt: str, model: str, **params) -> str:
+        raise NotImplementedError
+
+    async def embed(self, texts: List[str], model: str, dimensions: int) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, api_key: str = settings.openai_api_key):
+        # Retries and timeouts are handled by LLMClient
+        self.client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+
+    async def complete(self, prompt: str, model: str, **params) -> str:
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        )
+        return response.choices[0].message.content.strip()
+
+    async def embed(self, texts: List[str], model: str, dimensions: int) -> List[List[float]]:
+        response = await self.client.embeddings.create(input=texts, model=model, dimensions=dimensions)
+        return [data.embedding for data in response.data]
+
+
+class LocalProvider(LLMProvider):
+    # Deterministic offline stand-in: the same input always gives the same output
+    name = "local"
+
+    async def complete(self, prompt: str, model: str, **params) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"<{model} completion {digest}>"
+
+    async def embed(self, texts: List[str], model: str, dimensions: int) -> List[List[float]]:
+        embeddings = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(f"{model}:{text}".encode("utf-8")).digest()[:8], "big")
+            rng = random.Random(seed)
+            embeddings.append([rng.uniform(-1, 1) for _ in range(dimensions)])
+        return embeddings
+
+
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError
+)
+
+
+class LLMClient:
+    """
+    Async front of an LLMProvider.
+
+    At most `max_concurrency` provider calls run at once, each call is bounded
+    by `timeout` seconds and transient failures are retried with exponential
+    backoff. Identical requests in flight at the same time share one call,
+    and finished results are kept in the optional persistent `cache`.
+    """
+    def __init__(
+        self,
+        provider: LLMProvider,
+        max_concurrency: int = settings.llm_max_concurrency,
+        timeout: float = settings.llm_timeout,
+        max_retries: int = settings.llm_max_retries,
+        retry_backoff: float = settings.llm_retry_backoff,
+        cache: Optional[LLMCache] = None
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def complete(self, prompt: str, model: str, **params) -> str:
+        key = build_request_key("complete", self.provider.name, model, prompt, params)
+        cached = self.cache.get(key) if self.cache else None
+        if cached is not None:
+            return cached
+
+        return await self._coalesce(key, lambda: self.provider.complete(prompt, model, **params))
+
+    async def embed(self, texts: List[str], model: str, dimensions: int) -> List[List[float]]:
+        # Cached per text, so only the texts never embedded before are sent to the provider
+        params = {"dimensions": dimensions}
+        keys = [build_request_key("embed", self.provider.name, model, text, params) for text in texts]
+        embeddings = [self.cache.get(key) if self.cache else None for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            batch_key = build_request_key("embed_batch", self.provider.name, model, missing_texts, params)
+            new_embeddings = await self._coalesce(
+                batch_key,
+                lambda: self.provider.embed(missing_texts, model, dimensions),
+                cache_keys=[keys[i] for i in missing]
+            )
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+
+        return embeddings
+
+    async def _coalesce(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        cache_keys: Optional[List[str]] = None
+    ) -> Any:
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._call_and_store(key, call, cache_keys))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # A cancelled caller must not cancel the call other callers are waiting on
+        return await asyncio.shield(future)
+
+    async def _call_and_store(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        cache_keys: Optional[List[str]] = None
+    ) -> Any:
+        result = await self._call_with_retry(call)
+        if self.cache:
+            if cache_keys is None:
+                self.cache.put(key, result)
+            else:
+                for cache_key, value in zip(cache_keys, result):
+                    self.cache.put(cache_key, value)
+        return result
+
+    async def _call_with_retry(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    return await asyncio.wait_for(call(), timeout=self.timeout)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+def build_llm_provider(name: str) -> LLMProvider:
+    if name == "openai":
+        return OpenAIProvider()
+    if name == "local":
+        return LocalProvider()
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+# LLM clients of this worker
+llm_client: Optional[LLMClient] = None
+embedding_client: Optional[LLMClient] = None
+
+def get_llm_client() -> LLMClient:
+    global llm_client
+    if llm_client is None:
+        llm_client = LLMClient(build_llm_provider(settings.llm_provider), cache=get_llm_cache())
+    return llm_client
+
+
+def get_embedding_client() -> LLMClient:
+    global embedding_client
+    if embedding_client is None:
+        embedding_client = LLMClient(build_llm_provider(settings.embedding_provider), cache=get_llm_cache())
+    return embedding_client
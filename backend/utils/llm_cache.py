@@ -0,0 +1,130 @@
+from core.config import settings
+from models import LLMCacheStats
+
+from typing import Any, Callable, Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def build_request_key(kind: str, provider: str, model: str, payload: Any, params: Dict[str, Any]) -> str:
+    # Content address of a generation request: same provider, model, input and parameters give the same key
+    request = json.dumps([kind, provider, model, payload, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent cache of generated outputs in a local SQLite file.
+
+    Values are stored as JSON under their request key. When the stored values
+    exceed `max_bytes` the least recently used entries are evicted. The file
+    can be shared by the backend workers and the offline scripts.
+    """
+    def __init__(self, path: str = settings.llm_cache_path, max_bytes: int = settings.llm_cache_max_mb * 1024 * 1024):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        self._size = self._total_size()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time())
+            )
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def stats(self) -> LLMCacheStats:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            self._size = self._total_size()
+        lookups = self.hits + self.misses
+        return LLMCacheStats(
+            path=self.path,
+            entries=entries,
+            size_bytes=self._size,
+            max_bytes=self.max_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / lookups if lookups else 0.0
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        # Other processes may share the file, so start from the real size
+        self._size = self._total_size()
+        target = int(self.max_bytes * 0.9)
+        while self._size > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+
+            evicted = []
+            for key, size in rows:
+                if self._size <= target:
+                    break
+                evicted.append((key,))
+                self._size -= size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+
+def get_or_generate(cache: Optional[LLMCache], key: str, generate: Callable[[], Any]) -> Any:
+    # Synchronous read-through helper for the offline scripts
+    value = cache.get(key) if cache else None
+    if value is None:
+        value = generate()
+        if cache and value is not None:
+            cache.put(key, value)
+    return value
+
+
+# LLM output cache of this process
+llm_cache: Optional[LLMCache] = None
+
+def get_llm_cache() -> Optional[LLMCache]:
+    global llm_cache
+    if llm_cache is None and settings.llm_cache_enabled:
+        llm_cache = LLMCache()
+    return llm_cache
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Iterable, List, Optional, Type
+
+
+def source_fields(model: Type[BaseModel]) -> List[str]:
+    # The _source includes that fill a response model, so unused fields never leave Elasticsearch
+    return list(model.model_fields)
+
+
+def resolve_projection(
+    model: Type[BaseModel],
+    fields: Optional[Iterable[str]],
+    always: Iterable[str] = ("id",)
+) -> Optional[List[str]]:
+    """
+    Turns requested field names into _source includes for `model`.
+
+    Names may be repeated or comma separated. Returns None, meaning the whole
+    document, when nothing is requested, and raises ValueError for names that
+    are not fields of `model`.
+    """
+    requested = [name.strip() for field in fields or [] for name in field.split(",") if name.strip()]
+    if not requested:
+        return None
+
+    unknown = sorted(set(requested) - set(model.model_fields))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return list(dict.fromkeys([*always, *requested]))
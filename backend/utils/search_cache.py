@@ -0,0 +1,109 @@
+from core.config import settings
+from models import PaperSearchRequest, SearchCacheStats
+
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import time
+
+
+def canonical_search_request(search_request: PaperSearchRequest) -> PaperSearchRequest:
+    # Requests with the same results map to the same request: tag lists are sorted and deduplicated,
+    # and the query is lowercased with whitespace collapsed, as the standard analyzer does anyway
+    query = " ".join((search_request.query or "").split()).lower()
+    fields = sorted({name.strip() for field in search_request.fields or [] for name in field.split(",") if name.strip()})
+
+    return PaperSearchRequest(
+        query=query or None,
+        must=sorted(set(search_request.must or [])),
+        should=sorted(set(search_request.should or [])),
+        must_not=sorted(set(search_request.must_not or [])),
+        size=search_request.size,
+        fields=fields or None,
+        facets=search_request.facets
+    )
+
+
+class SearchResultCache:
+    """
+    LRU cache of paper search results of this worker, bounded by entry count and TTL.
+
+    Every paper write calls `invalidate`, which bumps the generation and drops
+    all entries. A result is only stored if no write happened since its search
+    started, and none is stored within `write_settle` seconds of a write, so a
+    search that ran before Elasticsearch refreshed cannot cache pre-write hits.
+    Writes made by other workers are picked up once entries expire.
+    """
+    def __init__(
+        self,
+        max_entries: int = settings.search_cache_max_entries,
+        ttl: float = settings.search_cache_ttl,
+        write_settle: float = settings.search_cache_write_settle
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.write_settle = write_settle
+        self.generation = 0
+        self.last_write_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any, generation: int):
+        # `generation` is the one read before the search was sent
+        now = time.monotonic()
+        if generation != self.generation or now - self.last_write_at < self.write_settle:
+            return
+
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        self.generation += 1
+        self.last_write_at = time.monotonic()
+        self._entries.clear()
+
+    def stats(self) -> SearchCacheStats:
+        lookups = self.hits + self.misses
+        return SearchCacheStats(
+            entries=len(self._entries),
+            max_entries=self.max_entries,
+            ttl=self.ttl,
+            generation=self.generation,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            hit_rate=self.hits / lookups if lookups else 0.0
+        )
+
+
+# Paper search result cache of this worker
+search_cache: Optional[SearchResultCache] = None
+
+def get_search_cache() -> Optional[SearchResultCache]:
+    global search_cache
+    if search_cache is None and settings.search_cache_enabled:
+        search_cache = SearchResultCache()
+    return search_cache
@@ -0,0 +1,30 @@
+from models import PaperFacetCounts, PaperFacetRequest
+
+from typing import Any, Dict
+
+
+def build_facet_aggs(facets: PaperFacetRequest) -> Dict[str, Any]:
+    # Aggregations run over every matching paper, not only the returned page
+    aggs = {}
+    if facets.hashtags:
+        aggs["hashtags"] = {"terms": {"field": "hashtags", "size": facets.hashtags}}
+    if facets.authors:
+        aggs["authors"] = {"terms": {"field": "authors", "size": facets.authors}}
+    if facets.year_interval:
+        aggs["years"] = {"histogram": {"field": "year", "interval": facets.year_interval, "min_doc_count": 1}}
+    return aggs
+
+
+def parse_facet_aggs(aggregations: Dict[str, Any]) -> PaperFacetCounts:
+    def terms(name):
+        buckets = aggregations.get(name, {}).get("buckets", [])
+        return [{"key": bucket["key"], "count": bucket["doc_count"]} for bucket in buckets]
+
+    return PaperFacetCounts(
+        hashtags=terms("hashtags"),
+        authors=terms("authors"),
+        years=[
+            {"year": int(bucket["key"]), "count": bucket["doc_count"]}
+            for bucket in aggregations.get("years", {}).get("buckets", [])
+        ]
+    )
@@ -0,0 +1,59 @@
+from core.config import settings
+
+from elasticsearch import AsyncElasticsearch
+from typing import Any, Dict, Optional
+
+
+def compute_static_rank(year: Optional[int], base_year: int = settings.static_rank_base_year) -> Optional[float]:
+    # Recency as a positive rank_feature value: 1 for papers up to base_year, one more per later year
+    if year is None:
+        return None
+    return float(max(1, year - base_year + 1))
+
+
+# Same formula as compute_static_rank, for recomputing every paper inside Elasticsearch
+STATIC_RANK_SCRIPT = {
+    "source": """
+        if (ctx._source.year != null) {
+            ctx._source.static_rank = (double) Math.max(1, ctx._source.year - params.base_year + 1);
+        } else {
+            ctx._source.remove('static_rank');
+        }
+    """,
+    "lang": "painless",
+    "params": {"base_year": settings.static_rank_base_year}
+}
+
+
+def build_static_rank_query(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adds the static rank to the score of `query` without changing what matches.
+
+    The rank_feature clause is optional, so papers without a rank still match,
+    and its saturated score stays on the scale of the text relevance instead
+    of adding the raw year to every hit.
+    """
+    return {
+        "bool": {
+            "must": [query],
+            "should": [{
+                "rank_feature": {
+                    "field": "static_rank",
+                    "saturation": {"pivot": settings.static_rank_pivot},
+                    "boost": settings.static_rank_boost
+                }
+            }]
+        }
+    }
+
+
+async def refresh_static_ranks(es: AsyncElasticsearch, index: str = settings.es_paper_index) -> int:
+    # Recomputes the rank of every paper in place, e.g. after a formula change or a reindex
+    es_resp = await es.update_by_query(
+        index=index,
+        body={"script": STATIC_RANK_SCRIPT, "query": {"match_all": {}}},
+        conflicts="proceed",
+        wait_for_completion=True,
+        refresh=True
+    )
+    return es_resp["updated"]
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import AsyncIterator
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def iter_ndjson(items: AsyncIterator[BaseModel], flush_bytes: int = 1 << 16) -> AsyncIterator[bytes]:
+    # One JSON document per line, sent in chunks of about `flush_bytes`. Unset fields of projected items are left out
+    buffer = bytearray()
+    async for item in items:
+        buffer += item.model_dump_json(exclude_unset=True).encode("utf-8")
+        buffer += b"\n"
+        if len(buffer) >= flush_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
@@ -38,8 +38,13 @@ export const fetchRecommendations = async (selectedTags) => {
 };
 
 
-export const fetchGraph = async (tags) => {
-  const res = await fetch(`${API_URL}/api/v1/hashtags/graph`, {
+export const fetchGraph = async (tags, { yearFrom, yearTo, weighting } = {}) => {
+  const params = new URLSearchParams();
+  if (yearFrom != null) params.append("year_from", yearFrom);
+  if (yearTo != null) params.append("year_to", yearTo);
+  if (weighting) params.append("weighting", weighting);
+
+  const res = await fetch(`${API_URL}/api/v1/hashtags/graph?${params}`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(tags)
@@ -49,3 +54,19 @@ export const fetchGraph = async (tags) => {
   
   return await res.json();
 };
+
+
+export const fetchGraphDelta = async (tags, knownNodes, { weighting } = {}) => {
+  const params = new URLSearchParams();
+  if (weighting) params.append("weighting", weighting);
+
+  const res = await fetch(`${API_URL}/api/v1/hashtags/graph/expand?${params}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ tags, known_nodes: knownNodes })
+  });
+
+  if (!res.ok) throw new Error("Failed to expand hashtag graph");
+
+  return await res.json();
+};
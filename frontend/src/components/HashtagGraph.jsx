@@ -7,7 +7,29 @@ import * as THREE from 'three';
 import * as d3 from 'd3';
 import Graph from 'graphology';
 import louvain from 'graphology-communities-louvain';
-import { fetchGraph } from "../api/hashtagApi";
+import { fetchGraph, fetchGraphDelta } from "../api/hashtagApi";
+
+const toLink = (edge) => ({
+  source: edge.src,
+  target: edge.dst,
+  weight: edge.weight || 1,
+  total_cnt: edge.total_cnt,
+  cnt_by_year: edge.cnt_by_year
+});
+
+// Nodes keep the paper counts sent with them, used to size their labels
+const toNode = (node) => ({
+  id: node.name,
+  paper_count: node.paper_count,
+  paper_cnt_by_year: node.paper_cnt_by_year
+});
+
+// Links are keyed by their tag pair, as force-graph replaces source and target with node objects
+const linkKey = (link) => {
+  const source = link.source.id ?? link.source;
+  const target = link.target.id ?? link.target;
+  return source < target ? `${source}__${target}` : `${target}__${source}`;
+};
 
 const HashtagGraph = ({ tags, steps = 2 }) => {
   const [graphData, setGraphData] = useState({ nodes: [], links: []});
@@ -38,20 +60,30 @@ const HashtagGraph = ({ tags, steps = 2 }) => {
       
       fetchGraph(tags)
         .then(data => {
-          const nodes = data.nodes.map(tag => ({id: tag}))
-          const links = data.edges.map(edge => ({
-            source: edge.src,
-            target: edge.dst,
-            weight: edge.weight || 1,
-            total_cnt: edge.total_cnt,
-            cnt_by_year: edge.cnt_by_year
-          }));
+          const nodes = data.nodes.map(toNode);
+          const links = data.edges.map(toLink);
           setGraphData({ nodes, links });
         })
     }, 
     [tags, steps]
   );
 
+  // Clicking a node adds only the tags and relations the graph does not have yet
+  const expandNode = (node) => {
+    const knownNodes = graphData.nodes.map(n => n.id);
+
+    fetchGraphDelta([node.id], knownNodes)
+      .then(data => {
+        setGraphData(({ nodes, links }) => {
+          const knownLinks = new Set(links.map(linkKey));
+          return {
+            nodes: [...nodes, ...data.nodes.map(toNode)],
+            links: [...links, ...data.edges.map(toLink).filter(link => !knownLinks.has(linkKey(link)))]
+          };
+        });
+      })
+  };
+
   // Compute max link weight for edge color scaling
   const maxWeight = useMemo(() => {
     if (!graphData.links || graphData.links.length === 0) return 1;
@@ -124,8 +156,8 @@ const HashtagGraph = ({ tags, steps = 2 }) => {
     const material = new THREE.SpriteMaterial({ map: texture, depthWrite: false });
     const sprite = new THREE.Sprite(material);
 
-    // Scale sprite to fit graph nicely
-    const scaleFactor = 0.15;
+    // Scale sprite to fit graph nicely, hashtags used by more papers a little larger
+    const scaleFactor = 0.15 * (1 + Math.log10((node.paper_count || 0) + 1) / 2);
     sprite.scale.set(canvas.width * scaleFactor, canvas.height * scaleFactor, 1);
 
     return sprite;
@@ -148,6 +180,7 @@ const HashtagGraph = ({ tags, steps = 2 }) => {
 
       nodeAutoColorBy="cluster"
       nodeThreeObject={nodeThreeObject}
+      onNodeClick={expandNode}
 
       // Remove direction particles and arrows
       linkDirectionalParticles={0}
@@ -0,0 +1,471 @@
+from core.config import settings
+from utils.embedding_store import write_embedding_store
+from utils.llm import get_embedding_client, get_llm_client
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+####
+# To run this script at the project root: `PYTHONPATH=./backend python scripts/offline_pipeline.py`
+#
+# Builds the dataset in stages, replacing the former scripts 1-4:
+#   fetch    - collect paper metadata from arXiv (or --papers-file)
+#   tag      - generate hashtags for each new or changed abstract
+#   filter   - keep hashtags used by at least --min-tag-count papers
+#   describe - generate a description for each kept hashtag
+#   embed    - embed the kept hashtags in chunks
+#   export   - write the JSON files read by backend/scripts/upload_papers_and_hashtags.py
+#
+# Per-item state is kept in a SQLite file, so a rerun only processes papers whose title or abstract
+# changed and hashtags that are new to the kept set. LLM calls run concurrently behind the bounded,
+# retrying client of the backend (LLM_PROVIDER=local runs it offline).
+####
+
+HASHTAG_PROMPT = '''
+    Given the following abstract, give me 10 terms of topics or classification or keywords.
+     7 of terms should be common, broad, general in papers and 3 are more specific to abstract,
+     please output only one line.
+     term should be no more than three words,
+     start with uppercase letters,
+      be separated by commas, and contain no other text, and no any symbol characters.
+      No need to exist in abstract
+    '''
+
+DESCRIPTION_PROMPT = '''
+    Given this term, give me a short description of it. no more than a paragraph. The term is :
+    '''
+
+KEYWORDS = [
+    "quantum machine learning", "quantum computing", "quantum cryptography", "quantum algorithms", "quantum information theory",
+    "quantum error correction", "quantum simulation", "quantum physics", "quantum materials", "quantum field theory "
+]
+
+STAGES = ["fetch", "tag", "filter", "describe", "embed", "export"]
+
+
+def content_hash(paper: Dict[str, Any]) -> str:
+    # Hashtags only depend on the abstract, the title is kept to catch replaced records
+    data = json.dumps([paper.get("title", ""), paper.get("abstract", "")], ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def parse_hashtags(raw: str) -> List[str]:
+    tags = []
+    for tag in raw.split(","):
+        tag = tag.strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class PipelineState:
+    """
+    Per-item progress of the pipeline.
+
+    A paper is (re)tagged when the hash of its title and abstract differs from
+    the hash its hashtags were generated from. Hashtag usage counts are kept up
+    to date as papers are tagged, so the filter stage is a lookup, and a kept
+    hashtag is described and embedded once.
+    """
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS papers (
+                arxiv_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                hashtags TEXT,
+                hashtags_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS hashtags (
+                name TEXT PRIMARY KEY,
+                paper_cnt INTEGER NOT NULL DEFAULT 0,
+                description TEXT,
+                embedding TEXT
+            );
+            -- Partial indexes hold only the pending items, so finding work does not scan the corpus
+            CREATE INDEX IF NOT EXISTS papers_to_tag ON papers (arxiv_id)
+                WHERE hashtags_hash IS NULL OR hashtags_hash != content_hash;
+            CREATE INDEX IF NOT EXISTS hashtags_to_describe ON hashtags (name) WHERE description IS NULL;
+            CREATE INDEX IF NOT EXISTS hashtags_to_embed ON hashtags (name) WHERE embedding IS NULL;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def upsert_paper(self, paper: Dict[str, Any]) -> bool:
+        # Returns True when the paper is new or its content changed
+        new_hash = content_hash(paper)
+        row = self.conn.execute(
+            "SELECT content_hash, data FROM papers WHERE arxiv_id = ?", (paper["arxiv_id"],)
+        ).fetchone()
+        data = json.dumps({k: v for k, v in paper.items() if k != "hashtags"}, ensure_ascii=False)
+
+        if row is None:
+            self.conn.execute(
+                "INSERT INTO papers (arxiv_id, data, content_hash) VALUES (?, ?, ?)",
+                (paper["arxiv_id"], data, new_hash)
+            )
+            return True
+
+        if row[0] == new_hash and row[1] == data:
+            return False
+
+        self.conn.execute(
+            "UPDATE papers SET data = ?, content_hash = ? WHERE arxiv_id = ?",
+            (data, new_hash, paper["arxiv_id"])
+        )
+        return row[0] != new_hash
+
+    def papers_to_tag(self) -> List[tuple]:
+        return self.conn.execute("""
+            SELECT arxiv_id, data, content_hash FROM papers
+            WHERE hashtags_hash IS NULL OR hashtags_hash != content_hash
+        """).fetchall()
+
+    def set_paper_hashtags(self, arxiv_id: str, hashtags: List[str], tagged_hash: str):
+        row = self.conn.execute("SELECT hashtags FROM papers WHERE arxiv_id = ?", (arxiv_id,)).fetchone()
+        old_hashtags = json.loads(row[0]) if row[0] else []
+
+        self.conn.executemany(
+            "UPDATE hashtags SET paper_cnt = paper_cnt - 1 WHERE name = ?",
+            [(tag,) for tag in old_hashtags]
+        )
+        self.conn.executemany(
+            "INSERT INTO hashtags (name, paper_cnt) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET paper_cnt = paper_cnt + 1",
+            [(tag,) for tag in hashtags]
+        )
+        self.conn.execute(
+            "UPDATE papers SET hashtags = ?, hashtags_hash = ? WHERE arxiv_id = ?",
+            (json.dumps(hashtags, ensure_ascii=False), tagged_hash, arxiv_id)
+        )
+
+    def kept_hashtag_count(self, min_tag_count: int) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM hashtags WHERE paper_cnt >= ?", (min_tag_count,)
+        ).fetchone()[0]
+
+    def hashtags_to_describe(self, min_tag_count: int) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT name FROM hashtags WHERE description IS NULL AND paper_cnt >= ?",
+            (min_tag_count,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def hashtags_to_embed(self, min_tag_count: int) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT name FROM hashtags WHERE embedding IS NULL AND paper_cnt >= ?",
+            (min_tag_count,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def set_description(self, name: str, description: str):
+        self.conn.execute("UPDATE hashtags SET description = ? WHERE name = ?", (description, name))
+
+    def set_embedding(self, name: str, embedding: List[float]):
+        self.conn.execute("UPDATE hashtags SET embedding = ? WHERE name = ?", (json.dumps(embedding), name))
+
+    def iter_papers(self, kept: set) -> Iterator[Dict[str, Any]]:
+        for data, hashtags in self.conn.execute("SELECT data, hashtags FROM papers ORDER BY rowid"):
+            paper = json.loads(data)
+            paper["hashtags"] = [tag for tag in json.loads(hashtags or "[]") if tag in kept]
+            yield paper
+
+    def iter_kept_hashtags(self, min_tag_count: int) -> Iterator[tuple]:
+        yield from self.conn.execute(
+            "SELECT name, description, embedding FROM hashtags WHERE paper_cnt >= ? ORDER BY name",
+            (min_tag_count,)
+        )
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+
+def iter_arxiv_papers(keywords: List[str], max_results_per_keyword: int) -> Iterator[Dict]:
+    import arxiv
+
+    client = arxiv.Client()
+    seen = set()
+
+    for keyword in keywords:
+        search = arxiv.Search(
+            query=keyword,
+            max_results=max_results_per_keyword * 4,
+            sort_by=arxiv.SortCriterion.Relevance
+        )
+        category_counter = 0
+        for result in client.results(search):
+            if category_counter == max_results_per_keyword:
+                break
+            arxiv_id = result.get_short_id()
+            if arxiv_id in seen:
+                continue
+            seen.add(arxiv_id)
+            category_counter += 1
+
+            yield {
+                "arxiv_id": arxiv_id,
+                "doi": result.doi if result.doi else "",
+                "title": result.title.strip().replace("\n", " "),
+                "abstract": result.summary.strip().replace("\n", " "),
+                "year": result.published.year,
+                "authors": [author.name for author in result.authors]
+            }
+
+
+def iter_file_papers(papers_path: str) -> Iterator[Dict]:
+    from utils.handle_json import iter_json_items
+
+    for paper in iter_json_items(papers_path):
+        if paper.get("arxiv_id"):
+            yield paper
+
+
+def run_fetch(state: PipelineState, papers: Iterable[Dict]) -> int:
+    changed = 0
+    for paper in papers:
+        changed += state.upsert_paper(paper)
+    state.commit()
+    return changed
+
+
+async def run_bounded(
+    state: PipelineState,
+    items: List[Any],
+    work: Callable[[Any], Awaitable[Any]],
+    on_done: Callable[[Any, Any], None],
+    concurrency: int,
+    label: str
+) -> int:
+    # Items are processed in windows so a large backlog never creates all its tasks at once.
+    # State is committed after each window, so an interrupted run keeps its finished items.
+    done, failed = 0, 0
+    for window in iter_chunks(items, concurrency * 4):
+        results = await asyncio.gather(*(work(item) for item in window), return_exceptions=True)
+        for item, result in zip(window, results):
+            if isinstance(result, Exception):
+                failed += 1
+                print(f"[{label}] failed: {result!r}")
+                continue
+            on_done(item, result)
+            done += 1
+        state.commit()
+        print(f"[{label}] {done}/{len(items)} done")
+
+    if failed:
+        print(f"[{label}] {failed} items failed, rerun to retry them")
+    return done
+
+
+async def run_tag(state: PipelineState, model: str, concurrency: int) -> int:
+    pending = state.papers_to_tag()
+    client = get_llm_client()
+
+    async def work(row):
+        paper = json.loads(row[1])
+        return await client.complete(HASHTAG_PROMPT + paper["abstract"], model=model)
+
+    def on_done(row, raw):
+        state.set_paper_hashtags(row[0], parse_hashtags(raw), row[2])
+
+    return await run_bounded(state, pending, work, on_done, concurrency, "tag")
+
+
+async def run_describe(state: PipelineState, model: str, min_tag_count: int, concurrency: int) -> int:
+    pending = state.hashtags_to_describe(min_tag_count)
+    client = get_llm_client()
+
+    async def work(tag):
+        return await client.complete(DESCRIPTION_PROMPT + tag, model=model)
+
+    def on_done(tag, description):
+        state.set_description(tag, description)
+
+    return await run_bounded(state, pending, work, on_done, concurrency, "describe")
+
+
+async def run_embed(
+    state: PipelineState,
+    model: str,
+    dimensions: int,
+    min_tag_count: int,
+    batch_size: int,
+    concurrency: int
+) -> int:
+    pending = list(iter_chunks(state.hashtags_to_embed(min_tag_count), batch_size))
+    client = get_embedding_client()
+
+    async def work(tags):
+        return await client.embed(tags, model=model, dimensions=dimensions)
+
+    embedded = 0
+
+    def on_done(tags, embeddings):
+        nonlocal embedded
+        for tag, embedding in zip(tags, embeddings):
+            state.set_embedding(tag, embedding)
+        embedded += len(tags)
+
+    await run_bounded(state, pending, work, on_done, concurrency, "embed")
+    return embedded
+
+
+def write_json_stream(path: Path, items: Iterator[Any], as_object: bool = False):
+    # Writes one item at a time, then renames, so readers never see a partial file
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{" if as_object else "[")
+        for i, item in enumerate(items):
+            f.write(",\n" if i else "\n")
+            if as_object:
+                key, value = item
+                f.write(f"{json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}")
+            else:
+                f.write(json.dumps(item, ensure_ascii=False))
+        f.write("\n}" if as_object else "\n]")
+    os.replace(tmp_path, path)
+
+
+def run_export(
+    state: PipelineState,
+    output_dir: Path,
+    name: str,
+    min_tag_count: int,
+    embeddings_format: str = "json"
+) -> Dict[str, str]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    kept = {row[0] for row in state.iter_kept_hashtags(min_tag_count)}
+
+    paths = {
+        "papers": output_dir / f"{name}.json",
+        "tag_desc": output_dir / f"{name}_tag_desc.json",
+        "tag_embs": output_dir / (f"{name}_tag_embs.json" if embeddings_format == "json" else f"{name}_tag_embs")
+    }
+    write_json_stream(paths["papers"], state.iter_papers(kept))
+    write_json_stream(
+        paths["tag_desc"],
+        ((tag, desc) for tag, desc, _ in state.iter_kept_hashtags(min_tag_count) if desc is not None),
+        as_object=True
+    )
+    embeddings = ((tag, json.loads(emb)) for tag, _, emb in state.iter_kept_hashtags(min_tag_count) if emb is not None)
+    if embeddings_format == "json":
+        write_json_stream(paths["tag_embs"], embeddings, as_object=True)
+    else:
+        write_embedding_store(paths["tag_embs"], embeddings, dtype=embeddings_format)
+    return {key: str(path) for key, path in paths.items()}
+
+
+async def main(args):
+    state = PipelineState(args.state)
+    stages = STAGES[STAGES.index(args.from_stage): STAGES.index(args.to_stage) + 1]
+    changed = False
+    start = time.perf_counter()
+
+    try:
+        if "fetch" in stages:
+            if args.papers_file:
+                papers = iter_file_papers(args.papers_file)
+            else:
+                papers = iter_arxiv_papers(args.keywords, args.max_results_per_keyword)
+            fetched = run_fetch(state, papers)
+            changed |= fetched > 0
+            print(f"[fetch] {fetched} new or changed papers")
+
+        if "tag" in stages:
+            changed |= await run_tag(state, args.model, args.concurrency) > 0
+
+        if "filter" in stages:
+            # Usage counts are maintained while tagging, keeping hashtags is a threshold on them
+            print(f"[filter] {state.kept_hashtag_count(args.min_tag_count)} hashtags used by >= {args.min_tag_count} papers")
+            if state.get_meta("min_tag_count") != str(args.min_tag_count):
+                state.set_meta("min_tag_count", str(args.min_tag_count))
+                state.commit()
+                changed = True
+
+        if "describe" in stages:
+            changed |= await run_describe(state, args.model, args.min_tag_count, args.concurrency) > 0
+
+        if "embed" in stages:
+            changed |= await run_embed(
+                state,
+                settings.embedding_model,
+                settings.hashtag_emb_dim,
+                args.min_tag_count,
+                args.embed_batch_size,
+                args.concurrency
+            ) > 0
+
+        if "export" in stages:
+            if changed or args.force_export or state.get_meta("exported") is None:
+                paths = run_export(state, Path(args.output_dir), args.name, args.min_tag_count, args.embeddings_format)
+                state.set_meta("exported", json.dumps(paths))
+                state.commit()
+                print(f"[export] wrote {', '.join(paths.values())}")
+            else:
+                print("[export] nothing changed, skipped")
+    finally:
+        state.close()
+
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    data_dir_path = Path(__file__).resolve().parent.parent.parent / "data_cache"
+
+    parser = argparse.ArgumentParser(description="Incremental offline pipeline building the paper and hashtag dataset")
+    parser.add_argument("--state", default=str(data_dir_path / "pipeline_state.sqlite3"))
+    parser.add_argument("--output-dir", default=str(data_dir_path))
+    parser.add_argument("--name", default="quantum_500", help="Prefix of the exported files")
+    parser.add_argument("--papers-file", help="Read papers from a JSON/JSONL file instead of arXiv")
+    parser.add_argument("--keywords", nargs="+", default=KEYWORDS)
+    parser.add_argument("--max-results-per-keyword", type=int, default=50)
+    parser.add_argument("--min-tag-count", type=int, default=2, help="Papers a hashtag must appear in to be kept")
+    parser.add_argument("--model", default=settings.hashtag_suggestion_model)
+    parser.add_argument("--concurrency", type=int, default=settings.llm_max_concurrency, help="Requests per window")
+    parser.add_argument("--embed-batch-size", type=int, default=256, help="Hashtags per embeddings request")
+    parser.add_argument("--from-stage", choices=STAGES, default=STAGES[0])
+    parser.add_argument("--to-stage", choices=STAGES, default=STAGES[-1])
+    parser.add_argument(
+        "--embeddings-format",
+        choices=["json", "float32", "float16"],
+        default="json",
+        help="Export embeddings as JSON or as a memory-mapped store of the given precision"
+    )
+    parser.add_argument("--force-export", action="store_true")
+
+    asyncio.run(main(parser.parse_args()))